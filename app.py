@@ -12,20 +12,12 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization"]
 )
 
-import os
-from flask import send_file, abort
-from urllib.parse import unquote
+from modules.utils.storage import STORAGE_ROOT
 
 @app.route('/images/<path:filename>')
 def serve_image(filename):
-    base_path = r"C:\Users\User\Documents\backend\mnt"
-    file_path = os.path.join(base_path, unquote(filename))
-    
-    if os.path.isfile(file_path):
-        return send_file(file_path)
-    else:
-        app.logger.error(f"File not found: {file_path}")
-        abort(404)
+    # 저장소 루트 밖 경로(../ 등)는 send_from_directory가 404로 처리
+    return send_from_directory(STORAGE_ROOT, filename)
 
 
 
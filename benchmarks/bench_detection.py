@@ -0,0 +1,245 @@
+"""객체 검출 처리량 벤치마크
+
+합성 JPEG 코퍼스로 process_detection(및 선택적으로 백그라운드 작업 run_detection_job)을
+실행하고 images/s, 단계별(read, decode, infer, postprocess, write) p50/p95/p99 지연,
+최대 RSS를 JSON으로 기록한다. 시나리오마다 새 프로세스에서 실행하므로 최대 RSS는 그 시나리오의 값이다.
+
+    python -m benchmarks.bench_detection --count 200 --width 1920 --height 1080 --model both
+    python -m benchmarks.bench_detection --worker --baseline benchmarks/results/detection-abc1234.json
+
+--worker는 images/detect_images/failed_results/progress 컬렉션에 쓰기 때문에
+반드시 별도 DB(DB_NAME)를 가리키는 mongod에서 실행해야 한다. 끝나면 넣은 이미지를 지우고
+images_changed()로 events/rollups/카운터에서도 정리한다. 작업이 FilePath를 저장소 루트 기준으로
+읽으므로 합성 이미지는 STORAGE_ROOT 아래 임시 디렉터리에 만들고 끝나면 지운다.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from modules.utils.storage import STORAGE_ROOT, storage_path
+
+STAGES = ['read', 'decode', 'infer', 'postprocess', 'write']
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+class StubBoxes:
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+
+class StubResult:
+    def __init__(self, data: np.ndarray):
+        self.boxes = StubBoxes(data)
+
+
+class StubModel:
+    """입력 이미지 내용만으로 박스를 결정하는 결정적 YOLO 대체 모델"""
+    names = {0: 'deer', 1: 'pig', 2: 'racoon'}
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+
+    def __call__(self, image: np.ndarray):
+        if self.latency:
+            time.sleep(self.latency)
+        height, width = image.shape[:2]
+        seed = int(image[::64, ::64].sum()) % (2 ** 32)
+        rng = np.random.default_rng(seed)
+        boxes = []
+        for _ in range(rng.integers(0, 3)):
+            x1, y1 = rng.uniform(0, width * 0.7), rng.uniform(0, height * 0.7)
+            boxes.append([x1, y1, x1 + width * 0.2, y1 + height * 0.2,
+                          rng.uniform(0.3, 0.99), rng.integers(0, 3)])
+        return [StubResult(np.array(boxes, dtype=np.float32).reshape(-1, 6))]
+
+
+def build_corpus(directory: str, count: int, width: int, height: int, quality: int) -> List[str]:
+    """고정 배경 + 잡음 + 일부 프레임에 밝은 사각형(동물)을 넣은 합성 JPEG 생성"""
+    rng = np.random.default_rng(0)
+    background = np.linspace(0, 200, width, dtype=np.float32)[None, :, None].repeat(height, 0).repeat(3, 2)
+    paths = []
+    for index in range(count):
+        frame = background + rng.normal(0, 8, background.shape)
+        if index % 3 == 1:
+            x, y = rng.integers(0, width // 2), rng.integers(0, height // 2)
+            frame[y:y + height // 4, x:x + width // 4] = 240
+        path = os.path.join(directory, f"bench_{index:06d}.jpg")
+        cv2.imwrite(path, np.clip(frame, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality])
+        paths.append(path)
+    return paths
+
+
+def summarize(timings: Dict[str, List[float]], images: int, elapsed: float) -> Dict:
+    stages = {}
+    for stage in STAGES:
+        values = np.array(timings.get(stage, []), dtype=np.float64) * 1000
+        if not len(values):
+            continue
+        stages[stage] = {
+            'count': int(len(values)),
+            'p50_ms': round(float(np.percentile(values, 50)), 3),
+            'p95_ms': round(float(np.percentile(values, 95)), 3),
+            'p99_ms': round(float(np.percentile(values, 99)), 3),
+            'mean_ms': round(float(values.mean()), 3)
+        }
+    return {
+        'images': images,
+        'elapsed_s': round(elapsed, 3),
+        'images_per_s': round(images / elapsed, 2) if elapsed else 0,
+        'stages': stages,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def bench_process_detection(detection, paths: List[str]) -> Dict:
+    """파일 읽기 + process_detection 단일 이미지 경로 측정"""
+    timings: Dict[str, List[float]] = {}
+    started = time.perf_counter()
+    for path in paths:
+        read_started = time.perf_counter()
+        with open(path, 'rb') as f:
+            image_data = f.read()
+        detection.record_stage(timings, 'read', read_started)
+        detection.process_detection(image_data, os.path.basename(path), timings)
+    return summarize(timings, len(paths), time.perf_counter() - started)
+
+
+def bench_worker(detection, paths: List[str], burst: int, mode: str, prefilter: bool) -> Dict:
+    """합성 이미지 문서를 넣고 run_detection_job 전체(읽기~DB 쓰기) 측정"""
+    from modules.changes import images_changed, snapshot
+    from modules.database import db
+
+    project_id = f"bench-{uuid.uuid4().hex[:8]}"
+    docs = [{
+        'FileName': os.path.basename(path),
+        'FilePath': storage_path(os.path.relpath(path, STORAGE_ROOT).replace(os.sep, '/')),
+        'ProjectInfo': {'ProjectName': project_id, 'ID': project_id},
+        'evtnum': index // burst + 1,
+        'inspection_complete': False
+    } for index, path in enumerate(paths)]
+    image_ids = [str(object_id) for object_id in db.images.insert_many(docs).inserted_ids]
+
+    try:
+        timings: Dict[str, List[float]] = {}
+        started = time.perf_counter()
+        counters = detection.run_detection_job(image_ids, use_prefilter=prefilter, mode=mode,
+                                               use_cache=False, timings=timings)
+        result = summarize(timings, len(paths), time.perf_counter() - started)
+        result['counters'] = counters
+        return result
+    finally:
+        object_ids = [doc['_id'] for doc in docs]
+        before = snapshot(object_ids)
+        db.images.delete_many({'ProjectInfo.ID': project_id})
+        images_changed(before=before)  # 요약/집계/카운터에 남은 행 정리
+        db.detect_images.delete_many({'Image_id': {'$in': object_ids}})
+        db.failed_results.delete_many({'Image_id': {'$in': image_ids}})
+
+
+def run_scenario(scenario: str, model_name: str, params: Dict, paths: List[str]) -> Dict:
+    """시나리오 하나 실행 (run_isolated가 새 프로세스에서 호출)"""
+    from modules.ai_detection import detection
+
+    if model_name == 'stub':
+        detection.model = StubModel(params['stub_latency_ms'])
+    if scenario == 'worker':
+        return bench_worker(detection, paths, params['burst'], params['mode'], params['prefilter'])
+    return bench_process_detection(detection, paths)
+
+
+def run_isolated(scenario: str, model_name: str, params: Dict, paths: List[str]) -> Dict:
+    """새 프로세스에서 시나리오 실행 (ru_maxrss는 프로세스 최대값이라 이전 시나리오 값을 물려받지 않도록)"""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_scenario, (scenario, model_name, params, paths))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def print_comparison(current: Dict, baseline: Dict) -> None:
+    """같은 이름의 실행 결과끼리 images/s와 단계별 p95 변화율 출력"""
+    for name, run in current['runs'].items():
+        base = baseline.get('runs', {}).get(name)
+        if not base:
+            continue
+        change = (run['images_per_s'] - base['images_per_s']) / base['images_per_s'] * 100 if base['images_per_s'] else 0
+        print(f"[{name}] images/s {base['images_per_s']} -> {run['images_per_s']} ({change:+.1f}%)")
+        for stage, stats in run['stages'].items():
+            if stage in base['stages']:
+                print(f"    {stage:<12} p95 {base['stages'][stage]['p95_ms']}ms -> {stats['p95_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='객체 검출 처리량 벤치마크')
+    parser.add_argument('--count', type=int, default=100, help='합성 이미지 수')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--quality', type=int, default=90, help='JPEG 품질')
+    parser.add_argument('--model', choices=['stub', 'real', 'both'], default='stub')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='스텁 모델 추론 지연')
+    parser.add_argument('--worker', action='store_true', help='run_detection_job 전체 측정 (별도 DB 필요)')
+    parser.add_argument('--burst', type=int, default=3, help='--worker 사용 시 이벤트당 프레임 수')
+    parser.add_argument('--mode', choices=['frame', 'event'], default='frame')
+    parser.add_argument('--prefilter', action='store_true')
+    parser.add_argument('--output', help='결과 JSON 경로 (기본값: benchmarks/results/detection-<commit>.json)')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    args = parser.parse_args()
+
+    selected = ['stub', 'real'] if args.model == 'both' else [args.model]
+
+    # --worker가 저장소 루트 기준 상대 경로로 읽을 수 있도록 STORAGE_ROOT 아래에 생성
+    os.makedirs(STORAGE_ROOT, exist_ok=True)
+    corpus_dir = tempfile.mkdtemp(prefix='bench_detection_', dir=STORAGE_ROOT)
+    try:
+        paths = build_corpus(corpus_dir, args.count, args.width, args.height, args.quality)
+        runs = {}
+        for name in selected:
+            runs[f"process_detection/{name}"] = run_isolated('process_detection', name, vars(args), paths)
+            if args.worker:
+                runs[f"worker/{name}"] = run_isolated('worker', name, vars(args), paths)
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': sys.version.split()[0],
+        'params': vars(args),
+        'runs': runs
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"detection-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, run in runs.items():
+        print(f"[{name}] {run['images_per_s']} images/s, peak RSS {run['peak_rss_mb']}MB")
+        for stage, stats in run['stages'].items():
+            print(f"    {stage:<12} p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  p99 {stats['p99_ms']}ms")
+    print(f"결과 저장: {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
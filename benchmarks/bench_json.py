@@ -0,0 +1,126 @@
+"""JSON 프로바이더 직렬화 벤치마크
+
+목록 응답과 같은 형태(ObjectId, datetime, 중첩 ProjectInfo, bbox 목록)의 이미지 1,000개 페이로드를
+CustomJSONProvider(표준 json)와 OrjsonProvider로 각각 직렬화해 p50/p95 시간과 처리량을 비교한다.
+DB나 모델 없이 실행된다.
+
+    python -m benchmarks.bench_json --images 1000 --repeat 200
+    python -m benchmarks.bench_json --binary-kb 64   # 이미지마다 Binary 필드 포함 (null 정책으로 제외)
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from bson import ObjectId
+from bson.binary import Binary
+from flask import Flask
+
+from modules.utils.json_provider import CustomJSONProvider, OrjsonProvider, orjson
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+SPECIES = ['고라니', '멧돼지', '너구리', '삵', '오소리', '담비', '미확인']
+
+
+def build_payload(images: int, binary_kb: int) -> Dict:
+    """inspection 목록 응답 형태의 페이로드 생성 (jsonify 전 dict 그대로)"""
+    rng = random.Random(0)
+    base_time = datetime(2024, 5, 1, 6, 0, 0)
+    binary = Binary(os.urandom(binary_kb * 1024)) if binary_kb else None
+    rows: List[Dict] = []
+    for index in range(images):
+        row = {
+            '_id': ObjectId(),
+            'FileName': f"IMG_{index:05d}.JPG",
+            'ThumnailPath': f"/mnt/project/thumbnails/IMG_{index:05d}.JPG",
+            'DateTimeOriginal': base_time + timedelta(seconds=index * 7),
+            'UploadDate': datetime.utcnow(),
+            'SerialNumber': f"CAM{rng.randint(1, 40):03d}",
+            'ProjectInfo': {'ID': str(ObjectId()), 'ProjectName': '국립공원 모니터링'},
+            'BestClass': rng.choice(SPECIES),
+            'Count': rng.randint(0, 5),
+            'evtnum': index // 3,
+            'Latitude': 37.0 + rng.random(),
+            'Longitude': 127.0 + rng.random(),
+            'Accuracy': round(rng.random(), 4),
+            'Infos': [{'bbox': [rng.random() for _ in range(4)], 'new_bbox': [rng.random() for _ in range(4)]}],
+            'is_classified': True,
+            'inspection_complete': False
+        }
+        if binary is not None:
+            row['detection_image'] = binary
+        rows.append(row)
+    return {'status': 200, 'message': '검색 성공', 'total': images, 'page': 1, 'per_page': images, 'images': rows}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def bench_provider(provider, payload: Dict, repeat: int) -> Dict:
+    timings: List[float] = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = provider.dumps(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(body.encode('utf-8'))
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 3),
+        'payloads_per_s': round(repeat / (sum(timings) / 1000), 1),
+        'bytes': size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 프로바이더 직렬화 벤치마크')
+    parser.add_argument('--images', type=int, default=1000, help='페이로드의 이미지 수')
+    parser.add_argument('--repeat', type=int, default=200, help='직렬화 반복 횟수')
+    parser.add_argument('--binary-kb', type=int, default=0, help='이미지마다 넣을 Binary 크기 (KB, 0이면 없음)')
+    parser.add_argument('--output', help='결과 JSON 경로 (기본값: benchmarks/results/json-<commit>.json)')
+    args = parser.parse_args()
+
+    if orjson is None:
+        sys.exit("orjson이 설치되어 있지 않습니다 (pip install -r requirements.txt)")
+
+    app = Flask(__name__)
+    payload = build_payload(args.images, args.binary_kb)
+    providers = {'default': CustomJSONProvider(app), 'orjson': OrjsonProvider(app)}
+
+    with app.app_context():
+        runs = {name: bench_provider(provider, payload, args.repeat) for name, provider in providers.items()}
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': sys.version.split()[0],
+        'params': vars(args),
+        'runs': runs
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"json-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, run in runs.items():
+        print(f"[{name}] p50 {run['p50_ms']}ms  p95 {run['p95_ms']}ms  "
+              f"{run['payloads_per_s']} payloads/s  {run['bytes']} bytes")
+    speedup = runs['default']['p50_ms'] / runs['orjson']['p50_ms'] if runs['orjson']['p50_ms'] else 0
+    print(f"orjson p50 기준 {speedup:.1f}배")
+    print(f"결과 저장: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""목록 응답의 이미지 경로 -> URL 변환 행당 비용 벤치마크
+
+이전 방식(classification.generate_image_url의 normpath + 접두어 검사 + quote, search.normalize_path의
+replace 세 번)과 utils/storage.image_url(메모이즈 리졸버)을 같은 경로 목록으로 비교한다.
+경로는 이전 절대 경로와 이전 후 상대 경로 두 가지로 측정한다. DB 없이 실행된다.
+
+    python -m benchmarks.bench_paths --rows 1000 --repeat 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+from urllib.parse import quote
+
+from modules.utils import storage
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+LEGACY_BASE = r"C:\Users\User\Documents\backend\mnt"
+
+
+def legacy_generate_image_url(thumbnail_path):
+    """이전 classification.generate_image_url (로그 없이)"""
+    if not thumbnail_path:
+        return None
+    thumbnail_path = os.path.normpath(thumbnail_path)
+    base_path = os.path.normpath(LEGACY_BASE)
+    if not thumbnail_path.startswith(base_path):
+        return None
+    relative_path = thumbnail_path[len(base_path):].lstrip(os.sep)
+    return f"http://localhost:5000/images/{quote(relative_path.replace(chr(92), '/'))}"
+
+
+def legacy_normalize_path(path):
+    """이전 search.normalize_path"""
+    if not path:
+        return ""
+    path = path.replace("\\", "/")
+    path = path.replace("C:/Users/User/Documents/backend/mnt", "/mnt")
+    path = path.replace("C:\\Users\\User\\Documents\\backend\\mnt", "/mnt")
+    path = path.replace("backend/modules/mnt", "/mnt")
+    return path
+
+
+def legacy_row(path: str) -> str:
+    """이전 목록 한 행에서 경로 처리 (상세 URL + 검색 썸네일 경로)"""
+    return legacy_generate_image_url(path) or legacy_normalize_path(path)
+
+
+def build_paths(rows: int, legacy: bool) -> List[str]:
+    paths = []
+    for index in range(rows):
+        relative = f"{index % 20:024x}/analysis/thumbnail/thum_2024050{index % 9 + 1}-06{index % 60:02d}00s1.JPG"
+        paths.append(os.path.join(LEGACY_BASE, *relative.split('/')) if legacy else relative)
+    return paths
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def bench(convert: Callable, paths: List[str], repeat: int, before_each: Callable = None) -> Dict:
+    timings: List[float] = []
+    for _ in range(repeat):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        for path in paths:
+            convert(path)
+        timings.append((time.perf_counter() - start) * 1e9 / len(paths))
+    timings.sort()
+    return {
+        'p50_ns_per_row': round(statistics.median(timings), 1),
+        'p95_ns_per_row': round(timings[int(len(timings) * 0.95) - 1], 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='이미지 경로 -> URL 변환 행당 비용 벤치마크')
+    parser.add_argument('--rows', type=int, default=1000, help='목록 한 페이지의 행 수')
+    parser.add_argument('--repeat', type=int, default=200, help='반복 횟수')
+    parser.add_argument('--output', help='결과 JSON 경로 (기본값: benchmarks/results/paths-<commit>.json)')
+    args = parser.parse_args()
+
+    runs = {}
+    for layout in ('legacy_absolute', 'relative'):
+        paths = build_paths(args.rows, legacy=layout == 'legacy_absolute')
+        runs[layout] = {
+            'legacy': bench(legacy_row, paths, args.repeat),
+            'resolver_cold': bench(storage.image_url, paths, args.repeat, before_each=storage.image_url.cache_clear),
+            'resolver_warm': bench(storage.image_url, paths, args.repeat)
+        }
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': sys.version.split()[0],
+        'params': vars(args),
+        'runs': runs
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"paths-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for layout, layout_runs in runs.items():
+        for name, run in layout_runs.items():
+            print(f"[{layout}/{name}] p50 {run['p50_ns_per_row']}ns/행  p95 {run['p95_ns_per_row']}ns/행")
+    print(f"결과 저장: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,11 @@
 from flask import Flask, send_from_directory
 from flask_jwt_extended import JWTManager
-from flask.json.provider import DefaultJSONProvider
-from bson import ObjectId
-from bson.binary import Binary
-from datetime import datetime, timedelta
+from datetime import timedelta
 import os
 from .database import init_db
+from .indexes import sync_indexes
+from .search_index import backfill_if_missing
+from . import events  # noqa: F401  images 변경 시 이벤트 요약 갱신 리스너 등록
 from .admin_login import admin_login_bp
 from .classification import classification_bp
 from .search import search_bp
@@ -16,23 +16,16 @@ from .status import status_bp
 from .project import project_bp
 from .upload import upload_bp
 from .ai_detection import detection_bp
+from .rollups import rollup_bp
+from .metrics import init_metrics
+from .utils.json_provider import CustomJSONProvider, OrjsonProvider, create_json_provider  # noqa: F401
 from flask_swagger_ui import get_swaggerui_blueprint
 
-class CustomJSONProvider(DefaultJSONProvider):
-    """MongoDB ObjectId와 Binary 직렬화를 위한 커스텀 JSON 프로바이더"""
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, Binary):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
 def create_app():
     """애플리케이션 팩토리"""
     app = Flask(__name__)
-    app.json = CustomJSONProvider(app)
+    app.json = create_json_provider(app)  # orjson (없으면 표준 json)
+    init_metrics(app)  # 요청 계측 훅 + /metrics
     
     # JWT 설정
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
@@ -41,6 +34,9 @@ def create_app():
     
     # 데이터베이스 초기화
     init_db()
+    sync_indexes()
+    backfill_if_missing()  # 기존 배포: Normalized가 없는 문서는 프로젝트/카메라/종 검색에 걸리지 않음
+    events.rebuild_if_empty()  # 기존 배포: 비어 있는 events를 images로 채움
     
     # Swagger UI 설정
     SWAGGER_URL = '/swagger'  # Swagger UI를 제공할 URL
@@ -71,6 +67,7 @@ def create_app():
     app.register_blueprint(project_bp)
     app.register_blueprint(upload_bp)
     app.register_blueprint(detection_bp)
+    app.register_blueprint(rollup_bp)
 
     
     return app
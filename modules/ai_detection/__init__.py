@@ -1 +1 @@
-from .detection import detection_bp 
\ No newline at end of file
+from .detection import detection_bp
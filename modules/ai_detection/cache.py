@@ -0,0 +1,165 @@
+"""이미지 내용 해시 + 모델 버전 기반 검출 결과 캐시
+
+이동/재업로드/프로젝트 복제로 바이트가 동일한 파일이 다시 검출 요청되면
+추론 없이 저장된 검출 목록을 재사용한다. 결과 이미지(detection_image)는 저장하지 않으며,
+적중 시 detection.annotate_cached_result()가 저장된 박스로 다시 그린다 (디코딩 + 그리기만).
+캐시 키: (content hash, model fingerprint, confidence threshold)
+
+크기 제한: 항목 수(DETECTION_CACHE_MAX_ENTRIES)와 저장된 항목 BSON 크기 합계(DETECTION_CACHE_MAX_BYTES)
+중 하나라도 넘으면 evict()가 가장 오래 사용되지 않은 항목부터 삭제한다.
+"""
+import hashlib
+import os
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional
+
+import bson
+from pymongo import ReturnDocument
+
+from ..database import db
+
+DETECTION_CACHE_ENABLED = os.getenv('DETECTION_CACHE', '1') == '1'
+DETECTION_CACHE_MAX_ENTRIES = int(os.getenv('DETECTION_CACHE_MAX_ENTRIES', '200000'))
+DETECTION_CACHE_MAX_BYTES = int(os.getenv('DETECTION_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+DETECTION_CACHE_EVICT_BATCH = 1000
+
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+_stats_lock = Lock()
+
+
+def content_hash(image_data: bytes) -> str:
+    """이미지 바이트의 SHA-256 해시"""
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def model_fingerprint(model_path: str) -> str:
+    """모델 파일 내용 기반 버전 식별자"""
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def cache_key(image_hash: str, fingerprint: str, threshold: float) -> str:
+    return f"{image_hash}:{fingerprint}:{threshold}"
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def lookup(image_hash: str, fingerprint: str, threshold: float, image_id: str) -> Optional[Dict]:
+    """캐시된 검출 결과 조회 (적중 시 process_detection과 같은 형태로 반환)"""
+    entry = db.detection_cache.find_one_and_update(
+        {'_id': cache_key(image_hash, fingerprint, threshold)},
+        {'$set': {'last_used_at': datetime.utcnow()}, '$inc': {'hits': 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not entry:
+        _count('misses')
+        return None
+
+    _count('hits')
+    return {
+        'status': entry['status'],
+        'image_id': image_id,
+        'result_image': None,
+        'detections': entry['detections'],
+        'object_counts': entry['object_counts'],
+        'max_confidence': entry.get('max_confidence', 0),
+        'reason': entry.get('reason'),
+        'cached': True
+    }
+
+
+def store(image_hash: str, fingerprint: str, threshold: float, result: Dict, image_bytes: int) -> None:
+    """추론 결과 저장 (실패/전파/사전 필터 결과는 저장하지 않음)"""
+    if 'error' in result or result.get('propagated') or result.get('prefilter') or result.get('cached'):
+        return
+
+    now = datetime.utcnow()
+    entry = {
+        'content_hash': image_hash,
+        'model_fingerprint': fingerprint,
+        'threshold': threshold,
+        'status': result['status'],
+        'detections': result['detections'],
+        'object_counts': result['object_counts'],
+        'max_confidence': result.get('max_confidence', 0),
+        'reason': result.get('reason'),
+        'image_bytes': image_bytes,
+        'last_used_at': now
+    }
+    entry['size_bytes'] = len(bson.encode(entry))  # 저장되는 항목 크기 (바이트 예산 계산용)
+    db.detection_cache.update_one(
+        {'_id': cache_key(image_hash, fingerprint, threshold)},
+        {
+            '$set': entry,
+            '$setOnInsert': {'created_at': now, 'hits': 0}
+        },
+        upsert=True
+    )
+    _count('stores')
+
+
+def cache_bytes() -> int:
+    """저장된 항목 크기 합계"""
+    row = next(db.detection_cache.aggregate([
+        {'$group': {'_id': None, 'size_bytes': {'$sum': '$size_bytes'}}}
+    ]), None)
+    return row['size_bytes'] if row else 0
+
+
+def evict(max_entries: int = DETECTION_CACHE_MAX_ENTRIES, max_bytes: int = DETECTION_CACHE_MAX_BYTES) -> int:
+    """항목 수나 크기 합계가 한도를 넘으면 가장 오래 사용되지 않은 항목부터 삭제"""
+    excess_entries = db.detection_cache.estimated_document_count() - max_entries
+    excess_bytes = cache_bytes() - max_bytes
+    evicted = 0
+    while excess_entries > 0 or excess_bytes > 0:
+        stale_ids = []
+        for doc in db.detection_cache.find({}, {'_id': 1, 'size_bytes': 1}).sort('last_used_at', 1) \
+                .limit(DETECTION_CACHE_EVICT_BATCH):
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            stale_ids.append(doc['_id'])
+            excess_entries -= 1
+            excess_bytes -= doc.get('size_bytes', 0)
+        if not stale_ids:
+            break
+        evicted += db.detection_cache.delete_many({'_id': {'$in': stale_ids}}).deleted_count
+
+    if evicted:
+        _count('evictions', evicted)
+    return evicted
+
+
+def flush_stats() -> None:
+    """프로세스 내 통계를 progress 컬렉션에 누적 후 초기화"""
+    with _stats_lock:
+        delta = dict(_stats)
+        for name in _stats:
+            _stats[name] = 0
+    if any(delta.values()):
+        db.progress.update_one({'_id': 'detection_cache'}, {'$inc': delta}, upsert=True)
+
+
+def get_stats() -> Dict:
+    """누적 적중/미스 통계와 캐시 크기"""
+    flush_stats()
+    stats = db.progress.find_one({'_id': 'detection_cache'}, {'_id': 0}) or {}
+    hits = stats.get('hits', 0)
+    misses = stats.get('misses', 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'stores': stats.get('stores', 0),
+        'evictions': stats.get('evictions', 0),
+        'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0,
+        'entries': db.detection_cache.estimated_document_count(),
+        'max_entries': DETECTION_CACHE_MAX_ENTRIES,
+        'bytes': cache_bytes(),
+        'max_bytes': DETECTION_CACHE_MAX_BYTES
+    }
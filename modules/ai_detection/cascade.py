@@ -0,0 +1,77 @@
+"""이벤트 단위 검출 캐스케이드 (대표 프레임 우선 추론 후 조기 종료)
+
+분류는 사실상 이벤트(evtnum + ProjectInfo.ID) 단위이므로, 이벤트의 첫/중간/마지막
+프레임만 먼저 추론하고 결과가 애매하거나 양성일 때만 나머지 프레임으로 확장한다.
+확장하지 않은 프레임에는 이벤트 합의 결과(BestClass, 최대 개체 수)를 전파한다.
+"""
+import os
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+CASCADE_AMBIGUOUS_THRESHOLD = float(os.getenv('DETECTION_CASCADE_AMBIGUOUS', '0.4'))  # 이 확률 이상의 미달 박스는 애매함으로 처리
+CASCADE_MIN_FRAMES = 4  # 대표 프레임(최대 3장)보다 많아야 생략 효과가 있음
+
+
+def representative_indices(count: int) -> List[int]:
+    """첫 번째, 중간, 마지막 프레임 인덱스"""
+    if count <= 0:
+        return []
+    return sorted({0, count // 2, count - 1})
+
+
+def is_positive(result: Dict) -> bool:
+    return bool(result.get('detections'))
+
+
+def is_ambiguous(results: List[Dict]) -> bool:
+    """대표 프레임 결과만으로 이벤트를 판단할 수 없는지 확인"""
+    if any('error' in result for result in results):
+        return True
+
+    positives = [result for result in results if is_positive(result)]
+
+    # 양성/음성 프레임이 섞여 있음
+    if positives and len(positives) != len(results):
+        return True
+
+    # 프레임 간 최고 확률 종이 다름
+    if len({result['detections'][0]['best_class'] for result in positives}) > 1:
+        return True
+
+    # 음성이지만 임계값 근처의 박스가 있음
+    return any(
+        not is_positive(result) and result.get('max_confidence', 0) >= CASCADE_AMBIGUOUS_THRESHOLD
+        for result in results
+    )
+
+
+def should_expand(results: List[Dict], expand_positive: bool = True) -> bool:
+    """나머지 프레임까지 추론을 확장할지 결정"""
+    if is_ambiguous(results):
+        return True
+    return expand_positive and any(is_positive(result) for result in results)
+
+
+def event_consensus(results: List[Dict]) -> Tuple[Optional[str], int]:
+    """이벤트 합의 BestClass(프레임 다수결)와 최대 개체 수"""
+    positives = [result for result in results if is_positive(result)]
+    if not positives:
+        return None, 0
+
+    votes = Counter(result['detections'][0]['best_class'] for result in positives)
+    best_class = votes.most_common(1)[0][0]
+    max_count = max(sum(result.get('object_counts', {}).values()) for result in positives)
+    return best_class, max_count
+
+
+def propagated_result(image_id: str, best_class: Optional[str], count: int) -> Dict:
+    """추론을 생략한 프레임에 이벤트 합의 결과를 전파한 검출 결과"""
+    return {
+        'status': 'Success' if best_class else 'Failed',
+        'image_id': image_id,
+        'result_image': None,
+        'detections': [],
+        'object_counts': {},
+        'reason': None if best_class else 'No objects detected',
+        'propagated': {'best_class': best_class, 'count': count, 'source': 'event_cascade'}
+    }
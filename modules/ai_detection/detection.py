@@ -6,19 +6,42 @@ from ultralytics.utils.plotting import Annotator
 import cv2
 import numpy as np
 import os
+import time
 from bson import ObjectId
 from bson.binary import Binary
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+from ..changes import images_changed
 from ..database import db
+from ..metrics import DETECTION_QUEUE, DETECTION_STAGE
+from ..search_index import with_normalized
 from ..utils.response import standard_response, handle_exception
+from ..utils.storage import local_path
 from ..utils.constants import AI_MODEL_PATH, CONFIDENCE_THRESHOLD
+from . import cache as detection_cache
+from .cache import DETECTION_CACHE_ENABLED
+from .cascade import (
+    CASCADE_MIN_FRAMES,
+    event_consensus,
+    propagated_result,
+    representative_indices,
+    should_expand
+)
+from .prefilter import (
+    PREFILTER_ENABLED,
+    PREFILTER_MIN_FRAMES,
+    PREFILTER_REASON,
+    downscale_frame,
+    score_event,
+    select_skipped_frames
+)
 
 detection_bp = Blueprint('detection', __name__)
 
 # YOLOv8 모델 로드
 model = YOLO(AI_MODEL_PATH)
+MODEL_FINGERPRINT = detection_cache.model_fingerprint(AI_MODEL_PATH)  # 검출 캐시 키에 사용
 
 def add_object_counts(detections, model) -> Dict[str, int]:
     """객체 카운트 집계"""
@@ -33,12 +56,38 @@ def add_object_counts(detections, model) -> Dict[str, int]:
 
     return object_counts
 
-def process_detection(image_data: bytes, image_id: str) -> Dict:
+def record_stage(timings: Optional[Dict[str, List[float]]], stage: str, started: float) -> float:
+    """단계별 소요 시간(초)을 메트릭과 timings에 기록 후 현재 시각 반환 (timings가 None이면 메트릭만)"""
+    now = time.perf_counter()
+    DETECTION_STAGE.labels(stage).observe(now - started)
+    if timings is not None:
+        timings.setdefault(stage, []).append(now - started)
+    return now
+
+def annotate_detections(image: np.ndarray, detections: List[Dict]) -> Binary:
+    """검출 박스를 그린 결과 이미지 (JPEG 바이너리)"""
+    img = image.copy()
+    annotator = Annotator(img)
+    for detection in detections:
+        annotator.box_label(detection['bbox'], label=detection['name'], color=(255, 0, 0))
+
+    # RGB에서 BGR로 변환
+    img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+    # 결과 이미지를 바이너리 데이터로 변환
+    _, img_encoded = cv2.imencode('.jpg', img_bgr)
+    return Binary(img_encoded.tobytes())
+
+def process_detection(image_data: bytes, image_id: str,
+                      timings: Optional[Dict[str, List[float]]] = None) -> Dict:
     """이미지 객체 검출 처리"""
     try:
+        started = time.perf_counter()
+
         # 이미지 데이터를 numpy 배열로 변환
         nparr = np.frombuffer(image_data, np.uint8)
         image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        started = record_stage(timings, 'decode', started)
         
         if image is None:
             return {
@@ -49,17 +98,16 @@ def process_detection(image_data: bytes, image_id: str) -> Dict:
 
         # 객체 검출 수행
         detections = model(image)[0]
+        started = record_stage(timings, 'infer', started)
         
-        # 결과 이미지 생성
-        img = image.copy()
-        annotator = Annotator(img)
-
         detection_results = []
         object_counts = add_object_counts(detections, model)
         valid_detections = 0
+        max_confidence = 0.0  # 임계값 미만 박스 포함 최고 확률 (캐스케이드 판단용)
 
         for detection in detections.boxes.data.tolist():
             x1, y1, x2, y2, confidence, class_id = detection
+            max_confidence = max(max_confidence, float(confidence))
             if confidence >= CONFIDENCE_THRESHOLD:  # 80% 이상의 확률만 처리
                 valid_detections += 1
                 class_name = model.names[int(class_id)]
@@ -70,14 +118,10 @@ def process_detection(image_data: bytes, image_id: str) -> Dict:
                     'bbox': [float(x1), float(y1), float(x2), float(y2)],
                     'new_bbox': [float(x1), float(y1), float(x2), float(y2)]  # 임시로 원본 bbox 유지
                 })
-                annotator.box_label([x1, y1, x2, y2], label=class_name, color=(255, 0, 0))
 
-        # RGB에서 BGR로 변환
-        img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-
-        # 결과 이미지를 바이너리 데이터로 변환
-        _, img_encoded = cv2.imencode('.jpg', img_bgr)
-        result_image = Binary(img_encoded.tobytes())
+        # 결과 이미지 생성
+        result_image = annotate_detections(image, detection_results)
+        record_stage(timings, 'postprocess', started)
 
         return {
             'status': 'Success' if valid_detections > 0 else 'Failed',
@@ -85,6 +129,7 @@ def process_detection(image_data: bytes, image_id: str) -> Dict:
             'result_image': result_image,
             'detections': detection_results,
             'object_counts': object_counts,
+            'max_confidence': max_confidence,
             'reason': 'No objects detected' if valid_detections == 0 else None
         }
         
@@ -95,6 +140,245 @@ def process_detection(image_data: bytes, image_id: str) -> Dict:
             'error': str(e)
         }
 
+def load_image_docs(image_ids: List[str]) -> List[Dict]:
+    """이미지 문서를 한 번에 조회 (요청 순서 유지)"""
+    object_ids = [ObjectId(image_id) for image_id in image_ids]
+    docs = {
+        doc['_id']: doc
+        for doc in db.images.find(
+            {'_id': {'$in': object_ids}},
+            {'FilePath': 1, 'FileName': 1, 'evtnum': 1, 'ProjectInfo.ID': 1}
+        )
+    }
+    return [docs[object_id] for object_id in object_ids if object_id in docs]
+
+def group_docs_by_event(docs: List[Dict]) -> List[List[Dict]]:
+    """프로젝트 ID + evtnum 기준으로 이미지 묶기 (evtnum이 없으면 단독 이벤트)"""
+    events: Dict[Any, List[Dict]] = {}
+    for doc in docs:
+        evtnum = doc.get('evtnum')
+        key = (doc.get('ProjectInfo', {}).get('ID'), evtnum) if evtnum is not None else doc['_id']
+        events.setdefault(key, []).append(doc)
+    return [sorted(group, key=lambda d: d.get('FileName', '')) for group in events.values()]
+
+def read_image_file(image_id: str, file_path: str):
+    """이미지 파일 읽기 (파일이 없으면 실패 기록 후 None 반환)"""
+    if not file_path or not os.path.exists(file_path):
+        db.failed_results.insert_one({
+            'Image_id': image_id,
+            'Status': 'Failed',
+            'Reason': 'File not found',
+            'Timestamp': datetime.utcnow()
+        })
+        return None
+
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def annotate_cached_result(detection_result: Dict, image_data: bytes,
+                           timings: Optional[Dict[str, List[float]]] = None) -> Dict:
+    """캐시 적중 결과의 결과 이미지를 저장된 박스로 다시 그림 (추론 없이 디코딩 + 그리기만)"""
+    if not detection_result['detections']:
+        return detection_result  # 검출이 없으면 detection_image를 저장하지 않으므로 생략
+
+    started = time.perf_counter()
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+    started = record_stage(timings, 'decode', started)
+    if image is not None:
+        detection_result['result_image'] = annotate_detections(image, detection_result['detections'])
+        record_stage(timings, 'postprocess', started)
+    return detection_result
+
+def prefiltered_result(image_id: str, score: float) -> Dict:
+    """사전 필터로 추론을 생략한 프레임의 검출 결과"""
+    return {
+        'status': 'Failed',
+        'image_id': image_id,
+        'result_image': None,
+        'detections': [],
+        'object_counts': {'deer': 0, 'pig': 0, 'racoon': 0},
+        'reason': 'No objects detected',
+        'prefilter': {'reason': PREFILTER_REASON, 'score': round(score, 6)}
+    }
+
+def save_detection_result(image_id: str, detection_result: Dict) -> None:
+    """검출 결과를 images / detect_images / failed_results 컬렉션에 반영"""
+    detections = detection_result.get('detections', [])
+    object_counts = detection_result.get('object_counts', {})
+    propagated = detection_result.get('propagated') or {}
+    best_class = detections[0]['best_class'] if detections else propagated.get('best_class')
+
+    update_data = {
+        'Infos': detections,  # << best_probability 포함됨
+        'Count': sum(object_counts.values()) if detections else propagated.get('count', 0),
+        'Accuracy': max((d['best_probability'] for d in detections), default=0),  # 최고 정확도
+        'AI_processed': True,
+        'AI_process_date': datetime.utcnow(),
+        'is_classified': bool(best_class)
+    }
+    # 전파 결과(박스 없음)와 디코딩에 실패한 캐시 결과는 결과 이미지가 없으므로 기존 이미지를 유지
+    if detection_result.get('result_image') is not None:
+        update_data['detection_image'] = detection_result['result_image']
+    if propagated:
+        update_data['CascadePropagated'] = True
+
+    if best_class:
+        update_data['BestClass'] = best_class  # << 최고 확률 객체 저장 (또는 이벤트 합의 결과)
+        db.detect_images.update_one({'Image_id': ObjectId(image_id)}, {'$set': update_data}, upsert=True)
+
+        # images에도 분류 결과 반영 (목록/검색/리포트가 images의 BestClass/Count를 읽음)
+        db.images.update_one(
+            {'_id': ObjectId(image_id)},
+            {'$set': with_normalized({'is_classified': True, 'BestClass': best_class, 'Count': update_data['Count']})}
+        )
+    else:
+        failed_doc = {
+            'Image_id': image_id,
+            'Status': 'Failed',
+            'Reason': detection_result.get('reason') or detection_result.get('error') or 'No objects detected',
+            'Timestamp': datetime.utcnow()
+        }
+        if detection_result.get('prefilter'):
+            failed_doc['PrefilterReason'] = detection_result['prefilter']['reason']
+            failed_doc['MotionScore'] = detection_result['prefilter']['score']
+        if propagated:
+            failed_doc['CascadePropagated'] = True
+        db.failed_results.insert_one(failed_doc)
+
+        # 객체 검출 실패 시 images 컬렉션에도 is_classified를 False로, 개체 수는 0으로 설정
+        db.images.update_one({'_id': ObjectId(image_id)}, {'$set': {'is_classified': False, 'Count': 0}})
+
+def detect_event_frames(payloads: Dict[str, bytes], mode: str = 'frame',
+                        expand_positive: bool = True,
+                        timings: Optional[Dict[str, List[float]]] = None) -> Dict[str, Dict]:
+    """이벤트 프레임 검출 (event 모드는 대표 프레임 결과로 조기 종료)"""
+    image_ids = list(payloads)
+    if mode != 'event' or len(image_ids) < CASCADE_MIN_FRAMES:
+        return {image_id: process_detection(payloads[image_id], image_id, timings) for image_id in image_ids}
+
+    representatives = [image_ids[i] for i in representative_indices(len(image_ids))]
+    results = {image_id: process_detection(payloads[image_id], image_id, timings) for image_id in representatives}
+
+    if should_expand(list(results.values()), expand_positive):
+        for image_id in image_ids:
+            if image_id not in results:
+                results[image_id] = process_detection(payloads[image_id], image_id, timings)
+        return results
+
+    # 확장하지 않은 프레임에 이벤트 합의 결과 전파
+    best_class, max_count = event_consensus(list(results.values()))
+    for image_id in image_ids:
+        if image_id not in results:
+            results[image_id] = propagated_result(image_id, best_class, max_count)
+    return {image_id: results[image_id] for image_id in image_ids}
+
+def run_detection_job(image_ids: List[str], use_prefilter: bool = PREFILTER_ENABLED,
+                      mode: str = 'frame', expand_positive: bool = True,
+                      use_cache: bool = DETECTION_CACHE_ENABLED,
+                      timings: Optional[Dict[str, List[float]]] = None) -> Dict[str, int]:
+    """백그라운드 객체 검출 작업 (캐시 조회 후 이벤트 단위로 사전 필터 / 캐스케이드 적용)"""
+    total_images = len(image_ids)
+    counters = {
+        'processed_images': 0,
+        'prefiltered_images': 0,
+        'cache_hits': 0,
+        'inferences_run': 0,
+        'inferences_saved': 0
+    }
+
+    DETECTION_QUEUE.inc(total_images)
+    try:
+        for event_docs in group_docs_by_event(load_image_docs(image_ids)):
+            # MongoDB에서 조회한 파일 경로로 이벤트 프레임 읽기
+            payloads: Dict[str, bytes] = {}
+            for doc in event_docs:
+                started = time.perf_counter()
+                image_data = read_image_file(str(doc['_id']), local_path(doc.get('FilePath')))
+                record_stage(timings, 'read', started)
+                if image_data is not None:
+                    payloads[str(doc['_id'])] = image_data
+
+            # 내용이 같은 이미지는 디코딩 전에 캐시된 결과 재사용
+            hashes: Dict[str, str] = {}
+            cached: Dict[str, Dict] = {}
+            if use_cache:
+                for image_id, image_data in payloads.items():
+                    hashes[image_id] = detection_cache.content_hash(image_data)
+                    hit = detection_cache.lookup(hashes[image_id], MODEL_FINGERPRINT, CONFIDENCE_THRESHOLD, image_id)
+                    if hit:
+                        cached[image_id] = hit
+
+            # 모든 프레임에 움직임이 없는 이벤트만 추론 생략 (배경 추정에는 이벤트 전체 프레임 사용)
+            skipped: Dict[str, float] = {}
+            if use_prefilter and len(payloads) - len(cached) > 0 and len(payloads) >= PREFILTER_MIN_FRAMES:
+                frames = {image_id: downscale_frame(data) for image_id, data in payloads.items()}
+                skipped = {
+                    image_id: score
+                    for image_id, score in select_skipped_frames(score_event(frames)).items()
+                    if image_id not in cached
+                }
+
+            candidates = {
+                image_id: data for image_id, data in payloads.items()
+                if image_id not in skipped and image_id not in cached
+            }
+            detected = detect_event_frames(candidates, mode, expand_positive, timings)
+
+            for image_id in payloads:
+                if image_id in cached:
+                    detection_result = annotate_cached_result(cached[image_id], payloads[image_id], timings)
+                    counters['cache_hits'] += 1
+                elif image_id in skipped:
+                    detection_result = prefiltered_result(image_id, skipped[image_id])
+                    counters['prefiltered_images'] += 1
+                else:
+                    detection_result = detected[image_id]
+                    if detection_result.get('propagated'):
+                        counters['inferences_saved'] += 1
+                    else:
+                        counters['inferences_run'] += 1
+                        if use_cache:
+                            detection_cache.store(hashes[image_id], MODEL_FINGERPRINT, CONFIDENCE_THRESHOLD,
+                                                  detection_result, len(payloads[image_id]))
+
+                started = time.perf_counter()
+                save_detection_result(image_id, detection_result)
+                record_stage(timings, 'write', started)
+                counters['processed_images'] += 1
+                DETECTION_QUEUE.dec()
+
+                # 진행률 업데이트
+                progress_percentage = 50 + (counters['processed_images'] / total_images * 50)
+                db.progress.update_one(
+                    {'_id': 'ai_progress'},
+                    {'$set': {'progress': round(progress_percentage, 2), **counters}}
+                )
+
+            # 분류 결과가 바뀐 이벤트 요약 갱신 (키 필드는 그대로이므로 조회한 문서를 그대로 전달)
+            images_changed(before=event_docs)
+
+        if use_cache:
+            detection_cache.evict()
+            detection_cache.flush_stats()
+    finally:
+        # 읽기 실패/오류로 처리하지 못한 이미지도 대기 수에서 제외
+        DETECTION_QUEUE.dec(total_images - counters['processed_images'])
+
+    # AI 분석 완료 (100%)
+    db.progress.update_one(
+        {'_id': 'ai_progress'},
+        {'$set': {'progress': 100, **counters}}
+    )
+
+    return counters
+
+def json_flag(body: Dict[str, Any], name: str, default: bool) -> bool:
+    """요청 본문의 불리언 옵션 (JSON true/false만 허용, "false" 같은 문자열은 오류)"""
+    value = body.get(name, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} 값은 true 또는 false여야 합니다")
+    return value
+
 @detection_bp.route('/detect', methods=['POST'])
 @jwt_required()
 def detect_objects():
@@ -104,102 +388,46 @@ def detect_objects():
         if not image_ids:
             return handle_exception(Exception("이미지 ID가 필요합니다"), error_type="validation_error")
 
+        use_prefilter = json_flag(request.json, 'prefilter', PREFILTER_ENABLED)
+        mode = request.json.get('mode', 'frame')
+        expand_positive = json_flag(request.json, 'expand_positive', True)
+        use_cache = json_flag(request.json, 'cache', DETECTION_CACHE_ENABLED)
+        if mode not in ('frame', 'event'):
+            return handle_exception(Exception("mode는 frame 또는 event여야 합니다"), error_type="validation_error")
+
         total_images = len(image_ids)
 
         # AI 분석 시작 (50%)
         db.progress.update_one(
             {'_id': 'ai_progress'},
-            {'$set': {'progress': 50, 'total_images': total_images, 'processed_images': 0}},
+            {'$set': {
+                'progress': 50,
+                'total_images': total_images,
+                'mode': mode,
+                'processed_images': 0,
+                'prefiltered_images': 0,
+                'cache_hits': 0,
+                'inferences_run': 0,
+                'inferences_saved': 0
+            }},
             upsert=True
         )
 
-        results = []
-
-        def background_process(image_ids):
-            processed_count = 0
-
-            for image_id in image_ids:
-                image_doc = db.images.find_one({'_id': ObjectId(image_id)})
-                if not image_doc:
-                    continue
-
-                # MongoDB에서 이미지 파일 경로 조회
-                file_path = image_doc.get('FilePath')
-                if not file_path or not os.path.exists(file_path):
-                    db.failed_results.insert_one({
-                        'Image_id': image_id,
-                        'Status': 'Failed',
-                        'Reason': 'File not found',
-                        'Timestamp': datetime.utcnow()
-                    })
-                    continue
-
-                with open(file_path, 'rb') as f:
-                    image_data = f.read()
-
-                detection_result = process_detection(image_data, str(image_id))
-                results.append(detection_result)
-
-                update_data = {
-                    'Infos': detection_result['detections'],  # << best_probability 포함됨
-                    'Count': sum(detection_result['object_counts'].values()),
-                    'Accuracy': max((d['best_probability'] for d in detection_result['detections']), default=0),  # 최고 정확도
-                    'AI_processed': True,
-                    'AI_process_date': datetime.utcnow(),
-                    'detection_image': detection_result['result_image'],
-                    'is_classified': bool(detection_result['detections'])
-                }
-
-                if detection_result['detections']:
-                    update_data['BestClass'] = detection_result['detections'][0]['best_class']  # << 최고 확률 객체 저장
-                    db.detect_images.update_one({'Image_id': ObjectId(image_id)}, {'$set': update_data}, upsert=True)
-
-
-                    # images 컬렉션에도 is_classified 업데이트 추가
-                    db.images.update_one({'_id': ObjectId(image_id)}, {'$set': {'is_classified': True}})
-                else:
-                    db.failed_results.insert_one({
-                        'Image_id': image_id,
-                        'Status': 'Failed',
-                        'Reason': 'No objects detected',
-                        'Timestamp': datetime.utcnow()
-                    })
-
-                    # 객체 검출 실패 시 images 컬렉션에도 is_classified를 False로 설정
-                    db.images.update_one({'_id': ObjectId(image_id)}, {'$set': {'is_classified': False}})
-
-                processed_count += 1
-
-                # 진행률 업데이트
-                progress_percentage = 50 + (processed_count / total_images * 50)
-                db.progress.update_one(
-                    {'_id': 'ai_progress'},
-                    {'$set': {'progress': round(progress_percentage, 2), 'processed_images': processed_count}}
-                )
-
-            # AI 분석 완료 (100%)
-            db.progress.update_one(
-                {'_id': 'ai_progress'},
-                {'$set': {'progress': 100, 'processed_images': processed_count}}
-            )
-
         # 백그라운드 스레드 실행
-        Thread(target=background_process, args=(image_ids,)).start()
+        Thread(target=run_detection_job, args=(image_ids, use_prefilter, mode, expand_positive, use_cache)).start()
 
         return jsonify({
             "message": "객체 검출이 진행 중입니다",
             "progress": 50,
             "total_images": total_images,
-            "detections": [
-                {
-                    "image_id": result["image_id"],
-                    "detections": result["detections"],
-                    "object_counts": result["object_counts"]
-                }
-                for result in results
-            ] if results else []
+            "prefilter": use_prefilter,
+            "mode": mode,
+            "cache": use_cache,
+            "detections": []
         }), 202  
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         return handle_exception(e, error_type="ai_error")
 
@@ -213,3 +441,15 @@ def get_ai_progress():
 
     except Exception as e:
         return handle_exception(e, error_type="db_error")
+
+@detection_bp.route('/status/detection-cache', methods=['GET'])
+@jwt_required()
+def get_detection_cache_stats():
+    """검출 결과 캐시 적중/미스 통계 조회 API"""
+    try:
+        stats = detection_cache.get_stats()
+        stats['model_fingerprint'] = MODEL_FINGERPRINT
+        return standard_response("검출 캐시 통계 조회 성공", data=stats)
+
+    except Exception as e:
+        return handle_exception(e, error_type="db_error")
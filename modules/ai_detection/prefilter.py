@@ -0,0 +1,170 @@
+"""이벤트 내 프레임 차분 기반 빈 프레임 사전 필터
+
+같은 evtnum 프레임은 고정된 한 카메라에서 연속 촬영되므로, 프레임 중앙값을
+배경으로 보고 배경과 거의 차이가 없는 프레임은 YOLO 추론 없이
+'No objects detected'로 기록한다.
+
+중앙값 배경은 버스트 대부분에 머문 동물을 배경으로 흡수하므로, 이벤트의 어느 한 프레임이라도
+임계값을 넘으면 그 이벤트는 한 장도 생략하지 않는다. 손실이 있는 필터라 기본값은 꺼져 있고
+(DETECTION_PREFILTER=1로 켬), 임계값은 검수 결과로 만든 튜닝 리포트를 보고 정한다.
+
+튜닝 리포트 (검수자가 확정한 이미지를 정답으로 사용, --labels로 라벨 파일 지정 가능):
+    python -m modules.ai_detection.prefilter --project <project_id> [--labels labels.csv] [--json report.json]
+"""
+import argparse
+import csv
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from ..utils.storage import local_path
+
+PREFILTER_ENABLED = os.getenv('DETECTION_PREFILTER', '0') == '1'
+PREFILTER_SIZE = (64, 48)  # 다운스케일 해상도 (width, height)
+PREFILTER_PIXEL_DELTA = 25  # 배경 대비 움직임으로 간주할 최소 밝기 차 (0~255)
+PREFILTER_MOTION_THRESHOLD = float(os.getenv('DETECTION_PREFILTER_THRESHOLD', '0.002'))  # 움직임 픽셀 비율
+PREFILTER_MIN_FRAMES = 3  # 배경 추정에 필요한 최소 프레임 수
+PREFILTER_REASON = 'prefilter_low_motion'
+
+TUNING_THRESHOLDS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05]
+
+
+def downscale_frame(image_data: bytes) -> Optional[np.ndarray]:
+    """JPEG 바이트를 저해상도 흑백 프레임으로 변환 (1/8 축소 디코딩)"""
+    nparr = np.frombuffer(image_data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if frame is None:
+        return None
+    frame = cv2.resize(frame, PREFILTER_SIZE, interpolation=cv2.INTER_AREA)
+    return frame.astype(np.float32)
+
+
+def motion_scores(frames: Sequence[np.ndarray]) -> List[float]:
+    """이벤트 배경(프레임별 중앙값) 대비 움직임 픽셀 비율 계산"""
+    stack = np.stack(frames)
+    # 노출 변화(구름, IR 전환) 보정: 프레임별 평균 밝기를 0으로 맞춤
+    stack -= stack.mean(axis=(1, 2), keepdims=True)
+    background = np.median(stack, axis=0)
+    moving = np.abs(stack - background) > PREFILTER_PIXEL_DELTA
+    return moving.mean(axis=(1, 2)).tolist()
+
+
+def score_event(frames: Dict[str, Optional[np.ndarray]]) -> Dict[str, float]:
+    """이벤트 프레임별 움직임 점수 반환 (배경 추정이 불가능하면 빈 dict)"""
+    valid = {image_id: frame for image_id, frame in frames.items() if frame is not None}
+    if len(valid) < PREFILTER_MIN_FRAMES:
+        return {}
+    return dict(zip(valid.keys(), motion_scores(list(valid.values()))))
+
+
+def select_skipped_frames(scores: Dict[str, float],
+                          threshold: float = PREFILTER_MOTION_THRESHOLD) -> Dict[str, float]:
+    """추론 생략 대상 프레임과 점수 반환 (모든 프레임이 임계값 미만인 이벤트만 생략)"""
+    if not scores or max(scores.values()) >= threshold:
+        return {}
+    return dict(scores)
+
+
+def tuning_report(samples: List[Tuple[float, bool]],
+                  thresholds: Sequence[float] = TUNING_THRESHOLDS) -> List[Dict]:
+    """라벨 데이터 (이벤트 최대 점수, 동물 포함 여부) 기준 임계값별 생략률/누락률 계산"""
+    total = len(samples)
+    positives = sum(1 for _, has_animal in samples if has_animal)
+    rows = []
+    for threshold in thresholds:
+        skipped = [has_animal for score, has_animal in samples if score < threshold]
+        missed = sum(1 for has_animal in skipped if has_animal)
+        rows.append({
+            'threshold': threshold,
+            'skip_rate': round(len(skipped) / total, 4) if total else 0,
+            'miss_rate': round(missed / positives, 4) if positives else 0,
+            'skipped': len(skipped),
+            'missed': missed
+        })
+    return rows
+
+
+def inspected_labels(project_id: Optional[str] = None, limit: int = 0) -> Dict[str, bool]:
+    """검수자가 확정한 이미지의 동물 포함 여부 (image_id -> Count > 0)
+
+    모델이나 사전 필터가 쓴 is_classified/BestClass는 정답이 아니므로, 검수 완료(종/개체수 확정)
+    이미지와 예외검수에서 처리 완료된 이미지만 사용한다.
+    """
+    from ..database import db
+
+    query = {'evtnum': {'$exists': True},
+             '$or': [{'inspection_complete': True}, {'exception_status': 'processed'}]}
+    if project_id:
+        query['ProjectInfo.ID'] = project_id
+    cursor = db.images.find(query, {'Count': 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    return {str(doc['_id']): (doc.get('Count') or 0) > 0 for doc in cursor}
+
+
+def read_labels(path: str) -> Dict[str, bool]:
+    """라벨 CSV (image_id,has_animal) 읽기 - has_animal은 1/0, true/false"""
+    with open(path, newline='') as f:
+        return {row['image_id']: row['has_animal'].strip().lower() in ('1', 'true', 'yes')
+                for row in csv.DictReader(f)}
+
+
+def collect_labeled_samples(labels: Dict[str, bool]) -> List[Tuple[float, bool]]:
+    """라벨 이미지마다 (이벤트 최대 움직임 점수, 동물 포함 여부) 수집
+
+    배경은 라벨 유무와 관계없이 이벤트 전체 프레임으로 추정하고, 생략 여부는 이벤트 단위로
+    정해지므로 이벤트 최대 점수를 쓴다 (최대 점수 < 임계값이면 그 프레임이 생략됨).
+    """
+    from bson import ObjectId
+
+    from ..database import db
+
+    labeled = db.images.find({'_id': {'$in': [ObjectId(image_id) for image_id in labels]}},
+                             {'ProjectInfo.ID': 1, 'evtnum': 1})
+    keys = {(doc.get('ProjectInfo', {}).get('ID'), doc.get('evtnum')) for doc in labeled}
+
+    samples = []
+    for project_id, evtnum in keys:
+        frames = {}
+        for doc in db.images.find({'ProjectInfo.ID': project_id, 'evtnum': evtnum}, {'FilePath': 1}):
+            file_path = local_path(doc.get('FilePath'))
+            if not file_path or not os.path.exists(file_path):
+                continue
+            with open(file_path, 'rb') as f:
+                frames[str(doc['_id'])] = downscale_frame(f.read())
+        scores = score_event(frames)
+        if not scores:
+            continue
+        event_score = max(scores.values())
+        samples.extend((event_score, labels[image_id]) for image_id in scores if image_id in labels)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='빈 프레임 사전 필터 임계값 튜닝 리포트')
+    parser.add_argument('--project', help='대상 프로젝트 ID (생략 시 전체)')
+    parser.add_argument('--limit', type=int, default=0, help='조회할 최대 검수 이미지 수')
+    parser.add_argument('--labels', help='라벨 CSV (image_id,has_animal) - 지정하면 검수 결과 대신 사용')
+    parser.add_argument('--json', help='리포트를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    labels = read_labels(args.labels) if args.labels else inspected_labels(args.project, args.limit)
+    samples = collect_labeled_samples(labels)
+    rows = tuning_report(samples)
+
+    print(f"samples={len(samples)} positives={sum(1 for _, p in samples if p)}")
+    print(f"{'threshold':>10} {'skip_rate':>10} {'miss_rate':>10} {'skipped':>8} {'missed':>7}")
+    for row in rows:
+        print(f"{row['threshold']:>10} {row['skip_rate']:>10.2%} {row['miss_rate']:>10.2%} "
+              f"{row['skipped']:>8} {row['missed']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'samples': len(samples), 'rows': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""images 컬렉션 변경 알림
+
+images 문서를 추가/수정/삭제/이동하는 쓰기 경로는 변경 후 images_changed()를 호출한다.
+삭제나 프로젝트 이동처럼 변경 후에는 원래 위치를 알 수 없는 경우, 변경 전에 snapshot()으로
+키 필드를 잡아 before로 넘긴다. 등록된 리스너(이벤트 요약 등)는 변경 전후 키 문서를 받는다.
+"""
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# 리스너가 받는 키 문서 필드
+KEY_PROJECTION = {'_id': 1, 'ProjectInfo.ID': 1, 'evtnum': 1}
+
+Listener = Callable[[List[Dict]], None]
+_listeners: List[Listener] = []
+
+
+def subscribe(listener: Listener) -> Listener:
+    """images 변경 리스너 등록 (데코레이터로 사용 가능)"""
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def _object_ids(image_ids: Iterable) -> List[ObjectId]:
+    return [image_id if isinstance(image_id, ObjectId) else ObjectId(image_id) for image_id in image_ids]
+
+
+def snapshot(image_ids: Optional[Iterable] = None, query: Optional[Dict] = None) -> List[Dict]:
+    """변경 전 키 문서 조회 (image_ids 또는 query 기준)"""
+    if image_ids is not None:
+        query = {'_id': {'$in': _object_ids(image_ids)}}
+    if not query:
+        return []
+    return list(db.images.find(query, KEY_PROJECTION))
+
+
+def images_changed(image_ids: Optional[Iterable] = None, before: Optional[List[Dict]] = None) -> None:
+    """images 쓰기 후 호출 - 변경 전 스냅샷과 현재 키 문서를 리스너에 전달"""
+    docs = list(before or [])
+    if image_ids:
+        docs.extend(snapshot(image_ids))
+    if not docs:
+        return
+    for listener in _listeners:
+        try:
+            listener(docs)
+        except Exception as e:
+            # 후속 처리 실패가 원래 쓰기 요청을 실패시키지 않도록 기록만 함
+            logger.error(f"images 변경 리스너 실패 ({listener.__name__}): {str(e)}", exc_info=True)
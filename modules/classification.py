@@ -1,12 +1,16 @@
 from flask import Blueprint, request, jsonify, current_app
 import logging
-from urllib.parse import quote
 from flask_jwt_extended import jwt_required
 from bson import ObjectId
 from bson.errors import InvalidId
 from datetime import datetime
-from typing import Tuple, Dict, Any, List, Optional
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional
+from .changes import images_changed, snapshot
+from .counts import count_total, page_with_total, parse_count_mode
 from .database import db
+from .etags import conditional_get, image_detail_scopes, project_scopes
+from .events import event_image_query, view_query
+from .projections import find_one_view, find_view, project_stage, projection
 from .database import (
     get_classified_image_detail, 
     get_unclassified_image_detail,
@@ -16,32 +20,71 @@ from .database import (
     update_unclassified_image
 )
 import os
-from .utils.response import standard_response, handle_exception, pagination_meta
+from .search_index import with_normalized
+from .utils.response import standard_response, handle_exception, pagination_meta, ndjson_response, wants_ndjson
+from .utils.storage import image_url, local_path
+from .utils.pagination import (
+    find_query, find_skip, next_cursor, parse_cursor, parse_with_total, rows_with_next_cursor, total_pages
+)
 from .utils.constants import PER_PAGE_DEFAULT, VALID_EXCEPTION_STATUSES, MESSAGES, VALID_INSPECTION_STATUSES
 import logging as logger
 import traceback
 classification_bp = Blueprint('classification', __name__)
 
-def generate_image_url(thumbnail_path):  # 매개변수명 수정
-    """
-    Generate a URL for the given thumbnail path.
-    """
-    if not thumbnail_path:
-        # thumbnail_path가 None 또는 빈 문자열인 경우 기본값 반환
-        return None
+# 키셋(커서) 페이지네이션 정렬 기준
+IMAGE_SORT = [('_id', 1)]
 
-    # 경로 정규화
-    thumbnail_path = os.path.normpath(thumbnail_path)
-    base_path = os.path.normpath(r"C:\Users\User\Documents\backend\mnt")
+# 이벤트 단위 목록 정렬 (이벤트 페이지 -> 이벤트별 이미지 순서)
+EVENT_LIST_SORT = [('evtnum', 1), ('project_id', 1)]
+EVENT_IMAGE_SORT = [('evtnum', 1), ('ProjectInfo.ID', 1), ('FileName', 1)]
 
-    if thumbnail_path.startswith(base_path):
-        relative_path = thumbnail_path[len(base_path):].lstrip(os.sep)
-    else:
-        logging.error(f"Unexpected thumbnail path format: {thumbnail_path}")
-        return None
+# 검출 정보를 한 번에 조인하는 이미지 묶음 크기 (스트리밍 시 메모리 상한)
+DETECTION_JOIN_BATCH = 500
 
-    encoded_path = quote(relative_path.replace("\\", "/"))
-    return f"http://localhost:5000/images/{encoded_path}"
+def event_image_groups(events: List[Dict[str, Any]], query: Dict[str, Any],
+                       view: str) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """이벤트 페이지 순서대로 (이벤트, 이미지 목록) 생성
+
+    이벤트(EVENT_LIST_SORT)와 이미지(EVENT_IMAGE_SORT)는 같은 (evtnum, 프로젝트) 순서이므로
+    이미지 커서를 한 번만 읽으면서 이벤트 단위로 끊는다 (한 번에 한 이벤트의 이미지만 보관).
+    """
+    if not events:
+        return
+    images = find_view('images', view, {'$and': [query, event_image_query(events)]}).sort(EVENT_IMAGE_SORT)
+    pending = next(images, None)
+    for event in events:
+        key = (event['project_id'], event['evtnum'])
+        group = []
+        while pending is not None and (pending['ProjectInfo']['ID'], pending['evtnum']) == key:
+            group.append(pending)
+            pending = next(images, None)
+        yield event, group
+
+
+def _join_detections(batch: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Optional[Dict]]]:
+    # UpdatedAt 오름차순으로 덮어써 최신 데이터가 남음
+    detections = {
+        detection['Image_id']: detection
+        for detection in find_view(
+            'detect_images', 'detection_summary',
+            {"Image_id": {"$in": [img["_id"] for img in batch]}}
+        ).sort("UpdatedAt", 1)
+    }
+    for img in batch:
+        yield img, detections.get(img['_id'])
+
+
+def with_detections(images: Iterable[Dict[str, Any]],
+                    batch_size: int = DETECTION_JOIN_BATCH) -> Iterator[Tuple[Dict[str, Any], Optional[Dict]]]:
+    """이미지마다 최신 검출 정보를 붙여 생성 (batch_size개씩 $in으로 한 번에 조회)"""
+    batch: List[Dict[str, Any]] = []
+    for img in images:
+        batch.append(img)
+        if len(batch) == batch_size:
+            yield from _join_detections(batch)
+            batch = []
+    if batch:
+        yield from _join_detections(batch)
 
 def update_image(image_id, update_data, is_classified):
     """
@@ -65,8 +108,10 @@ def update_image(image_id, update_data, is_classified):
 
         result = db.images.update_one(
             {'_id': ObjectId(image_id), 'is_classified': is_classified},
-            {'$set': update_dict}
+            {'$set': with_normalized(update_dict)}
         )
+        if result.modified_count > 0:
+            images_changed([image_id])
         
         return result.modified_count > 0, None
         
@@ -75,6 +120,7 @@ def update_image(image_id, update_data, is_classified):
 
 @classification_bp.route('/images', methods=['GET'])
 @jwt_required()
+@conditional_get('images', project_scopes)
 def list_images() -> Tuple[Dict[str, Any], int]:
     """검수 완료된 이미지 목록 조회 API (ProjectInfo.ID + evtnum으로 그룹화)"""
     try:
@@ -85,6 +131,8 @@ def list_images() -> Tuple[Dict[str, Any], int]:
         evtnum = request.args.get('evtnum', None)
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 1000))  # 기본값 설정
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 그룹 수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
 
         # 필터링 조건 설정
         query: Dict[str, Any] = {'inspection_complete': True}
@@ -99,74 +147,46 @@ def list_images() -> Tuple[Dict[str, Any], int]:
 
         logger.info(f"🔍 [쿼리 조건] {query}")
 
-        # MongoDB Aggregation 파이프라인
-        pipeline = [
-            {"$match": query},  
-            {"$sort": {"evtnum": 1, "FileName": 1}},  
-            {"$group": {
-                "_id": {"evtnum": "$evtnum", "project_id": "$ProjectInfo.ID"},
-                "images": {"$push": {
-                    "imageId": {"$toString": "$_id"},
-                    "fileName": "$FileName",
-                    "imageUrl": "$FilePath",
-                    "thumbnailUrl": "$ThumnailPath",
-                    "uploadDate": "$UploadDate"
-                }},
-                "total_images": {"$sum": 1}
-            }},
-            {"$sort": {"_id.evtnum": 1}},
-            {"$skip": (page - 1) * per_page},
-            {"$limit": per_page}
-        ]
-
-        logger.info(f"🛠 [MongoDB Aggregation] {pipeline}")
-
-        grouped_images = list(db.images.aggregate(pipeline))
-        logger.info(f"✅ [MongoDB 조회 완료] {len(grouped_images)}개의 그룹 조회됨")
-
-        # 결과 데이터 변환
-        processed_data = []
-        for group in grouped_images:
-            project_id = group["_id"].get("project_id", "UNKNOWN")  
-            evtnum = group["_id"].get("evtnum", -1)
-
-            processed_images = []
-            for img in group["images"]:
-                processed_images.append({
-                    "imageId": img["imageId"],
-                    "fileName": img["fileName"],
-                    "imageUrl": generate_image_url(img["imageUrl"]),  
-                    "thumbnailUrl": generate_image_url(img["thumbnailUrl"]),  
-                    "uploadDate": img["uploadDate"]
-                })
-
-            processed_data.append({
-                "evtnum": evtnum,
-                "images": processed_images,
-                "projectId": project_id,
-                "total_images": group["total_images"]
-            })
+        # 이벤트 요약에서 그룹 페이지를 고른 뒤 해당 이벤트의 이미지만 조회
+        event_query = view_query('inspected', project_id=project_id, evtnum=query.get('evtnum'))
+        events, total_groups_count, approximate = page_with_total(
+            db.events, event_query, EVENT_LIST_SORT, page, per_page, None,
+            projection('event_keys'), with_total, count_mode
+        )
+        logger.info(f"✅ [MongoDB 조회 완료] {len(events)}개의 그룹 조회됨")
+        logger.info(f"📊 [페이지네이션] 총 그룹 개수: {total_groups_count}, 현재 페이지: {page}, 페이지당 개수: {per_page}")
 
-        # 전체 그룹 개수 조회
-        total_groups = db.images.aggregate([
-            {"$match": query},
-            {"$group": {"_id": {"projectId": "$ProjectInfo.ID", "evtnum": "$evtnum"}}},
-            {"$count": "total"}
-        ])
-        total_groups_count = next(total_groups, {}).get("total", 0)
+        meta = {
+            "page": page,
+            "per_page": per_page,
+            "total": total_groups_count,
+            "total_approximate": approximate,
+            "total_pages": total_pages(total_groups_count, per_page)
+        }
 
-        logger.info(f"📊 [페이지네이션] 총 그룹 개수: {total_groups_count}, 현재 페이지: {page}, 페이지당 개수: {per_page}")
+        # 결과 데이터 변환 (이벤트 단위)
+        processed_groups = ({
+            "evtnum": event['evtnum'],
+            "images": [{
+                "imageId": str(img['_id']),
+                "fileName": img.get('FileName'),
+                "imageUrl": image_url(img.get('FilePath')),
+                "thumbnailUrl": image_url(img.get('ThumnailPath')),
+                "uploadDate": img.get('UploadDate')
+            } for img in images],
+            "projectId": event['project_id'],
+            "total_images": len(images)
+        } for event, images in event_image_groups(events, query, 'inspected_event_images'))
+
+        # Accept: application/x-ndjson 이면 그룹 한 줄씩 스트리밍
+        if wants_ndjson():
+            return ndjson_response(processed_groups, meta=meta)
 
         return jsonify({
             "status": 200,
             "message": "검수 완료된 이미지 목록 조회 성공",
-            "data": {"groups": processed_data},
-            "meta": {
-                "page": page,
-                "per_page": per_page,
-                "total": total_groups_count,
-                "total_pages": (total_groups_count + per_page - 1) // per_page
-            }
+            "data": {"groups": list(processed_groups)},
+            "meta": meta
         }), 200
 
     except Exception as e:
@@ -178,6 +198,7 @@ def list_images() -> Tuple[Dict[str, Any], int]:
 
 @classification_bp.route('/classified-images/<image_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('classified_detail', image_detail_scopes)
 def get_classified_image_details(image_id):
     try:
         logger.info(f"\n=== 이미지 상세 정보 조회 시작: {image_id} ===")
@@ -189,7 +210,7 @@ def get_classified_image_details(image_id):
             logger.error(f"ObjectId 변환 실패: {str(e)}")
             return jsonify({'message': 'Invalid image ID'}), 400
 
-        image_doc = db.images.find_one({"_id": object_id})
+        image_doc = find_one_view('images', 'classified_detail', {"_id": object_id})
 
         if not image_doc:
             logger.warning(f"이미지를 찾을 수 없음: {image_id}")
@@ -217,15 +238,15 @@ def get_classified_image_details(image_id):
             "ProjectInfo.ID": project_id
         }
 
-        related_images = list(db.images.find(query_filter))
+        related_images = list(find_view('images', 'related_images', query_filter))
 
         # 4️⃣ detect_images에서 종명, 개체수, 정확도 가져오기
         detect_query = {"Image_id": image_doc["_id"]}
         logger.info(f"\n=== detect_images 검색 시작 ===")
         logger.info(f"검색 조건: {detect_query}")
 
-        detection_data = db.detect_images.find_one(
-            detect_query,
+        detection_data = find_one_view(
+            'detect_images', 'detection_detail', detect_query,
             sort=[("UpdatedAt", -1)]
         )
 
@@ -285,6 +306,7 @@ def get_classified_image_details(image_id):
 
 @classification_bp.route('/unclassified-images/<image_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('unclassified_detail', image_detail_scopes)
 def get_unclassified_image_details(image_id):
     """
     예외검수 이미지 상세 정보 조회 API
@@ -312,7 +334,8 @@ def get_unclassified_image_details(image_id):
                     "from": "detect_images",
                     "let": { "imageId": "$_id" },
                     "pipeline": [
-                        { "$match": { "$expr": { "$eq": ["$Image_id", "$$imageId"] } } } 
+                        { "$match": { "$expr": { "$eq": ["$Image_id", "$$imageId"] } } },
+                        project_stage('detection_lookup')  # 검출 결과 이미지(Binary)는 가져오지 않음
                     ],
                     "as": "detection_data"
                 }
@@ -384,13 +407,13 @@ def delete_classified_image_endpoint(image_id):
         object_id = ObjectId(image_id)
         
         # 1. images 컬렉션에서 이미지 정보 조회
-        image = db.images.find_one({"_id": object_id})
+        image = find_one_view('images', 'file_paths', {"_id": object_id})
         if not image:
             return jsonify({'message': 'Image not found'}), 404
 
         # 2. 실제 파일 삭제
         file_deleted = True
-        for path in [image.get('FilePath'), image.get('ThumnailPath')]:
+        for path in [local_path(image.get('FilePath')), local_path(image.get('ThumnailPath'))]:
             if path and os.path.exists(path):
                 try:
                     os.remove(path)
@@ -406,6 +429,7 @@ def delete_classified_image_endpoint(image_id):
         
         # 4. images 컬렉션에서 삭제
         image_result = db.images.delete_one({"_id": object_id})
+        images_changed(before=[image])
 
         # 결과 반환
         if image_result.deleted_count > 0:
@@ -443,7 +467,7 @@ def delete_unclassified_image_endpoint(image_id):
         object_id = ObjectId(image_id)
         
         # 1. images 컬렉션에서 미분류 이미지 정보 조회
-        image = db.images.find_one({
+        image = find_one_view('images', 'file_paths', {
             "_id": object_id,
             "is_classified": False  # 미분류 이미지 확인
         })
@@ -453,7 +477,7 @@ def delete_unclassified_image_endpoint(image_id):
 
         # 2. 실제 파일 삭제
         file_deleted = True
-        for path in [image.get('FilePath'), image.get('ThumnailPath')]:
+        for path in [local_path(image.get('FilePath')), local_path(image.get('ThumnailPath'))]:
             if path and os.path.exists(path):
                 try:
                     os.remove(path)
@@ -469,6 +493,7 @@ def delete_unclassified_image_endpoint(image_id):
         
         # 4. images 컬렉션에서 삭제
         image_result = db.images.delete_one({"_id": object_id})
+        images_changed(before=[image])
 
         # 결과 반환
         if image_result.deleted_count > 0:
@@ -515,7 +540,7 @@ def update_classified_image_endpoint(image_id):
             return jsonify({'message': '필수 필드가 누락되었습니다 (count, best_class)'}), 400
 
         # 1. 먼저 이미지 정보 조회 (ProjectInfo.ID 필요)
-        image = db.images.find_one({'_id': object_id})
+        image = find_one_view('images', 'image_key', {'_id': object_id})
         if not image:
             return jsonify({'message': '이미지를 찾을 수 없습니다'}), 404
 
@@ -527,7 +552,7 @@ def update_classified_image_endpoint(image_id):
         # 2. images 컬렉션 업데이트
         images_result = db.images.update_one(
             {'_id': object_id},
-            {'$set': update_fields}
+            {'$set': with_normalized(update_fields)}
         )
 
         # 3. detect_images 컬렉션 업데이트
@@ -538,6 +563,7 @@ def update_classified_image_endpoint(image_id):
             },
             {'$set': update_fields}
         )
+        images_changed([object_id])
 
         # 업데이트 결과 확인
         if images_result.matched_count == 0:
@@ -580,7 +606,7 @@ def update_unclassified_image_endpoint(image_id):
             return jsonify({'message': '필수 필드가 누락되었습니다 (best_class, status, object_counts)'}), 400
 
         # 1. 먼저 이미지 정보 조회 (ProjectInfo.ID 필요)
-        image = db.images.find_one({
+        image = find_one_view('images', 'image_key', {
             '_id': object_id,
             'is_classified': False  # 미분류 이미지 확인
         })
@@ -598,7 +624,7 @@ def update_unclassified_image_endpoint(image_id):
         # 2. images 컬렉션 업데이트
         images_result = db.images.update_one(
             {'_id': object_id},
-            {'$set': update_fields}
+            {'$set': with_normalized(update_fields)}
         )
 
         # 3. detect_images 컬렉션 업데이트
@@ -609,6 +635,7 @@ def update_unclassified_image_endpoint(image_id):
             },
             {'$set': update_fields}
         )
+        images_changed([object_id])
 
         # 업데이트 결과 반환
         if images_result.matched_count == 0:
@@ -651,7 +678,8 @@ def get_image_detail(image_id):
                     "from": "detect_images",
                     "let": { "imageId": "$_id" },  # 변환 없이 ObjectId 그대로 사용
                     "pipeline": [
-                        { "$match": { "$expr": { "$eq": ["$Image_id", "$$imageId"] } } } 
+                        { "$match": { "$expr": { "$eq": ["$Image_id", "$$imageId"] } } },
+                        project_stage('detection_lookup')  # 검출 결과 이미지(Binary)는 가져오지 않음
                     ],
                     "as": "detection_data"
                 }
@@ -712,30 +740,22 @@ def get_classified_images():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         sequence = request.args.get('sequenceNumber')
+        cursor = parse_cursor(request.args.get('cursor'), IMAGE_SORT)
 
         query = {'is_classified': True}
         if sequence:
             query['evtnum'] = int(sequence)
 
-        images = list(db.images.find(
-            query,
-            {
-                '_id': 1, 
-                'FileName': 1, 
-                'ThumnailPath': 1, 
-                'BestClass': 1, 
-                'evtnum': 1, 
-                'DateTimeOriginal': 1, 
-                'ProjectInfo.ID': 1, 
-                'ProjectInfo.ProjectName': 1
-            }
-        ).skip((page - 1) * per_page).limit(per_page))
+        images = list(find_view(
+            'images', 'classified_list', find_query(query, IMAGE_SORT, cursor)
+        ).sort(IMAGE_SORT).skip(find_skip(page, per_page, cursor)).limit(per_page))
 
         return jsonify({
             "status": 200,
+            "next_cursor": next_cursor(images, IMAGE_SORT, per_page),
             "images": [{
                 "imageId": str(img['_id']),
-                "imageUrl": img.get('ThumnailPath', ''),
+                "imageUrl": image_url(img.get('ThumnailPath')),
                 "uploadDate": img.get('DateTimeOriginal', ''),  # 통일된 필드
                 "classificationResult": img.get('BestClass', '미확인'),  # 통일된 필드
                 "sequenceNumber": img.get('evtnum'),
@@ -744,6 +764,8 @@ def get_classified_images():
             } for img in images]
         }), 200
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         return jsonify({
             "status": 500,
@@ -756,7 +778,7 @@ def delete_image(image_id):
     """이미지 삭제 API"""
     try:
         # 이미지 조회
-        image = db.images.find_one({'_id': ObjectId(image_id)})
+        image = find_one_view('images', 'file_paths', {'_id': ObjectId(image_id)})
         if not image:
             return jsonify({
                 "status": 404,
@@ -764,12 +786,13 @@ def delete_image(image_id):
             }), 404
 
         # 물리적 파일 삭제
-        for file_path in [image.get('FilePath'), image.get('ThumnailPath')]:
+        for file_path in [local_path(image.get('FilePath')), local_path(image.get('ThumnailPath'))]:
             if file_path and os.path.exists(file_path):
                 os.remove(file_path)
 
         # DB에서 삭제
         result = db.images.delete_one({'_id': ObjectId(image_id)})
+        images_changed(before=[image])
         if result.deleted_count == 0:
             return jsonify({
                 "status": 404,
@@ -787,8 +810,39 @@ def delete_image(image_id):
             "message": f"서버 오류: {str(e)}"
         }), 500
 
+def normal_inspection_item(img: Dict[str, Any], detection_data: Optional[Dict]) -> Dict[str, Any]:
+    """일반검수 목록 항목 (detect_images의 종 정보와 Infos[0]의 bbox 반영)"""
+    species_name = "미확인"
+    bbox_data = []
+    new_bbox_data = []
+
+    if detection_data:
+        species_name = detection_data.get("BestClass", "미확인")
+
+        # ✅ Infos 배열이 있고, 최소 한 개의 요소가 있을 경우 bbox 값 가져오기
+        infos = detection_data.get("Infos", [])
+        if infos and isinstance(infos, list) and len(infos) > 0:
+            bbox_data = infos[0].get("bbox", [])  # ✅ Infos[0] 내부의 bbox 추출
+            new_bbox_data = infos[0].get("new_bbox", [])
+
+    return {
+        "imageId": str(img['_id']),
+        "fileName": img.get('FileName', ''),
+        "imageUrl": image_url(img.get('ThumnailPath')),
+        "uploadDate": img.get('DateTimeOriginal', {}).get('$date', ''),
+        "projectId": img.get('ProjectInfo', {}).get('ID', ''),
+        "projectName": img.get('ProjectInfo', {}).get('ProjectName', ''),
+        "serialNumber": img.get('SerialNumber', ''),
+        "speciesName": species_name,  # ✅ AI 분석된 종 정보 반영
+        "evtnum": img.get('evtnum', ''),
+        "exception_status": img.get('exception_status', ''),
+        "bbox": bbox_data,  # ✅ Infos[0]에서 가져온 bbox
+        "new_bbox": new_bbox_data,  # ✅ Infos[0]에서 가져온 new_bbox
+    }
+
 @classification_bp.route('/inspection/normal', methods=['GET'])
 @jwt_required()
+@conditional_get('normal_inspection', project_scopes)
 def get_normal_inspection_images():
     try:
         logger.info("=== 일반검수 이미지 목록 조회 시작 ===")
@@ -797,6 +851,8 @@ def get_normal_inspection_images():
         evtnum = request.args.get('evtnum')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 1000))
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 이미지 수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
 
         logger.info(f"요청 파라미터: project_id={project_id}, evtnum={evtnum}")
 
@@ -827,80 +883,50 @@ def get_normal_inspection_images():
 
         logger.info(f"최종 검색 조건: {query}")
 
-        # ✅ evtnum과 project_id를 함께 그룹핑하여, 프로젝트가 다른 경우 evtnum이 같아도 다른 그룹이 되도록 함
-        pipeline = [
-            {"$match": query},
-            {"$sort": {"evtnum": 1, "FileName": 1}},  # evtnum으로 먼저 정렬하고, 같은 evtnum 내에서는 파일명으로 정렬
-            {"$group": {
-                "_id": {"evtnum": "$evtnum", "project_id": "$ProjectInfo.ID"},  # ✅ 프로젝트 ID도 포함하여 그룹화
-                "images": {"$push": "$$ROOT"},  # 각 그룹의 모든 문서 저장
-                "count": {"$sum": 1}  # 각 그룹의 이미지 수 계산
-            }},
-            {"$sort": {"_id.evtnum": 1}},  # 그룹(evtnum)을 오름차순으로 정렬
-            {"$skip": (page - 1) * per_page},
-            {"$limit": per_page}
-        ]
-
-        # Aggregation 실행
-        grouped_results = list(db.images.aggregate(pipeline))
+        # ✅ 이벤트(프로젝트 ID + evtnum) 단위로 페이지를 나눔 - 이벤트 요약에서 페이지를 고른 뒤 이미지 조회
+        event_query = view_query('normal', project_id=project_id, evtnum=query.get('evtnum'))
+        events = list(find_view('events', 'event_keys', event_query)
+                      .sort(EVENT_LIST_SORT)
+                      .skip((page - 1) * per_page)
+                      .limit(per_page))
+        page_images = iter(())
+        if events:
+            page_images = find_view('images', 'normal_inspection',
+                                    {'$and': [query, event_image_query(events)]}).sort(EVENT_IMAGE_SORT)
         
         # 전체 문서 수 계산
-        total = db.images.count_documents(query)
-        
-        # 결과 포맷팅
-        result_images = []
-        for group in grouped_results:
-            for img in group['images']:
-                # ✅ detect_images에서 해당 이미지의 종 정보를 가져옴
-                detect_query = {"Image_id": img["_id"]}
-                detection_data = db.detect_images.find_one(
-                    detect_query,
-                    sort=[("UpdatedAt", -1)]  # 최신 데이터 가져오기
-                )
-
-                species_name = "미확인"
-                bbox_data = []
-                new_bbox_data = []
-
-                if detection_data:
-                    species_name = detection_data.get("BestClass", "미확인")
-
-                    # ✅ Infos 배열이 있고, 최소 한 개의 요소가 있을 경우 bbox 값 가져오기
-                    infos = detection_data.get("Infos", [])
-                    if infos and isinstance(infos, list) and len(infos) > 0:
-                        bbox_data = infos[0].get("bbox", [])  # ✅ Infos[0] 내부의 bbox 추출
-                        new_bbox_data = infos[0].get("new_bbox", [])
-
-                result_images.append({
-                    "imageId": str(img['_id']),
-                    "fileName": img.get('FileName', ''),
-                    "imageUrl": generate_image_url(img.get('ThumnailPath')),
-                    "uploadDate": img.get('DateTimeOriginal', {}).get('$date', ''),
-                    "projectId": img.get('ProjectInfo', {}).get('ID', ''),
-                    "projectName": img.get('ProjectInfo', {}).get('ProjectName', ''),
-                    "serialNumber": img.get('SerialNumber', ''),
-                    "speciesName": species_name,  # ✅ AI 분석된 종 정보 반영
-                    "evtnum": img.get('evtnum', ''),
-                    "exception_status": img.get('exception_status', ''),
-                    "bbox": bbox_data,  # ✅ Infos[0]에서 가져온 bbox
-                    "new_bbox": new_bbox_data,  # ✅ Infos[0]에서 가져온 new_bbox
-                })
-
+        total, approximate = count_total(db.images, query, count_mode) if with_total else (None, False)
 
         logger.info(f"\n=== 조회 결과 요약 ===")
         logger.info(f"총 이미지 수: {total}")
         logger.info(f"현재 페이지: {page}")
         logger.info(f"페이지당 이미지 수: {per_page}")
-        logger.info(f"처리된 이미지 수: {len(result_images)}")
+
+        # ✅ 검출 정보는 DETECTION_JOIN_BATCH개씩 한 번에 조회해 붙임
+        result_images = (
+            normal_inspection_item(img, detection_data)
+            for img, detection_data in with_detections(page_images)
+        )
+
+        # Accept: application/x-ndjson 이면 이미지 한 줄씩 스트리밍
+        if wants_ndjson():
+            return ndjson_response(result_images, meta={
+                "total": total,
+                "total_approximate": approximate,
+                "page": page,
+                "per_page": per_page,
+                "total_pages": total_pages(total, per_page)
+            })
 
         return jsonify({
             "status": 200,
             "message": "일반 검수 이미지 조회 성공",
             "total": total,
+            "total_approximate": approximate,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page,
-            "images": result_images
+            "total_pages": total_pages(total, per_page),
+            "images": list(result_images)
         }), 200
 
     except Exception as e:
@@ -910,6 +936,20 @@ def get_normal_inspection_images():
             "message": f"서버 오류 발생: {str(e)}"
         }), 500
 
+def exception_inspection_item(img: Dict[str, Any]) -> Dict[str, Any]:
+    """예외검수 목록 항목"""
+    return {
+        "imageId": str(img['_id']),
+        "fileName": img.get('FileName', 'No Data'),
+        "imageUrl": image_url(img.get('ThumnailPath')),
+        "uploadDate": img.get('DateTimeOriginal', '0000-00-00T00:00:00Z'),
+        "projectId": img.get('ProjectInfo', {}).get('ID', ''),
+        "projectName": img.get('ProjectInfo', {}).get('ProjectName', ''),
+        "serialNumber": img.get('SerialNumber', ''),
+        "exceptionStatus": img.get('exception_status', 'pending'),
+        "evtnum": img.get('evtnum', '')
+    }
+
 @classification_bp.route('/inspection/exception', methods=['GET'])
 @jwt_required()
 def get_exception_inspection_images():
@@ -928,6 +968,9 @@ def get_exception_inspection_images():
 
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 1000))
+        cursor = parse_cursor(request.args.get('cursor'), IMAGE_SORT)
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 개수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
 
         # 기본 쿼리 조건 (미분류된 이미지만 조회)
         query = {'is_classified': False, 'inspection_complete': False}
@@ -940,7 +983,7 @@ def get_exception_inspection_images():
 
         # 날짜 필터 추가
         if start_date and end_date:
-            query['DateTimeOriginal'] = {
+            query['CapturedAt'] = {
                 '$gte': datetime.strptime(start_date, '%Y-%m-%d'),
                 '$lte': datetime.strptime(end_date, '%Y-%m-%d')
             }
@@ -957,40 +1000,43 @@ def get_exception_inspection_images():
             if project_id:
                 query['ProjectInfo.ID'] = project_id
 
+        # Accept: application/x-ndjson 이면 커서에서 읽는 대로 한 줄씩 스트리밍 (마지막 줄에 next_cursor)
+        if wants_ndjson():
+            images = find_view(
+                'images', 'exception_inspection', find_query(query, IMAGE_SORT, cursor)
+            ).sort(IMAGE_SORT).skip(find_skip(page, per_page, cursor)).limit(per_page)
+            total, approximate = count_total(db.images, query, count_mode) if with_total else (None, False)
+            return ndjson_response(
+                rows_with_next_cursor(images, IMAGE_SORT, per_page, exception_inspection_item),
+                meta={
+                    "total": total,
+                    "total_approximate": approximate,
+                    "page": page,
+                    "per_page": per_page,
+                    "total_pages": total_pages(total, per_page)
+                }
+            )
+
         # 이미지 조회
-        total = db.images.count_documents(query)
-        images = list(db.images.find(query, {
-            '_id': 1,
-            'FileName': 1,
-            'ThumnailPath': 1,
-            'DateTimeOriginal': 1,
-            'ProjectInfo.ID': 1,
-            'ProjectInfo.ProjectName': 1,
-            'SerialNumber': 1,
-            'exception_status': 1,
-            'evtnum': 1
-        }).skip((page - 1) * per_page).limit(per_page))
+        images, total, approximate = page_with_total(
+            db.images, query, IMAGE_SORT, page, per_page, cursor,
+            projection('exception_inspection'), with_total, count_mode
+        )
 
         return jsonify({
             "status": 200,
             "message": "예외 검수 이미지 조회 성공",
             "total": total,
+            "total_approximate": approximate,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total + per_page - 1) // per_page,
-            "images": [{
-                "imageId": str(img['_id']),
-                "fileName": img.get('FileName', 'No Data'),
-                "imageUrl": generate_image_url(img.get('ThumnailPath')),
-                "uploadDate": img.get('DateTimeOriginal', '0000-00-00T00:00:00Z'),
-                "projectId": img.get('ProjectInfo', {}).get('ID', ''),
-                "projectName": img.get('ProjectInfo', {}).get('ProjectName', ''),
-                "serialNumber": img.get('SerialNumber', ''),
-                "exceptionStatus": img.get('exception_status', 'pending'),
-                "evtnum": img.get('evtnum', '')
-            } for img in images]
+            "total_pages": total_pages(total, per_page),
+            "next_cursor": next_cursor(images, IMAGE_SORT, per_page),
+            "images": [exception_inspection_item(img) for img in images]
         }), 200
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         print("예외 발생:", str(e))
         traceback.print_exc()
@@ -1020,7 +1066,9 @@ def delete_multiple_images():
         object_ids = [ObjectId(id) for id in image_ids]
         
         # 이미지 삭제
+        deleted_docs = snapshot(object_ids)
         result = db.images.delete_many({'_id': {'$in': object_ids}})
+        images_changed(before=deleted_docs)
         
         return jsonify({
             "status": 200,
@@ -1099,10 +1147,11 @@ def update_normal_inspection_bulk():
         # 다중 이미지 업데이트
         result = db.images.update_many(
             {'_id': {'$in': object_ids}},  #is_classified 조건 없이 업데이트 실행
-            {'$set': update_dict}
+            {'$set': with_normalized(update_dict)}
         )
 
         print(f"수정된 문서 개수: {result.modified_count}")
+        images_changed(object_ids)
 
         if result.matched_count == 0:
             return standard_response("해당 조건에 맞는 이미지가 없습니다", status=404)
@@ -1167,6 +1216,7 @@ def update_exception_inspection_bulk():
             {'_id': {'$in': object_ids}, 'is_classified': False},
             {'$set': update_dict}
         )
+        images_changed(object_ids)
 
         if result.matched_count == 0:
             return standard_response("수정할 이미지가 없습니다", status=404)
@@ -1208,8 +1258,9 @@ def batch_classify() -> Tuple[Dict[str, Any], int]:
         # 일괄 업데이트
         result = db.images.update_many(
             {'_id': {'$in': object_ids}},
-            {'$set': update_dict}
+            {'$set': with_normalized(update_dict)}
         )
+        images_changed(object_ids)
         print(f"Received image_ids: {image_ids}")
 
         return standard_response(
@@ -1264,6 +1315,7 @@ def batch_update() -> Tuple[Dict[str, Any], int]:
             },
             {'$set': update_dict}
         )
+        images_changed(object_ids)
 
         return standard_response(f"{result.modified_count}개의 이미지가 수정되었습니다")
 
@@ -1305,6 +1357,7 @@ def update_inspection_status(image_id: str) -> Tuple[Dict[str, Any], int]:
                 }
             }
         )
+        images_changed([object_id])
 
         # 업데이트 결과 확인
         if result.matched_count == 0:
@@ -0,0 +1,287 @@
+"""프로젝트별 이미지 상태 카운터
+
+상태 요약/진행률 API는 images를 매번 세는 대신 project_counters 컬렉션(프로젝트당 한 문서)을 읽는다.
+changes.images_changed()가 호출되면 바뀐 이미지의 현재 상태를 counter_states(이미지별 마지막으로
+센 상태)와 비교해 차이만 $inc로 반영한다. 독립 실행(standalone) mongod에서도 앱의 모든 images
+쓰기가 이 경로를 거치므로 별도 설정 없이 갱신된다.
+
+    total_images        전체
+    classified_images   분류됨 / unclassified_images 미분류 (is_classified가 false)
+    normal_images       분류됨 + 검수 전 (일반검수 대기)
+    exception_images    미분류 + 검수 전 (예외검수 대기)
+    inspected_images    검수 완료
+    inspection_status   검토 상태(inspection_status, 없으면 pending)별 이미지 수 하위 문서
+
+같은 이미지를 동시에 갱신하면 잠시 어긋날 수 있으므로 reconcile로 images 기준 값을 다시 맞춘다.
+앱 밖에서 images를 직접 고치는 경우(셸, 다른 서비스)는 watch가 변경 스트림(레플리카 셋 필요)으로
+반영하며, 변경 스트림을 쓸 수 없으면 COUNTER_RECONCILE_INTERVAL마다 reconcile만 실행한다.
+
+    python -m modules.counters reconcile [--project <project_id>]
+    python -m modules.counters watch
+"""
+import argparse
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import PyMongoError
+
+from .changes import subscribe
+from .database import db
+from .events import image_view
+from .indexes import sync_indexes
+from .query_cache import store
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('total_images', 'classified_images', 'unclassified_images',
+                  'normal_images', 'exception_images', 'inspected_images')
+
+# 상태 계산에 필요한 images 필드
+COUNTER_PROJECTION = {'_id': 1, 'ProjectInfo.ID': 1, 'is_classified': 1, 'inspection_complete': 1,
+                      'inspection_status': 1}
+
+COUNTER_BATCH = 1000
+COUNTER_RECONCILE_INTERVAL = int(os.getenv('COUNTER_RECONCILE_INTERVAL', '3600'))  # 초, watch의 reconcile 주기
+COUNTER_WATCH_AWAIT_MS = 1000
+
+# 변경 스트림에서 받는 이벤트 (문서 키만)
+WATCH_PIPELINE = [
+    {'$match': {'operationType': {'$in': ['insert', 'update', 'replace', 'delete']}}},
+    {'$project': {'documentKey': 1}}
+]
+
+COUNTER_SCOPE = 'counters'  # 카운터를 쓴 뒤 올리는 세대 범위 (워커별 메모리 사본 무효화)
+# 초, 메모리 사본 최대 사용 시간 (CLI watch/reconcile처럼 세대 번호를 공유하지 않는 프로세스의 갱신 반영)
+COUNTER_CACHE_TTL = int(os.getenv('COUNTER_CACHE_TTL', '5'))
+
+_cache: Dict[str, Any] = {}
+_cache_lock = Lock()
+
+
+def status_key(value: Any) -> str:
+    """검토 상태 값을 inspection_status 하위 문서의 필드 이름으로 (없으면 pending)"""
+    return str(value or 'pending').replace('.', '_').lstrip('$') or 'pending'
+
+
+def image_state(doc: Dict) -> Dict[str, Any]:
+    """이미지가 더해지는 카운터 (counter_states에 저장하는 형태)"""
+    view = image_view(doc)
+    classified = bool(doc.get('is_classified'))
+    return {
+        '_id': doc['_id'],
+        'project_id': (doc.get('ProjectInfo') or {}).get('ID'),
+        'inspection_status': status_key(doc.get('inspection_status')),
+        'total_images': 1,
+        'classified_images': int(classified),
+        'unclassified_images': int(doc.get('is_classified') is False),
+        'normal_images': int(view == 'normal'),
+        'exception_images': int(view == 'exception'),
+        'inspected_images': int(view == 'inspected')
+    }
+
+
+def refresh_counters(image_ids: Iterable) -> int:
+    """지정한 이미지들의 상태를 다시 읽어 카운터에 차이만 반영 (변경된 프로젝트 수 반환)"""
+    ids = list({image_id if isinstance(image_id, ObjectId) else ObjectId(image_id) for image_id in image_ids})
+    if not ids:
+        return 0
+
+    current = {doc['_id']: image_state(doc) for doc in db.images.find({'_id': {'$in': ids}}, COUNTER_PROJECTION)}
+    previous = {state['_id']: state for state in db.counter_states.find({'_id': {'$in': ids}})}
+
+    deltas: Dict[Optional[str], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    operations = []
+    for image_id in ids:
+        new, old = current.get(image_id), previous.get(image_id)
+        if new == old:
+            continue
+        for state, sign in ((old, -1), (new, 1)):
+            if state:
+                delta = deltas[state['project_id']]
+                for field in COUNTER_FIELDS:
+                    delta[field] += sign * state.get(field, 0)
+                if state.get('inspection_status'):
+                    field = f"inspection_status.{state['inspection_status']}"
+                    delta[field] = delta.get(field, 0) + sign
+        if new:
+            operations.append(ReplaceOne({'_id': image_id}, new, upsert=True))
+        else:
+            operations.append(DeleteOne({'_id': image_id}))
+
+    if operations:
+        db.counter_states.bulk_write(operations, ordered=False)
+
+    now = datetime.utcnow()
+    updates = [
+        UpdateOne({'project_id': project_id}, {'$inc': delta, '$set': {'updated_at': now}}, upsert=True)
+        for project_id, delta in deltas.items() if any(delta.values())
+    ]
+    if updates:
+        db.project_counters.bulk_write(updates, ordered=False)
+        store.bump([COUNTER_SCOPE])
+    return len(updates)
+
+
+@subscribe
+def on_images_changed(docs: List[Dict]) -> None:
+    """images 변경 시 바뀐 이미지의 카운터 갱신"""
+    refresh_counters(doc['_id'] for doc in docs)
+
+
+def project_counters() -> Dict[Optional[str], Dict[str, int]]:
+    """프로젝트 ID별 카운터 (카운터 변경이 없으면 메모리에 둔 값 재사용)"""
+    generation = store.generations([COUNTER_SCOPE])[0]
+
+    def fresh(entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and entry['generation'] == generation and time.monotonic() - entry['at'] < COUNTER_CACHE_TTL
+
+    entry = _cache.get('counters')
+    if fresh(entry):
+        return entry['data']
+    with _cache_lock:
+        entry = _cache.get('counters')
+        if not fresh(entry):
+            data = {
+                row['project_id']: {
+                    **{field: row.get(field, 0) for field in COUNTER_FIELDS},
+                    'inspection_status': row.get('inspection_status') or {}
+                }
+                for row in db.project_counters.find(
+                    {}, {'_id': 0, 'project_id': 1, 'inspection_status': 1, **dict.fromkeys(COUNTER_FIELDS, 1)}
+                )
+            }
+            entry = {'at': time.monotonic(), 'generation': generation, 'data': data}
+            _cache['counters'] = entry
+    return entry['data']
+
+
+def counter_totals(project_id: Optional[str] = None) -> Dict[str, int]:
+    """전체(또는 프로젝트)의 카운터 합계"""
+    counters = project_counters()
+    rows = [counters.get(project_id, {})] if project_id else counters.values()
+    return {field: sum(row.get(field, 0) for row in rows) for field in COUNTER_FIELDS}
+
+
+def inspection_status_totals(project_id: Optional[str] = None) -> Dict[str, int]:
+    """전체(또는 프로젝트)의 검토 상태별 이미지 수 (0인 상태는 제외)"""
+    counters = project_counters()
+    rows = [counters.get(project_id, {})] if project_id else counters.values()
+    totals: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        for status, count in row.get('inspection_status', {}).items():
+            totals[status] += count
+    return {status: count for status, count in totals.items() if count}
+
+
+def _batches(cursor: Iterable[Dict]) -> Iterable[List]:
+    batch: List = []
+    for doc in cursor:
+        batch.append(doc['_id'])
+        if len(batch) >= COUNTER_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def reconcile_counters(project_id: Optional[str] = None) -> Dict[str, int]:
+    """images 기준으로 counter_states를 맞추고 project_counters를 counter_states 합계로 다시 씀
+
+    합계를 다시 쓰는 사이에 들어온 갱신은 덮일 수 있으며, 다음 reconcile에서 맞춰진다.
+    """
+    stats = {'images': 0, 'removed': 0, 'projects': 0}
+    image_query = {'ProjectInfo.ID': project_id} if project_id else {}
+    state_query = {'project_id': project_id} if project_id else {}
+
+    for batch in _batches(db.images.find(image_query, {'_id': 1}).sort('_id', 1)):
+        stats['images'] += len(batch)
+        refresh_counters(batch)
+
+    # images에서 사라졌거나 다른 프로젝트로 옮겨진 이미지의 상태 정리
+    for batch in _batches(db.counter_states.find(state_query, {'_id': 1}).sort('_id', 1)):
+        live = {doc['_id'] for doc in db.images.find({'_id': {'$in': batch}, **image_query}, {'_id': 1})}
+        stale = [image_id for image_id in batch if image_id not in live]
+        stats['removed'] += len(stale)
+        refresh_counters(stale)
+
+    now = datetime.utcnow()
+    totals = list(db.counter_states.aggregate([
+        {'$match': state_query},
+        {'$group': {'_id': '$project_id', **{field: {'$sum': f'${field}'} for field in COUNTER_FIELDS}}}
+    ], allowDiskUse=True))
+    statuses: Dict[Optional[str], Dict[str, int]] = defaultdict(dict)
+    for row in db.counter_states.aggregate([
+        {'$match': state_query},
+        {'$group': {'_id': {'project_id': '$project_id', 'status': '$inspection_status'}, 'count': {'$sum': 1}}}
+    ], allowDiskUse=True):
+        statuses[row['_id']['project_id']][row['_id']['status']] = row['count']
+    operations: List[Any] = [
+        ReplaceOne({'project_id': row['_id']},
+                   {'project_id': row['_id'], **{field: row[field] for field in COUNTER_FIELDS},
+                    'inspection_status': statuses[row['_id']], 'updated_at': now},
+                   upsert=True)
+        for row in totals
+    ]
+    if not project_id:
+        operations.append(DeleteMany({'project_id': {'$nin': [row['_id'] for row in totals]}}))
+    elif not totals:
+        operations.append(DeleteOne({'project_id': project_id}))
+    db.project_counters.bulk_write(operations, ordered=False)
+    store.bump([COUNTER_SCOPE])
+
+    stats['projects'] = len(totals)
+    return stats
+
+
+def watch_counters() -> None:
+    """images 변경 스트림으로 카운터 갱신 + 주기적 reconcile (변경 스트림이 없으면 reconcile만)"""
+    next_reconcile = time.monotonic() + COUNTER_RECONCILE_INTERVAL
+    while True:
+        try:
+            with db.images.watch(WATCH_PIPELINE, max_await_time_ms=COUNTER_WATCH_AWAIT_MS) as stream:
+                logger.info("images 변경 스트림으로 카운터를 갱신합니다")
+                while True:
+                    # 대기 시간 안에 들어온 변경을 모아 한 번에 반영
+                    changed = []
+                    change = stream.try_next()
+                    while change is not None:
+                        changed.append(change['documentKey']['_id'])
+                        if len(changed) >= COUNTER_BATCH:
+                            break
+                        change = stream.try_next()
+                    refresh_counters(changed)
+                    if time.monotonic() >= next_reconcile:
+                        logger.info(f"카운터 reconcile: {reconcile_counters()}")
+                        next_reconcile = time.monotonic() + COUNTER_RECONCILE_INTERVAL
+        except PyMongoError as e:
+            logger.warning(f"변경 스트림을 사용할 수 없어 {COUNTER_RECONCILE_INTERVAL}초마다 reconcile만 실행합니다: {str(e)}")
+            time.sleep(max(next_reconcile - time.monotonic(), 0))
+            logger.info(f"카운터 reconcile: {reconcile_counters()}")
+            next_reconcile = time.monotonic() + COUNTER_RECONCILE_INTERVAL
+
+
+def main():
+    parser = argparse.ArgumentParser(description='프로젝트별 이미지 상태 카운터 관리')
+    parser.add_argument('command', choices=['reconcile', 'watch'])
+    parser.add_argument('--project', help='특정 프로젝트만 reconcile')
+    args = parser.parse_args()
+
+    sync_indexes(['project_counters', 'counter_states', 'images'])
+    if args.command == 'watch':
+        logging.basicConfig(level=logging.INFO)
+        watch_counters()
+        return
+
+    stats = reconcile_counters(args.project)
+    print(f"카운터 reconcile 완료: 이미지 {stats['images']}개, 정리 {stats['removed']}개, 프로젝트 {stats['projects']}개")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""전체 개수(total) 계산 서비스
+
+엔드포인트마다 ?count= 로 방식을 고를 수 있다 (지정하지 않으면 엔드포인트 기본값).
+
+- exact: 매 요청 count_documents
+- cached: exact 결과를 COUNT_CACHE_TTL 동안 재사용. 키에 쿼리 캐시 전체 세대 번호를 넣어
+  images 쓰기가 있으면 다시 센다 (정확한 값으로 취급)
+- estimated: 조건이 없으면 estimated_document_count (컬렉션 메타데이터),
+  조건이 있으면 counters 컬렉션에 저장된 마지막 개수 (COUNT_ESTIMATE_MAX_AGE보다 오래되면 다시 셈).
+  counters는 updated_at TTL 인덱스(indexes.COUNT_ESTIMATE_EXPIRE)로 쓰이지 않는 조건을 정리한다
+
+approximate가 True이면 응답의 total_approximate로 알린다.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.collection import Collection
+
+from .database import db
+from .query_cache import GLOBAL_SCOPE, store
+from .utils.pagination import SortSpec, find_page
+
+COUNT_MODES = ('exact', 'cached', 'estimated')
+COUNT_CACHE_TTL = int(os.getenv('COUNT_CACHE_TTL', '30'))  # 초
+COUNT_ESTIMATE_MAX_AGE = int(os.getenv('COUNT_ESTIMATE_MAX_AGE', '600'))  # 초
+
+_cache: Dict[str, Tuple[float, int]] = {}
+_cache_lock = Lock()
+
+
+def parse_count_mode(value: Optional[str], default: str = 'exact') -> str:
+    """count 파라미터 해석"""
+    mode = (value or default).strip().lower()
+    if mode not in COUNT_MODES:
+        raise ValueError(f"count 값은 {', '.join(COUNT_MODES)} 중 하나여야 합니다")
+    return mode
+
+
+def _count_key(collection: Collection, query: Dict[str, Any]) -> str:
+    return json.dumps([collection.name, query], sort_keys=True, default=str, ensure_ascii=False)
+
+
+def _cached_count(collection: Collection, query: Dict[str, Any]) -> int:
+    generation = store.generations([GLOBAL_SCOPE])[0]
+    key = f"{generation}:{_count_key(collection, query)}"
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    count = collection.count_documents(query)
+    with _cache_lock:
+        # 만료되었거나 이전 세대인 항목 정리
+        for stale in [k for k, (expires_at, _) in _cache.items() if expires_at <= now or not k.startswith(f"{generation}:")]:
+            del _cache[stale]
+        _cache[key] = (now + COUNT_CACHE_TTL, count)
+    return count
+
+
+def _estimated_count(collection: Collection, query: Dict[str, Any]) -> Tuple[int, bool]:
+    if not query:
+        return collection.estimated_document_count(), True
+
+    key = _count_key(collection, query)
+    counter = db.counters.find_one({'_id': key})
+    if counter and counter['updated_at'] > datetime.utcnow() - timedelta(seconds=COUNT_ESTIMATE_MAX_AGE):
+        return counter['count'], True
+
+    count = collection.count_documents(query)
+    db.counters.replace_one(
+        {'_id': key},
+        {'collection': collection.name, 'count': count, 'updated_at': datetime.utcnow()},
+        upsert=True
+    )
+    return count, False
+
+
+def count_total(collection: Collection, query: Dict[str, Any], mode: str = 'exact') -> Tuple[int, bool]:
+    """조건에 맞는 문서 수와 근사값 여부"""
+    if mode == 'cached':
+        return _cached_count(collection, query), False
+    if mode == 'estimated':
+        return _estimated_count(collection, query)
+    return collection.count_documents(query), False
+
+
+def page_with_total(collection: Collection, query: Dict[str, Any], sort: SortSpec, page: int, per_page: int,
+                    cursor: Optional[List[Any]], projection: Optional[Dict[str, int]] = None,
+                    with_total: bool = True,
+                    mode: str = 'exact') -> Tuple[List[Dict], Optional[int], bool]:
+    """한 페이지(인덱스를 타는 find)와 전체 개수(count_total, with_total=False면 None)"""
+    items = find_page(collection, query, sort, page, per_page, cursor, projection)
+    if not with_total:
+        return items, None, False
+    total, approximate = count_total(collection, query, mode)
+    return items, total, approximate
@@ -6,9 +6,11 @@ from bson import ObjectId
 from typing import Dict, List, Optional, Union, Any
 from bson.binary import Binary
 from .utils.constants import MONGODB_URI, DB_NAME
+from .metrics import mongo_listeners
+from .utils.query_shapes import query_shape_listeners
 
-# MongoDB 연결
-client = MongoClient(MONGODB_URI)
+# MongoDB 연결 (명령 지연 시간 메트릭, QUERY_SHAPE_LOG 지정 시 쿼리 형태 기록)
+client = MongoClient(MONGODB_URI, event_listeners=mongo_listeners() + query_shape_listeners())
 db = client[DB_NAME]
 
 def init_db():
@@ -41,7 +43,7 @@ def init_db():
             # 기본 인덱스
             db.images.create_index([('FileName', ASCENDING)])
             db.images.create_index([('is_classified', ASCENDING)])
-            db.images.create_index([('DateTimeOriginal', DESCENDING)])
+            db.images.create_index([('CapturedAt', DESCENDING)])
             db.images.create_index([('SerialNumber', ASCENDING)])
             # 검색 최적화를 위한 인덱스
             db.images.create_index([('ProjectInfo.ProjectName', ASCENDING)])
@@ -92,6 +94,35 @@ def init_db():
             db.detect_images.create_index([('Image_id', ASCENDING)], unique=True)
             print("Detect Images 컬렉션 초기화 완료!")
 
+        # detection_cache 컬렉션 초기화 (_id: content hash:model fingerprint:threshold)
+        if 'detection_cache' not in db.list_collection_names():
+            db.create_collection('detection_cache')
+            db.detection_cache.create_index([('last_used_at', ASCENDING)])
+            db.detection_cache.create_index([('content_hash', ASCENDING)])
+            print("Detection Cache 컬렉션 초기화 완료!")
+
+        # events 컬렉션 초기화 (프로젝트 ID + evtnum 요약, 인덱스는 indexes.DECLARED_INDEXES를 sync_indexes로 생성)
+        if 'events' not in db.list_collection_names():
+            db.create_collection('events')
+            print("Events 컬렉션 초기화 완료! (기존 이미지는 서버 시작 시 events.rebuild_if_empty 또는 python -m modules.events rebuild 로 채움)")
+
+        # counters 컬렉션 초기화 (counts.py estimated 모드의 조건별 마지막 개수, _id: 컬렉션+조건, updated_at TTL 인덱스는 indexes.py)
+        if 'counters' not in db.list_collection_names():
+            db.create_collection('counters')
+            print("Counters 컬렉션 초기화 완료!")
+
+        # rollups 컬렉션 초기화 (rollups.py 종/프로젝트/카메라/일자별 집계와 이벤트별 기여분)
+        for name in ('rollups', 'rollup_sources'):
+            if name not in db.list_collection_names():
+                db.create_collection(name)
+                print(f"{name} 컬렉션 초기화 완료! (기존 이미지는 python -m modules.rollups rebuild 로 채움)")
+
+        # 카운터 컬렉션 초기화 (counters.py 프로젝트별 이미지 상태 카운터와 이미지별 마지막 상태)
+        for name in ('project_counters', 'counter_states'):
+            if name not in db.list_collection_names():
+                db.create_collection(name)
+                print(f"{name} 컬렉션 초기화 완료! (기존 이미지는 python -m modules.counters reconcile 로 채움)")
+
         print("데이터베이스 초기화 완료!")
         
     except Exception as e:
@@ -110,13 +141,14 @@ COLLECTION_SCHEMAS= {
     },
     'images': {
         'FileName': str,              # 형식: YYYYMMDD-HHMMSSs1.jpg
-        'FilePath': str,              # 형식: ./mnt/{project_id}/{analysis_folder}/source/{filename}
+        'FilePath': str,              # 형식: {project_id}/{analysis_folder}/source/{filename} (STORAGE_ROOT 기준)
         'OriginalFileName': str,      # 원본 이미지 파일명
-        'ThumnailPath': str,          # 형식: ./mnt/{project_id}/{analysis_folder}/thumbnail/thum_{filename}
+        'ThumnailPath': str,          # 형식: {project_id}/{analysis_folder}/thumbnail/thum_{filename} (STORAGE_ROOT 기준)
         'SerialNumber': str,          # 카메라 시리얼 번호 (카메라 라벨)
         'DateTimeOriginal': {         # EXIF에서 추출한 촬영 시간
             '$date': str              # ISO 형식의 날짜/시간
         },
+        'CapturedAt': datetime,       # DateTimeOriginal과 같은 시각의 BSON date (범위 검색/히스토그램, 인덱스)
         'ProjectInfo': {              # 프로젝트 정보
             'ProjectName': str,       # 프로젝트 이름
             'ID': str                 # 프로젝트 ID
@@ -146,6 +178,7 @@ COLLECTION_SCHEMAS= {
         'UploadDate': datetime,       # 업로드 날짜/시간
         'Latitude': float,            # 위도 (EXIF에서 추출 가능할 경우)
         'Longitude': float,           # 경도 (EXIF에서 추출 가능할 경우)
+        'location': Dict,             # GeoJSON Point {type: 'Point', coordinates: [경도, 위도]} (좌표가 유효할 때만)
         
         # 상태 관리 필드
         'is_classified': bool,        # 분류 여부
@@ -156,6 +189,75 @@ COLLECTION_SCHEMAS= {
         'exception_status': str,      # pending/processed
         'exception_comment': str,     # 예외 처리 코멘트
         'is_favorite': bool,          # 즐겨찾기 여부
+
+        # 검색용 정규화 필드 (소문자, search_index.py에서 쓰기 시 유지)
+        'Normalized': {
+            'SerialNumber': str,
+            'BestClass': str,
+            'ProjectName': str
+        },
+    },
+    'events': {                       # 이벤트 요약 (events.py에서 images 변경 시 재계산)
+        'project_id': str,            # 프로젝트 ID (project_id + evtnum 유일)
+        'evtnum': int,                # 이벤트 번호
+        'ProjectName': str,
+        'SerialNumber': str,
+        'image_count': int,
+        'first_time': str,            # 첫 촬영 시간 (ISO 문자열)
+        'last_time': str,             # 마지막 촬영 시간 (ISO 문자열)
+        'cover': dict,                # 대표 이미지 (image_id, FileName, ThumnailPath, DateTimeOriginal 원본 값, captured_time 문자열)
+        'species': str,               # 분류된 이미지의 다수결 종
+        'max_count': int,             # 이미지별 개체 수 최댓값
+        'inspection_state': str,      # pending/partial/complete
+        'Normalized': dict,           # 검색용 소문자 필드 (SerialNumber, ProjectName, BestClass)
+        'views': List[str],           # 이미지가 있는 화면 (normal/exception/inspected)
+        'normal': dict,               # 화면별 요약 (count, cover, first_time, species, dates, statuses)
+        'exception': dict,
+        'inspected': dict,
+        'updated_at': datetime
+    },
+    'rollups': {                      # 종/프로젝트/카메라/일자별 집계 (rollups.py에서 images 변경 시 증분 갱신)
+        'project_id': str,            # 프로젝트 ID (project_id + day + species + camera 유일)
+        'species': str,               # 분류된 이미지의 BestClass (미분류는 null)
+        'camera': str,                # 카메라 시리얼 번호
+        'day': str,                   # 촬영일 YYYY-MM-DD
+        'ProjectName': str,
+        'image_count': int,
+        'individual_count': int,      # Count 합계
+        'event_count': int,           # 이미지가 있는 이벤트 수
+        'updated_at': datetime
+    },
+    'rollup_sources': {               # 이벤트별 rollups 기여분 (증분 갱신 차이 계산용)
+        'project_id': str,            # 프로젝트 ID (project_id + evtnum 유일)
+        'evtnum': int,
+        'rows': list,                 # [{project_id, species, camera, day, images, individuals}]
+        'updated_at': datetime
+    },
+    'project_counters': {             # 프로젝트별 이미지 상태 카운터 (counters.py에서 images 변경 시 증분 갱신)
+        'project_id': str,            # 프로젝트 ID (유일)
+        'total_images': int,
+        'classified_images': int,
+        'unclassified_images': int,
+        'normal_images': int,         # 분류됨 + 검수 전
+        'exception_images': int,      # 미분류 + 검수 전
+        'inspected_images': int,      # 검수 완료
+        'inspection_status': Dict[str, int],  # 검토 상태별 이미지 수 (없으면 pending)
+        'updated_at': datetime
+    },
+    'counter_states': {               # 이미지별 마지막으로 센 상태 (_id: 이미지 ID, 증분 갱신 차이 계산용)
+        'project_id': str,
+        'inspection_status': str,     # 검토 상태 (없으면 pending)
+        'total_images': int,          # 이하 0/1 (project_counters 필드와 같음)
+        'classified_images': int,
+        'unclassified_images': int,
+        'normal_images': int,
+        'exception_images': int,
+        'inspected_images': int
+    },
+    'counters': {                     # 조건별 개수 (counts.py estimated 모드)
+        'collection': str,            # 대상 컬렉션 (_id는 컬렉션 + 조건 JSON)
+        'count': int,
+        'updated_at': datetime
     },
     'projects': {
         'project_name': str,        # 프로젝트 이름 (필수)
@@ -202,6 +304,21 @@ COLLECTION_SCHEMAS= {
         'Detection_binaryData_image': Binary,  # 탐지된 이미지 바이너리
         'Detections': List,           # 탐지 결과 배열
         'Object_counts': Dict         # 객체 카운트 객체
+    },
+    'detection_cache': {
+        '_id': str,                   # {content_hash}:{model_fingerprint}:{threshold}
+        'content_hash': str,          # 이미지 바이트 SHA-256
+        'model_fingerprint': str,     # 모델 파일 해시 (앞 16자리)
+        'threshold': float,           # CONFIDENCE_THRESHOLD
+        'status': str,                # Success/Failed
+        'detections': List,           # 탐지 결과 배열 (Infos 형식)
+        'object_counts': Dict,        # 객체 카운트 객체
+        'max_confidence': float,      # 임계값 미만 포함 최고 확률
+        'image_bytes': int,           # 원본 이미지 크기
+        'size_bytes': int,            # 저장된 항목 BSON 크기 (DETECTION_CACHE_MAX_BYTES 예산)
+        'hits': int,                  # 적중 횟수
+        'created_at': datetime,
+        'last_used_at': datetime      # LRU 삭제 기준
     }
 }
 
@@ -236,7 +353,7 @@ def get_images(is_classified: bool = None, page: int = 1, per_page: int = 12) ->
             query['is_classified'] = is_classified
             
         total = db.images.count_documents(query)
-        images = list(db.images.find(query)
+        images = list(db.images.find(query, {'detection_image': 0})  # 검출 결과 이미지(Binary) 제외
                      .skip((page - 1) * per_page)
                      .limit(per_page))
                      
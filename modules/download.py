@@ -1,4 +1,4 @@
-from flask import Blueprint, send_file, request, current_app
+from flask import Blueprint, send_file, request
 from flask_jwt_extended import jwt_required
 from bson import ObjectId
 from typing import Tuple, Dict, Any, Union
@@ -7,7 +7,9 @@ import zipfile
 import io
 
 from .database import db
+from .projections import find_one_view
 from .utils.response import standard_response, handle_exception
+from .utils.storage import local_path
 from .utils.constants import MESSAGES
 
 download_bp = Blueprint('download', __name__)
@@ -17,21 +19,15 @@ download_bp = Blueprint('download', __name__)
 def download_image(image_id: str):
     """단일 이미지 다운로드 API"""
     try:
-        image = db.images.find_one({'_id': ObjectId(image_id)})
+        image = find_one_view('images', 'file_paths', {'_id': ObjectId(image_id)})
         if not image:
             return handle_exception(Exception(MESSAGES['error']['not_found']), error_type="validation_error")
         
-        relative_path = image.get('FilePath')
-        if not relative_path:
+        # 저장소 루트 기준 상대 경로를 절대 경로로 변환
+        file_path = local_path(image.get('FilePath'))
+        if not file_path:
             return handle_exception(Exception("파일 경로 정보가 없습니다"), error_type="file_error")
         
-        # 상대 경로를 절대 경로로 변환
-        if relative_path.startswith('./'):
-            relative_path = relative_path[2:]  # './' 제거
-        
-        # 애플리케이션의 루트 디렉토리를 기준으로 절대 경로 생성
-        file_path = os.path.join(current_app.root_path, relative_path)
-        
         if not os.path.isfile(file_path):
             return handle_exception(Exception(f"파일을 찾을 수 없습니다: {file_path}"), error_type="file_error")
         
@@ -62,20 +58,14 @@ def download_multiple_images() -> Union[Tuple[Dict[str, Any], int], Any]:
         memory_file = io.BytesIO()
         with zipfile.ZipFile(memory_file, 'w') as zf:
             for image_id in image_ids:
-                image = db.images.find_one({'_id': ObjectId(image_id)})
+                image = find_one_view('images', 'file_paths', {'_id': ObjectId(image_id)})
                 if not image:
                     continue
                     
-                relative_path = image.get('FilePath')
-                if not relative_path:
+                # 저장소 루트 기준 상대 경로를 절대 경로로 변환
+                file_path = local_path(image.get('FilePath'))
+                if not file_path:
                     continue
-
-                # 상대 경로를 절대 경로로 변환
-                if relative_path.startswith('./'):
-                    relative_path = relative_path[2:]  # './' 제거
-                
-                # 애플리케이션의 루트 디렉토리를 기준으로 절대 경로 생성
-                file_path = os.path.join(current_app.root_path, relative_path)
                 
                 if not os.path.isfile(file_path):
                     continue
@@ -0,0 +1,92 @@
+"""조건부 GET (약한 ETag, 304 Not Modified)
+
+ETag는 응답 본문이 아니라 요청이 의존하는 범위의 세대 번호(query_cache.store)로 만든다.
+따라서 무거운 조회를 실행하기 전에 If-None-Match를 확인할 수 있고, 바뀐 것이 없으면
+뷰를 실행하지 않고 304를 돌려준다. 세대 번호는 images 쓰기(changes.images_changed)와
+프로젝트 쓰기(query_cache.projects_changed) 때 올라간다.
+
+프로세스 내 저장소는 세대 번호를 워커끼리 공유하지 않아, 다른 워커가 처리한 쓰기 뒤에도
+304를 잘못 돌려줄 수 있다. 그래서 ETag는 기본적으로 QUERY_CACHE_REDIS_URL(공유 저장소)을
+지정했을 때만 붙인다. 워커가 하나뿐인 배포에서는 ETAGS=1로 직접 켤 수 있다 (ETAGS=0은 끔).
+"""
+import hashlib
+import json
+import os
+from functools import wraps
+from typing import Callable, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Response, request
+
+from .projections import find_one_view
+from .query_cache import GLOBAL_SCOPE, PROJECTS_SCOPE, enabled_setting, event_scope, image_scope, store
+from .utils.response import wants_ndjson
+
+ETAGS_ENABLED = enabled_setting(os.getenv('ETAGS'))
+
+ScopeFunc = Callable[..., Optional[List[str]]]
+
+
+def compute_etag(namespace: str, scopes: List[str]) -> str:
+    """세대 번호 + 쿼리 파라미터 + 응답 형식으로 만든 ETag 값 (따옴표/W/ 제외)"""
+    params = sorted(request.args.items(multi=True))
+    generations = dict(zip(scopes, store.generations(scopes)))
+    raw = json.dumps([namespace, params, wants_ndjson(), store.epoch, generations], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def conditional_get(namespace: str, scopes: ScopeFunc) -> Callable:
+    """GET 뷰에 약한 ETag를 붙이고, If-None-Match가 일치하면 뷰 실행 없이 304 반환
+
+    scopes(**view_kwargs)는 응답이 의존하는 세대 범위 목록을 돌려준다 (None이면 ETag 없이 실행).
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not ETAGS_ENABLED:
+                return view(*args, **kwargs)
+            view_scopes = scopes(**kwargs)
+            if view_scopes is None:
+                return view(*args, **kwargs)
+
+            etag = compute_etag(namespace, view_scopes)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept')
+                return response
+
+            result = view(*args, **kwargs)
+            response, status = result if isinstance(result, tuple) else (result, 200)
+            if status == 200 and isinstance(response, Response):
+                response.set_etag(etag, weak=True)
+                response.vary.add('Accept')
+            return result
+        return wrapper
+    return decorator
+
+
+def project_scopes(**_) -> List[str]:
+    """project_id로 한정된 목록은 그 프로젝트, 아니면 전체 세대"""
+    project_id = request.args.get('project_id')
+    return [project_id] if project_id else [GLOBAL_SCOPE]
+
+
+def projects_scopes(**_) -> List[str]:
+    return [PROJECTS_SCOPE]
+
+
+def image_detail_scopes(image_id: str, **_) -> Optional[List[str]]:
+    """이미지 상세: 이미지 자신 + 같은 이벤트 (related_images가 이벤트 이미지 목록을 포함)"""
+    try:
+        image = find_one_view('images', 'image_key', {'_id': ObjectId(image_id)})
+    except (InvalidId, TypeError):
+        return None
+    if not image:
+        return None
+    scopes = [image_scope(image['_id'])]
+    project_id = image.get('ProjectInfo', {}).get('ID')
+    if project_id:
+        scopes.append(event_scope(project_id, image.get('evtnum')))
+    return scopes
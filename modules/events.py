@@ -0,0 +1,379 @@
+"""이벤트(프로젝트 ID + evtnum) 요약 컬렉션
+
+group_by=evtnum 화면과 이벤트 단위 목록은 images 전체에 $group을 돌리는 대신 events 컬렉션을
+인덱스로 조회한다. 요약 문서는 changes.images_changed()가 호출될 때 변경된 이벤트만
+images에서 다시 계산해 교체한다 (이벤트당 이미지 수가 작으므로 이벤트 단위 재계산).
+요약 문서의 version은 교체할 때마다 새로 발급하며, images를 읽기 전에 본 version일 때만 교체한다.
+같은 이벤트를 동시에 다시 계산해 먼저 교체된 경우에는 images를 다시 읽어 재시도하므로,
+먼저 읽은(이전) 요약이 나중 요약을 덮지 않는다.
+
+화면(view)별 요약:
+    normal     - 분류됨 + 검수 전 (일반검수)
+    exception  - 미분류 + 검수 전 (예외검수)
+    inspected  - 검수 완료
+
+그룹 조회(group_match):
+    images     - 기본값. images를 필터한 뒤 이벤트로 묶는다 (개수/대표 이미지는 일치한 이미지 기준).
+                 이미지 단위 필터(종/날짜/예외 상태/촬영 시간)가 없으면 결과가 같으므로 events에서 조회하고,
+                 있으면 images를 집계한다 (filtered_groups)
+    any_image  - 요청 시에만. 화면 이미지 중 하나라도 필터와 일치하는 이벤트를 events에서 조회하고,
+                 개수와 대표 이미지는 화면 전체 기준이다
+
+전체 재생성:
+    python -m modules.events rebuild [--project <project_id>]
+    (events가 비어 있고 images가 있으면 서버 시작 시 자동으로 재생성한다 - rebuild_if_empty)
+"""
+import argparse
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from .changes import subscribe
+from .database import db
+from .indexes import sync_indexes
+from .search_index import normalize_value, text_condition
+from .timeline import TimeRange, event_time_condition
+from .utils.pagination import SortSpec, page_stages
+
+logger = logging.getLogger(__name__)
+
+EventKey = Tuple[str, int]
+
+VIEWS = ('normal', 'exception', 'inspected')
+
+# 요약 계산에 필요한 images 필드
+SUMMARY_PROJECTION = {
+    '_id': 1, 'FileName': 1, 'ThumnailPath': 1, 'DateTimeOriginal': 1, 'SerialNumber': 1,
+    'ProjectInfo': 1, 'evtnum': 1, 'BestClass': 1, 'Count': 1, 'exception_status': 1,
+    'is_classified': 1, 'inspection_complete': 1
+}
+
+REBUILD_BATCH = 500
+REFRESH_ATTEMPTS = 5  # 동시 갱신과 충돌했을 때 재시도 횟수
+
+GROUP_MATCH_MODES = ('images', 'any_image')
+DUPLICATE_KEY = 11000
+
+
+def event_key(doc: Dict) -> Optional[EventKey]:
+    """images 문서의 이벤트 키 (EXIF 파싱 전이라 evtnum이 없으면 None)"""
+    project_id = (doc.get('ProjectInfo') or {}).get('ID')
+    evtnum = doc.get('evtnum')
+    if project_id is None or evtnum is None:
+        return None
+    return project_id, evtnum
+
+
+def time_str(value: Any) -> Optional[str]:
+    """DateTimeOriginal({'$date': str} 또는 datetime)을 정렬 가능한 ISO 문자열로 변환"""
+    if isinstance(value, dict):
+        value = value.get('$date')
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    return value or None
+
+
+def image_view(doc: Dict) -> str:
+    """이미지가 속한 화면"""
+    if doc.get('inspection_complete'):
+        return 'inspected'
+    return 'normal' if doc.get('is_classified') else 'exception'
+
+
+def _capture_order(doc: Dict) -> Tuple[bool, str, str]:
+    """촬영 시간순 정렬 키 (시간 없는 이미지는 뒤로)"""
+    captured = time_str(doc.get('DateTimeOriginal'))
+    return captured is None, captured or '', doc.get('FileName', '')
+
+
+def _cover(doc: Dict) -> Dict:
+    """대표 이미지 (DateTimeOriginal은 저장된 값 그대로, captured_time은 ISO 문자열)"""
+    return {
+        'image_id': doc['_id'],
+        'FileName': doc.get('FileName', ''),
+        'ThumnailPath': doc.get('ThumnailPath', ''),
+        'DateTimeOriginal': doc.get('DateTimeOriginal'),
+        'captured_time': time_str(doc.get('DateTimeOriginal')),
+        'exception_status': doc.get('exception_status', 'pending')
+    }
+
+
+def _view_summary(docs: List[Dict]) -> Dict:
+    """화면별 이미지 묶음 요약 (대표 이미지는 가장 먼저 촬영된 이미지)"""
+    first = docs[0]
+    times = [t for t in (time_str(d.get('DateTimeOriginal')) for d in docs) if t]
+    return {
+        'count': len(docs),
+        'cover': _cover(first),
+        'first_time': min(times) if times else None,
+        'species': sorted({normalize_value(d['BestClass']) for d in docs if d.get('BestClass')}),
+        'dates': sorted({t[:10] for t in times}),
+        'statuses': sorted({d.get('exception_status', 'pending') for d in docs})
+    }
+
+
+def summarize_event(key: EventKey, docs: List[Dict]) -> Dict:
+    """이벤트에 속한 images 문서들로 요약 문서 생성"""
+    docs = sorted(docs, key=_capture_order)
+    first = docs[0]
+    times = [t for t in (time_str(d.get('DateTimeOriginal')) for d in docs) if t]
+    species = Counter(d['BestClass'] for d in docs if d.get('is_classified') and d.get('BestClass'))
+    consensus = species.most_common(1)[0][0] if species else None
+    inspected = sum(1 for d in docs if d.get('inspection_complete'))
+    serial_number = next((d['SerialNumber'] for d in docs if d.get('SerialNumber')), '')
+    project_name = next((d['ProjectInfo']['ProjectName'] for d in docs
+                         if (d.get('ProjectInfo') or {}).get('ProjectName')), '')
+
+    summary = {
+        'project_id': key[0],
+        'evtnum': key[1],
+        'ProjectName': project_name,
+        'SerialNumber': serial_number,
+        'image_count': len(docs),
+        'first_time': min(times) if times else None,
+        'last_time': max(times) if times else None,
+        'cover': _cover(first),
+        'species': consensus,
+        'max_count': max((d.get('Count') or 0 for d in docs), default=0),
+        'inspection_state': 'complete' if inspected == len(docs) else ('partial' if inspected else 'pending'),
+        'Normalized': {
+            'SerialNumber': normalize_value(serial_number),
+            'ProjectName': normalize_value(project_name),
+            'BestClass': normalize_value(consensus)
+        },
+        'views': [],
+        'updated_at': datetime.utcnow()
+    }
+    for view in VIEWS:
+        view_docs = [d for d in docs if image_view(d) == view]
+        if view_docs:
+            summary['views'].append(view)
+            summary[view] = _view_summary(view_docs)
+    return summary
+
+
+def keys_of(docs: Iterable[Dict]) -> List[EventKey]:
+    return sorted({key for key in (event_key(doc) for doc in docs) if key is not None})
+
+
+def _event_versions(keys: List[EventKey]) -> Dict[EventKey, Any]:
+    """현재 요약 문서의 version (문서가 없으면 키가 없음)"""
+    query = {'$or': [{'project_id': project_id, 'evtnum': evtnum} for project_id, evtnum in keys]}
+    return {
+        (event['project_id'], event['evtnum']): event.get('version')
+        for event in db.events.find(query, {'project_id': 1, 'evtnum': 1, 'version': 1})
+    }
+
+
+def _refresh_once(keys: List[EventKey]) -> List[EventKey]:
+    """요약을 한 번 다시 계산해 교체하고, 그 사이 다른 갱신이 먼저 교체한 이벤트 키를 반환"""
+    # images보다 version을 먼저 읽어야, 교체에 성공한 요약이 그 이전 갱신보다 나중 images로 만들어진다
+    versions = _event_versions(keys)
+
+    grouped: Dict[EventKey, List[Dict]] = {key: [] for key in keys}
+    query = {'$or': [{'ProjectInfo.ID': project_id, 'evtnum': evtnum} for project_id, evtnum in keys]}
+    for doc in db.images.find(query, SUMMARY_PROJECTION):
+        key = event_key(doc)
+        if key in grouped:
+            grouped[key].append(doc)
+
+    operations = []
+    written: Dict[EventKey, ObjectId] = {}
+    for key, docs in grouped.items():
+        # 문서가 없었으면 version None 조건 (그 사이 다른 갱신이 만들었으면 유일 인덱스 충돌)
+        guard = {'project_id': key[0], 'evtnum': key[1], 'version': versions.get(key)}
+        if docs:
+            written[key] = ObjectId()
+            operations.append(ReplaceOne(guard, {**summarize_event(key, docs), 'version': written[key]}, upsert=True))
+        elif key in versions:
+            operations.append(DeleteOne(guard))
+    if not operations:
+        return []
+
+    try:
+        result = db.events.bulk_write(operations, ordered=False)
+        if result.matched_count + result.upserted_count + result.deleted_count == len(operations):
+            return []
+    except BulkWriteError as e:
+        if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+            raise
+
+    # 조건이 맞지 않은 교체/삭제 확인
+    current = _event_versions([key for key in keys if key in written or key in versions])
+    return [
+        key for key in keys
+        if (key in written and current.get(key) != written[key]) or (key not in written and key in current)
+    ]
+
+
+def refresh_events(keys: Iterable[EventKey]) -> int:
+    """지정한 이벤트들의 요약을 images에서 다시 계산 (이미지가 없으면 삭제)"""
+    keys = list(keys)
+    pending = keys
+    for _ in range(REFRESH_ATTEMPTS):
+        if not pending:
+            break
+        pending = _refresh_once(pending)
+    if pending:
+        logger.warning(f"동시 갱신이 계속되어 이벤트 요약을 교체하지 못했습니다: {pending}")
+    return len(keys)
+
+
+@subscribe
+def on_images_changed(docs: List[Dict]) -> None:
+    """images 변경 시 관련 이벤트 요약 갱신"""
+    refresh_events(keys_of(docs))
+
+
+def view_query(view: str, project_id: Optional[str] = None, project_name: Optional[str] = None,
+               serial_number: Optional[str] = None, species: Optional[str] = None,
+               date: Optional[str] = None, exception_status: Optional[str] = None,
+               evtnum: Optional[int] = None, match_mode: str = 'prefix',
+               project_name_mode: str = 'exact', time_range: Optional[TimeRange] = None) -> Dict[str, Any]:
+    """화면별 이벤트 조회 조건 (종/날짜/예외 상태는 화면 요약의 값 목록 중 하나와 일치,
+    time_range는 화면별 첫 촬영 시간 범위)"""
+    query: Dict[str, Any] = {'views': view}
+    if project_id:
+        query['project_id'] = project_id
+    if project_name:
+        query['Normalized.ProjectName'] = text_condition(project_name, project_name_mode)
+    if serial_number:
+        query['Normalized.SerialNumber'] = text_condition(serial_number, match_mode)
+    if species:
+        query[f'{view}.species'] = text_condition(species, match_mode)
+    if date:
+        query[f'{view}.dates'] = date
+    if exception_status:
+        query[f'{view}.statuses'] = exception_status
+    if evtnum is not None:
+        query['evtnum'] = evtnum
+    if time_range:
+        query[f'{view}.first_time'] = event_time_condition(time_range)
+    return query
+
+
+def parse_group_match(value: Optional[str]) -> str:
+    """group_match 파라미터 해석 (기본 images: 필터한 이미지만 묶음)"""
+    mode = (value or 'images').strip().lower()
+    if mode not in GROUP_MATCH_MODES:
+        raise ValueError(f"group_match 값은 {', '.join(GROUP_MATCH_MODES)} 중 하나여야 합니다")
+    return mode
+
+
+def filtered_groups(view: str, image_query: Dict[str, Any], sort: SortSpec, page: int, per_page: int,
+                    cursor: Optional[List[Any]], with_total: bool = True) -> Tuple[List[Dict], Optional[int], bool]:
+    """조건에 맞는 images만 이벤트로 묶은 그룹 페이지 (events 요약과 같은 형태, 개수는 항상 정확)
+
+    대표 이미지는 일치한 이미지 중 가장 먼저 촬영된 이미지, first_time은 그 촬영 시간(CapturedAt)이다.
+    """
+    match = {'$match': {**image_query, 'evtnum': image_query.get('evtnum', {'$ne': None})}}
+    group_key = {'$group': {'_id': {'project_id': '$ProjectInfo.ID', 'evtnum': '$evtnum'}}}
+    pipeline = [
+        match,
+        # 촬영 시간순 (시간 없는 이미지는 뒤로)
+        {'$addFields': {'_no_time': {'$eq': [{'$ifNull': ['$CapturedAt', None]}, None]}}},
+        {'$sort': {'_no_time': 1, 'CapturedAt': 1, 'FileName': 1}},
+        {'$group': {
+            **group_key['$group'],
+            'count': {'$sum': 1},
+            'first_time': {'$min': '$CapturedAt'},
+            'SerialNumber': {'$first': '$SerialNumber'},
+            'ProjectName': {'$first': '$ProjectInfo.ProjectName'},
+            'cover': {'$first': {
+                'image_id': '$_id',
+                'FileName': '$FileName',
+                'ThumnailPath': '$ThumnailPath',
+                'DateTimeOriginal': '$DateTimeOriginal',
+                'exception_status': {'$ifNull': ['$exception_status', 'pending']}
+            }}
+        }},
+        {'$project': {
+            '_id': 0,
+            'project_id': '$_id.project_id',
+            'evtnum': '$_id.evtnum',
+            'SerialNumber': {'$ifNull': ['$SerialNumber', '']},
+            'ProjectName': {'$ifNull': ['$ProjectName', '']},
+            view: {'count': '$count', 'cover': '$cover', 'first_time': '$first_time'}
+        }},
+        *page_stages(sort, page, per_page, cursor)
+    ]
+    groups = list(db.images.aggregate(pipeline, allowDiskUse=True))
+    for group in groups:
+        cover = group[view]['cover']
+        cover['captured_time'] = time_str(cover.get('DateTimeOriginal'))
+
+    total = None
+    if with_total:
+        rows = list(db.images.aggregate([match, group_key, {'$count': 'total'}], allowDiskUse=True))
+        total = rows[0]['total'] if rows else 0
+    return groups, total, False
+
+
+def event_image_query(events: List[Dict]) -> Dict[str, Any]:
+    """이벤트 목록에 속한 images 조회 조건 (이벤트 페이지의 이미지만 가져올 때 사용)"""
+    return {'$or': [{'ProjectInfo.ID': e['project_id'], 'evtnum': e['evtnum']} for e in events]}
+
+
+def image_event_keys(project_id: Optional[str] = None) -> List[EventKey]:
+    """images에 있는 모든(또는 프로젝트의) 이벤트 키"""
+    match: Dict[str, Any] = {'evtnum': {'$ne': None}}
+    if project_id:
+        match['ProjectInfo.ID'] = project_id
+    return [
+        (row['_id']['project_id'], row['_id']['evtnum'])
+        for row in db.images.aggregate([
+            {'$match': match},
+            {'$group': {'_id': {'project_id': '$ProjectInfo.ID', 'evtnum': '$evtnum'}}}
+        ], allowDiskUse=True)
+        if row['_id'].get('project_id') is not None
+    ]
+
+
+def rebuild_events(project_id: Optional[str] = None) -> int:
+    """images 기준으로 events 전체(또는 프로젝트 단위) 재생성"""
+    keys = image_event_keys(project_id)
+
+    rebuilt = 0
+    for start in range(0, len(keys), REBUILD_BATCH):
+        rebuilt += refresh_events(keys[start:start + REBUILD_BATCH])
+
+    # 더 이상 이미지가 없는 이벤트 정리
+    live = set(keys)
+    stale_query = {'project_id': project_id} if project_id else {}
+    stale = [
+        e['_id'] for e in db.events.find(stale_query, {'project_id': 1, 'evtnum': 1})
+        if (e['project_id'], e['evtnum']) not in live
+    ]
+    if stale:
+        db.events.delete_many({'_id': {'$in': stale}})
+    return rebuilt
+
+
+def rebuild_if_empty() -> int:
+    """기존 배포 업그레이드: events가 비어 있고 images가 있으면 전체 재생성 (서버 시작 시 호출)"""
+    if db.events.find_one({}, {'_id': 1}) or not db.images.find_one({}, {'_id': 1}):
+        return 0
+    logger.info("events 컬렉션이 비어 있어 이벤트 요약을 재생성합니다")
+    rebuilt = rebuild_events()
+    logger.info(f"이벤트 요약 재생성 완료: {rebuilt}개 이벤트")
+    return rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description='이벤트 요약 컬렉션 관리')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--project', help='특정 프로젝트만 재생성')
+    args = parser.parse_args()
+
+    sync_indexes(['events', 'images'])
+    rebuilt = rebuild_events(args.project)
+    print(f"이벤트 요약 재생성 완료: {rebuilt}개 이벤트")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ from bson import ObjectId
 from datetime import datetime
 from typing import Tuple, Dict, Any, List
 
+from .changes import images_changed
 from .database import db
 from .utils.response import standard_response, handle_exception
 from .utils.constants import MESSAGES, VALID_EXCEPTION_STATUSES
@@ -43,6 +44,7 @@ def update_exception_status(image_id: str) -> Tuple[Dict[str, Any], int]:
                 error_type="validation_error"
             )
 
+        images_changed([image_id])
         return standard_response("예외 상태가 업데이트되었습니다")
 
     except Exception as e:
@@ -84,6 +86,7 @@ def bulk_update_exception() -> Tuple[Dict[str, Any], int]:
                 }
             }
         )
+        images_changed(object_ids)
 
         return standard_response(
             f"{result.modified_count}개의 이미지가 업데이트되었습니다",
@@ -3,9 +3,13 @@ import subprocess
 import json
 import os
 import logging
+import time
 from typing import List, Dict, Optional
 from .database import db
+from .metrics import EXIF_BATCH
+from .projections import find_one_view, project_stage
 from .utils.response import handle_exception
+from .utils.storage import storage_path
 from .utils.constants import EXIFTOOL_PATH, GROUP_TIME_LIMIT
 
 # 로깅 설정
@@ -125,9 +129,9 @@ def create_exif_data(metadata: Dict, image_path: str, project_info: Dict,
         filename = f"{date_obj.strftime('%Y%m%d-%H%M%S')}s1{ext}"  
         thumbnail_filename = f"thum_{filename}"  
 
-        # 경로 변환 (Flask 호환)
-        file_path = f"/mnt/{project_id}/{analysis_folder}/source/{filename}".replace("\\", "/")
-        thumbnail_path = f"/mnt/{project_id}/{analysis_folder}/thumbnail/{thumbnail_filename}".replace("\\", "/")
+        # 저장소 루트 기준 상대 경로
+        file_path = storage_path(project_id, analysis_folder, "source", filename)
+        thumbnail_path = storage_path(project_id, analysis_folder, "thumbnail", thumbnail_filename)
 
         return {
             "FileName": filename,  
@@ -161,6 +165,7 @@ def get_all_evtnum_first_images(project_id: str, serial_number: str) -> List[Dic
     pipeline = [
         {"$match": {"ProjectInfo.ID": project_id, "SerialNumber": serial_number}},  # SerialNumber 필터 적용
         {"$sort": {"evtnum": 1, "DateTimeOriginal": 1}},
+        project_stage('event_first_images'),  # 비교에 쓰는 필드만 그룹으로 전달
         {"$group": {
             "_id": "$evtnum",
             "first_image": {"$first": "$$ROOT"}
@@ -213,7 +218,8 @@ def get_next_evtnum(project_id: str) -> int:
     """
     해당 프로젝트에서 가장 큰 evtnum을 찾아 +1을 반환.
     """
-    last_entry = db.images.find_one(
+    last_entry = find_one_view(
+        'images', 'image_evtnum',
         {"ProjectInfo.ID": project_id},  # 🔍 SerialNumber 고려 X, 프로젝트 전체 기준
         sort=[("evtnum", -1)]  # evtnum이 가장 큰 값을 가져옴
     )
@@ -285,7 +291,9 @@ def process_images(image_paths: List[str], project_info: Dict,
             logger.info(f"Processing batch {batch_idx + 1}/{len(image_batches)} with {len(image_batch)} images")
 
             #  EXIF 데이터 추출
+            started = time.perf_counter()
             metadata_list = parse_exif_data_batch(image_batch)
+            EXIF_BATCH.observe(time.perf_counter() - started)
             if not metadata_list:
                 logger.error(f" No EXIF data could be extracted from batch {batch_idx + 1}")
                 continue
@@ -0,0 +1,153 @@
+"""카메라 트랩 위치 (GeoJSON location 필드, 2dsphere 인덱스)
+
+EXIF의 Latitude/Longitude(십진 도)를 GeoJSON Point로 location 필드에 함께 저장하고
+(indexes.py의 location 2dsphere 인덱스), 검색의 bbox/near 필터와 지도 격자 집계에 사용한다.
+
+기존 문서 백필:
+    python -m modules.geo backfill
+"""
+import argparse
+from typing import Any, Dict, List, Optional
+
+from .database import db
+from .indexes import sync_indexes
+
+EARTH_RADIUS_M = 6378100  # $centerSphere 라디안 변환용 (MongoDB 문서 기준)
+GRID_CELLS_PER_TILE = 4  # 지도 타일 한 칸(줌 기준 경도 폭)을 나누는 격자 수
+MAX_CLUSTER_CELLS = 2000  # 한 번에 돌려주는 최대 격자 수
+MAX_ZOOM = 22
+
+
+def geo_point(latitude: Any, longitude: Any) -> Optional[Dict[str, Any]]:
+    """위도/경도를 GeoJSON Point로 변환 (값이 없거나 범위를 벗어나거나 0,0이면 None)"""
+    try:
+        lat = float(latitude)
+        lon = float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180) or (lat == 0 and lon == 0):
+        return None
+    return {'type': 'Point', 'coordinates': [lon, lat]}
+
+
+def with_location(fields: Dict) -> Dict:
+    """Latitude/Longitude를 포함한 $set 딕셔너리에 location을 추가해 반환
+
+    좌표가 유효하지 않으면 location을 넣지 않는다 (2dsphere 인덱스는 필드가 없는 문서를 건너뜀).
+    """
+    point = geo_point(fields.get('Latitude'), fields.get('Longitude'))
+    if point is None:
+        return fields
+    return {**fields, 'location': point}
+
+
+def _floats(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError(f"{name} 값이 올바르지 않습니다")
+    if len(numbers) != count:
+        raise ValueError(f"{name} 값은 쉼표로 구분한 숫자 {count}개여야 합니다")
+    return numbers
+
+
+def parse_bbox(value: str) -> List[float]:
+    """bbox 파라미터 (서경,남위,동경,북위 = minLon,minLat,maxLon,maxLat)"""
+    min_lon, min_lat, max_lon, max_lat = _floats(value, 4, 'bbox')
+    if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError("bbox 범위가 올바르지 않습니다 (minLon,minLat,maxLon,maxLat)")
+    return [min_lon, min_lat, max_lon, max_lat]
+
+
+def bbox_condition(bbox: List[float]) -> Dict[str, Any]:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+    return {'$geoWithin': {'$geometry': {'type': 'Polygon', 'coordinates': [ring]}}}
+
+
+def near_condition(value: str) -> Dict[str, Any]:
+    """near 파라미터 (경도,위도,반경m) - 집계/개수에서도 쓸 수 있도록 $nearSphere 대신 $centerSphere 사용"""
+    lon, lat, radius = _floats(value, 3, 'near')
+    if geo_point(lat, lon) is None or radius <= 0:
+        raise ValueError("near 값이 올바르지 않습니다 (경도,위도,반경m)")
+    return {'$geoWithin': {'$centerSphere': [[lon, lat], radius / EARTH_RADIUS_M]}}
+
+
+def geo_filter(bbox: Optional[str], near: Optional[str]) -> Dict[str, Any]:
+    """검색 조건에 합칠 위치 조건 (bbox와 near를 함께 주면 둘 다 만족)"""
+    conditions = []
+    if bbox:
+        conditions.append(bbox_condition(parse_bbox(bbox)))
+    if near:
+        conditions.append(near_condition(near))
+    if not conditions:
+        return {}
+    if len(conditions) == 1:
+        return {'location': conditions[0]}
+    return {'$and': [{'location': condition} for condition in conditions]}
+
+
+def cell_size(zoom: int) -> float:
+    """줌 레벨별 격자 한 변 크기 (도)"""
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom 값은 0~{MAX_ZOOM} 사이여야 합니다")
+    return 360 / (2 ** zoom) / GRID_CELLS_PER_TILE
+
+
+def cluster_pipeline(query: Dict[str, Any], zoom: int) -> List[Dict[str, Any]]:
+    """위치를 격자 단위로 묶어 격자별 개수와 중심점을 구하는 집계"""
+    size = cell_size(zoom)
+    lon = {'$arrayElemAt': ['$location.coordinates', 0]}
+    lat = {'$arrayElemAt': ['$location.coordinates', 1]}
+    return [
+        {'$match': {**query, 'location': query.get('location', {'$exists': True})}},
+        {'$group': {
+            '_id': {'x': {'$floor': {'$divide': [lon, size]}}, 'y': {'$floor': {'$divide': [lat, size]}}},
+            'count': {'$sum': 1},
+            'lon': {'$avg': lon},
+            'lat': {'$avg': lat}
+        }},
+        {'$sort': {'count': -1}},
+        {'$limit': MAX_CLUSTER_CELLS}
+    ]
+
+
+def cluster_cells(rows: List[Dict[str, Any]], zoom: int) -> List[Dict[str, Any]]:
+    """집계 결과를 응답용 격자 목록으로 변환 (bounds: minLon,minLat,maxLon,maxLat)"""
+    size = cell_size(zoom)
+    return [{
+        'count': row['count'],
+        'lon': round(row['lon'], 6),
+        'lat': round(row['lat'], 6),
+        'bounds': [row['_id']['x'] * size, row['_id']['y'] * size,
+                   (row['_id']['x'] + 1) * size, (row['_id']['y'] + 1) * size]
+    } for row in rows]
+
+
+def backfill_locations(only_missing: bool = True) -> int:
+    """Latitude/Longitude가 유효한 기존 문서에 location 채우기 (서버 측 파이프라인 업데이트)"""
+    query: Dict[str, Any] = {
+        'Latitude': {'$type': 'number', '$gte': -90, '$lte': 90},
+        'Longitude': {'$type': 'number', '$gte': -180, '$lte': 180},
+        '$nor': [{'Latitude': 0, 'Longitude': 0}]
+    }
+    if only_missing:
+        query['location'] = {'$exists': False}
+    result = db.images.update_many(query, [{
+        '$set': {'location': {'type': 'Point', 'coordinates': ['$Longitude', '$Latitude']}}
+    }])
+    return result.modified_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='카메라 트랩 위치 필드 관리')
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--all', action='store_true', help='이미 location이 있는 문서도 다시 계산')
+    args = parser.parse_args()
+
+    sync_indexes(['images'])
+    print(f"location 백필 완료: {backfill_locations(only_missing=not args.all)}개 문서")
+
+
+if __name__ == '__main__':
+    main()
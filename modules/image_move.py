@@ -5,8 +5,12 @@ from typing import Tuple, Dict, Any, List
 import os
 import shutil
 
+from .changes import images_changed
 from .database import db
+from .projections import find_one_view
+from .search_index import with_normalized
 from .utils.response import standard_response, handle_exception
+from .utils.storage import local_path, storage_path
 from .utils.constants import MESSAGES
 
 image_move_bp = Blueprint('image_move', __name__)
@@ -37,10 +41,11 @@ def move_images() -> Tuple[Dict[str, Any], int]:
             
         moved_count = 0
         failed_moves: List[Dict[str, Any]] = []
+        moved_docs: List[Dict[str, Any]] = []  # 이동 전 문서 (원래 이벤트 요약 갱신용)
         
         for image_id in image_ids:
             try:
-                image = db.images.find_one({'_id': ObjectId(image_id)})
+                image = find_one_view('images', 'file_paths', {'_id': ObjectId(image_id)})
                 if not image:
                     failed_moves.append({
                         'image_id': image_id,
@@ -49,37 +54,39 @@ def move_images() -> Tuple[Dict[str, Any], int]:
                     continue
                     
                 # 파일 이동 처리
-                old_path = image['FilePath']
-                new_path = f"./mnt/{target_project_id}/{target_folder}/source/{os.path.basename(old_path)}"
+                old_path = local_path(image['FilePath'])
+                file_name = os.path.basename(old_path or image['FilePath'])
+                new_path = storage_path(target_project_id, target_folder, "source", file_name)
                 
                 # 썸네일 경로도 업데이트
-                old_thumb = image['ThumnailPath']
-                new_thumb = f"./mnt/{target_project_id}/{target_folder}/thumbnail/thum_{os.path.basename(old_path)}"
+                old_thumb = local_path(image['ThumnailPath'])
+                new_thumb = storage_path(target_project_id, target_folder, "thumbnail", f"thum_{file_name}")
                 
                 # 물리적 파일 이동
-                if os.path.exists(old_path):
-                    os.makedirs(os.path.dirname(new_path), exist_ok=True)
-                    shutil.move(old_path, new_path)
+                if old_path and os.path.exists(old_path):
+                    os.makedirs(os.path.dirname(local_path(new_path)), exist_ok=True)
+                    shutil.move(old_path, local_path(new_path))
                     
-                if os.path.exists(old_thumb):
-                    os.makedirs(os.path.dirname(new_thumb), exist_ok=True)
-                    shutil.move(old_thumb, new_thumb)
+                if old_thumb and os.path.exists(old_thumb):
+                    os.makedirs(os.path.dirname(local_path(new_thumb)), exist_ok=True)
+                    shutil.move(old_thumb, local_path(new_thumb))
                 
                 # DB 업데이트
                 db.images.update_one(
                     {'_id': ObjectId(image_id)},
                     {
-                        '$set': {
+                        '$set': with_normalized({
                             'FilePath': new_path,
                             'ThumnailPath': new_thumb,
                             'ProjectInfo.ProjectName': target_project['project_name'],
                             'ProjectInfo.ID': str(target_project['_id']),
                             'AnalysisFolder': target_folder
-                        }
+                        })
                     }
                 )
                 
                 moved_count += 1
+                moved_docs.append(image)
                 
             except Exception as e:
                 failed_moves.append({
@@ -87,6 +94,8 @@ def move_images() -> Tuple[Dict[str, Any], int]:
                     'reason': str(e)
                 })
         
+        images_changed([doc['_id'] for doc in moved_docs], before=moved_docs)
+
         return standard_response(
             f"{moved_count}개의 이미지가 이동되었습니다",
             data={
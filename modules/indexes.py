@@ -0,0 +1,309 @@
+"""images / events 컬렉션 인덱스 선언과 동기화, 쿼리 형태 기반 인덱스 분석
+
+선언된 인덱스는 앱 시작 시 sync_indexes()로 없는 것만 생성한다 (같은 키의 인덱스가 이미 있으면
+이름이 달라도 그대로 둠). 선언에 없는 인덱스는 --prune을 줄 때만 삭제한다.
+
+    python -m modules.indexes sync [--prune]
+    python -m modules.indexes advise --shapes shapes.jsonl [--apply]
+
+advise는 QUERY_SHAPE_LOG로 기록한 쿼리 형태마다 explain(executionStats)을 실행해
+docsExamined/nReturned 비율을 구하고, ESR(일치 -> 정렬 -> 범위) 순서로 복합 인덱스를 제안한 뒤
+제안 인덱스를 임시로 만들어 다시 explain한 결과(전/후 비율)를 보고한다.
+"""
+import argparse
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT
+from pymongo.errors import OperationFailure
+
+from .database import db
+from .utils.query_shapes import load_shapes
+
+IndexKeys = List[Tuple[str, int]]
+
+# 초, counters(counts.py estimated 모드) 항목 보관 기간. 조건마다 한 문서가 생기므로 TTL로 정리
+# (COUNT_ESTIMATE_MAX_AGE보다 오래된 항목은 어차피 다시 세므로 그보다 길 필요는 없음)
+COUNT_ESTIMATE_EXPIRE = int(os.getenv('COUNT_ESTIMATE_EXPIRE', '3600'))
+
+# 컬렉션별 선언 인덱스 (이름: 키)
+DECLARED_INDEXES: Dict[str, Dict[str, IndexKeys]] = {
+    'images': {
+        # 목록/검색: 상태 플래그 일치 + _id 키셋 정렬
+        'flags_id': [('is_classified', ASCENDING), ('inspection_complete', ASCENDING), ('_id', ASCENDING)],
+        'inspected_id': [('inspection_complete', ASCENDING), ('_id', ASCENDING)],
+        'project_flags_id': [('ProjectInfo.ID', ASCENDING), ('is_classified', ASCENDING),
+                             ('inspection_complete', ASCENDING), ('_id', ASCENDING)],
+        # 이벤트 단위 조회 (이벤트 요약 재계산, 이벤트 페이지 이미지, 다음 evtnum)
+        'project_event_file': [('ProjectInfo.ID', ASCENDING), ('evtnum', ASCENDING), ('FileName', ASCENDING)],
+        # EXIF 파싱 시 카메라별 이벤트 첫 이미지 조회
+        'project_serial_event_time': [('ProjectInfo.ID', ASCENDING), ('SerialNumber', ASCENDING),
+                                      ('evtnum', ASCENDING), ('DateTimeOriginal', ASCENDING)],
+        'original_filename': [('OriginalFileName', ASCENDING)],
+        # 촬영 시간 범위 검색(start/end, date)과 히스토그램 - timeline.CapturedAt
+        'captured_at': [('CapturedAt', DESCENDING)],
+        # 검색용 정규화 필드 (search_index.NORMALIZED_FIELDS)
+        'normalized_serial': [('Normalized.SerialNumber', ASCENDING)],
+        'normalized_class': [('Normalized.BestClass', ASCENDING)],
+        'normalized_project': [('Normalized.ProjectName', ASCENDING)],
+        # init_db 기본 인덱스 중 계속 쓰는 것
+        'file_name': [('FileName', ASCENDING)],
+        'inspection_status': [('inspection_status', ASCENDING)],
+        'evtnum': [('evtnum', ASCENDING)],
+        # 상태 요약의 최근 24시간 분류/검수 수
+        'classification_date': [('classification_date', ASCENDING)],
+        'inspection_date': [('inspection_date', ASCENDING)],
+        # 통합 검색 (/search/all) 텍스트 인덱스 - 컬렉션당 하나만 가능
+        'full_text': [('ProjectInfo.ProjectName', TEXT), ('BestClass', TEXT), ('SerialNumber', TEXT),
+                      ('exception_comment', TEXT), ('ProjectText', TEXT)],
+        # 지도 조회 (bbox/near 필터, 격자 집계) - geo.py
+        'location': [('location', GEOSPHERE)]
+    },
+    'events': {
+        'event_key': [('project_id', ASCENDING), ('evtnum', ASCENDING)],
+        'view_normal_time': [('views', ASCENDING), ('normal.first_time', DESCENDING),
+                             ('project_id', ASCENDING), ('evtnum', ASCENDING)],
+        'view_evtnum': [('views', ASCENDING), ('evtnum', ASCENDING), ('project_id', ASCENDING)],
+        'view_inspected_time': [('views', ASCENDING), ('inspected.first_time', DESCENDING),
+                                ('project_id', ASCENDING), ('evtnum', ASCENDING)]
+    },
+    'rollups': {
+        # 행 키 (증분 갱신 upsert) + 프로젝트별 기간 리포트
+        'rollup_key': [('project_id', ASCENDING), ('day', ASCENDING), ('species', ASCENDING),
+                       ('camera', ASCENDING)],
+        # 전체 프로젝트 기간 리포트
+        'day': [('day', ASCENDING)]
+    },
+    'rollup_sources': {
+        'source_key': [('project_id', ASCENDING), ('evtnum', ASCENDING)]
+    },
+    'project_counters': {
+        'project_key': [('project_id', ASCENDING)]
+    },
+    'counter_states': {
+        # 프로젝트 단위 reconcile
+        'project_id': [('project_id', ASCENDING)]
+    },
+    'counters': {
+        # 오래된 조건별 개수 자동 삭제 (TTL)
+        'updated_at_ttl': [('updated_at', ASCENDING)]
+    }
+}
+
+UNIQUE_INDEXES = {('events', 'event_key'), ('rollups', 'rollup_key'), ('rollup_sources', 'source_key'),
+                  ('project_counters', 'project_key')}
+
+# 인덱스별 추가 옵션 (텍스트 인덱스: 형태소 분석 없이 공백/구두점 단위 토큰, 필드 가중치)
+INDEX_OPTIONS: Dict[Tuple[str, str], Dict[str, Any]] = {
+    ('images', 'full_text'): {
+        'default_language': 'none',
+        'weights': {'BestClass': 10, 'SerialNumber': 8, 'ProjectInfo.ProjectName': 5,
+                    'exception_comment': 3, 'ProjectText': 1}
+    },
+    ('counters', 'updated_at_ttl'): {'expireAfterSeconds': COUNT_ESTIMATE_EXPIRE}
+}
+
+# 범위 조건으로 취급하는 연산자 (ESR의 R)
+RANGE_OPERATORS = {'$gt', '$gte', '$lt', '$lte', '$ne', '$nin', '$regex', '$exists', '$type'}
+
+
+def _key_tuple(keys: Iterable) -> Tuple[Tuple[str, Any], ...]:
+    keys = tuple((field, int(direction) if isinstance(direction, float) else direction)
+                 for field, direction in keys)
+    if any(direction == TEXT for _, direction in keys):
+        # 텍스트 인덱스는 필드 순서와 무관하므로 정렬해 비교
+        return tuple(sorted(keys))
+    return keys
+
+
+def _index_key(info: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """index_information() 항목의 키 (텍스트 인덱스는 _fts 대신 weights의 필드로 복원)"""
+    if 'weights' in info:
+        return _key_tuple((field, TEXT) for field in info['weights'])
+    return _key_tuple(info['key'])
+
+
+def existing_indexes(collection: str) -> Dict[Tuple, str]:
+    """현재 인덱스 (키 -> 이름)"""
+    return {
+        _index_key(info): name
+        for name, info in db[collection].index_information().items()
+    }
+
+
+def sync_indexes(collections: Optional[Iterable[str]] = None, prune: bool = False) -> Dict[str, List[str]]:
+    """선언 인덱스 동기화 (없는 인덱스만 생성, prune이면 선언에 없는 인덱스 삭제)"""
+    report: Dict[str, List[str]] = {'created': [], 'existing': [], 'dropped': []}
+    for collection in collections or DECLARED_INDEXES:
+        current = existing_indexes(collection)
+        declared = {_key_tuple(keys): name for name, keys in DECLARED_INDEXES[collection].items()}
+
+        for key, name in declared.items():
+            if key in current:
+                report['existing'].append(f"{collection}.{current[key]}")
+                continue
+            db[collection].create_index(list(key), name=name, unique=(collection, name) in UNIQUE_INDEXES,
+                                        **INDEX_OPTIONS.get((collection, name), {}))
+            report['created'].append(f"{collection}.{name}")
+
+        if prune:
+            for key, name in current.items():
+                if name != '_id_' and key not in declared:
+                    db[collection].drop_index(name)
+                    report['dropped'].append(f"{collection}.{name}")
+    return report
+
+
+def _merge_fields(filter_doc: Dict, equality: List[str], ranges: List[str]) -> None:
+    """조건 문서에서 일치/범위 필드 수집 ($and는 합치고, $or는 첫 분기의 필드를 사용)"""
+    for field, condition in filter_doc.items():
+        if field == '$and':
+            for clause in condition:
+                _merge_fields(clause, equality, ranges)
+        elif field == '$or':
+            if condition:
+                _merge_fields(condition[0], equality, ranges)
+        elif field.startswith('$'):
+            continue
+        elif isinstance(condition, dict) and any(op in RANGE_OPERATORS for op in condition):
+            if field not in ranges:
+                ranges.append(field)
+        elif field not in equality:
+            equality.append(field)
+
+
+def shape_filter_and_sort(sample: Dict) -> Tuple[Dict, IndexKeys]:
+    """샘플 명령의 조건과 정렬 (aggregate는 첫 $match와 그 뒤 첫 $sort)"""
+    if 'find' in sample:
+        return sample.get('filter', {}), list((sample.get('sort') or {}).items())
+    if 'count' in sample:
+        return sample.get('query', {}), []
+    filter_doc: Dict = {}
+    sort: IndexKeys = []
+    for stage in sample.get('pipeline', []):
+        if '$match' in stage and not filter_doc:
+            filter_doc = stage['$match']
+        elif '$sort' in stage:
+            sort = list(stage['$sort'].items())
+            break
+        elif '$match' not in stage:
+            break
+    return filter_doc, sort
+
+
+def propose_index(filter_doc: Dict, sort: IndexKeys) -> IndexKeys:
+    """ESR 규칙으로 복합 인덱스 제안"""
+    equality: List[str] = []
+    ranges: List[str] = []
+    _merge_fields(filter_doc, equality, ranges)
+    keys: IndexKeys = [(field, ASCENDING) for field in equality]
+    used = set(equality)
+    for field, direction in sort:
+        if field not in used:
+            keys.append((field, int(direction)))
+            used.add(field)
+    keys.extend((field, ASCENDING) for field in ranges if field not in used)
+    return keys
+
+
+def _find_stats(explain: Any) -> Optional[Dict]:
+    """explain 결과에서 executionStats 찾기 (aggregate는 $cursor 단계 안에 있음)"""
+    if isinstance(explain, dict):
+        if 'executionStats' in explain:
+            return explain['executionStats']
+        for value in explain.values():
+            found = _find_stats(value)
+            if found:
+                return found
+    elif isinstance(explain, list):
+        for value in explain:
+            found = _find_stats(value)
+            if found:
+                return found
+    return None
+
+
+def explain_ratio(sample: Dict) -> Dict[str, Any]:
+    """샘플 명령의 docsExamined / nReturned"""
+    if 'aggregate' in sample:
+        sample = {**sample, 'cursor': {}}
+    result = db.command({'explain': sample, 'verbosity': 'executionStats'})
+    stats = _find_stats(result) or {}
+    examined = stats.get('totalDocsExamined', 0)
+    returned = stats.get('nReturned', 0)
+    return {
+        'docs_examined': examined,
+        'keys_examined': stats.get('totalKeysExamined', 0),
+        'returned': returned,
+        'ratio': round(examined / max(returned, 1), 2)
+    }
+
+
+def advise(shapes: List[Dict], apply: bool = False) -> List[Dict[str, Any]]:
+    """기록된 쿼리 형태별 인덱스 제안과 전/후 explain 비교"""
+    report = []
+    for shape in shapes:
+        sample = shape['sample']
+        collection = shape['collection']
+        filter_doc, sort = shape_filter_and_sort(sample)
+        proposed = propose_index(filter_doc, sort)
+        entry = {
+            'endpoint': shape.get('endpoint'),
+            'collection': collection,
+            'command': shape['command'],
+            'shape': shape['shape'],
+            'proposed': proposed,
+            'before': explain_ratio(sample)
+        }
+
+        if not proposed or _key_tuple(proposed) in existing_indexes(collection):
+            entry['after'] = entry['before']
+            entry['action'] = 'covered' if proposed else 'no_filter'
+        else:
+            try:
+                name = db[collection].create_index(proposed)
+            except OperationFailure as e:
+                entry['after'] = entry['before']
+                entry['action'] = f'create_failed: {e}'
+            else:
+                entry['after'] = explain_ratio(sample)
+                entry['action'] = 'created' if apply else 'trial'
+                if not apply:
+                    db[collection].drop_index(name)
+        report.append(entry)
+    return report
+
+
+def print_advice(report: List[Dict[str, Any]]) -> None:
+    for entry in report:
+        keys = ', '.join(f"{field}:{direction}" for field, direction in entry['proposed']) or '-'
+        print(f"[{entry['endpoint'] or '-'}] {entry['collection']}.{entry['command']} {entry['shape']}")
+        print(f"    제안 인덱스: {{{keys}}} ({entry['action']})")
+        print(f"    docsExamined/nReturned: {entry['before']['ratio']} -> {entry['after']['ratio']} "
+              f"(docs {entry['before']['docs_examined']} -> {entry['after']['docs_examined']}, "
+              f"반환 {entry['after']['returned']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='인덱스 동기화 / 쿼리 형태 기반 인덱스 분석')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help='선언된 인덱스 동기화')
+    sync_parser.add_argument('--prune', action='store_true', help='선언에 없는 인덱스 삭제')
+
+    advise_parser = subparsers.add_parser('advise', help='기록된 쿼리 형태 explain 및 인덱스 제안')
+    advise_parser.add_argument('--shapes', required=True, help='QUERY_SHAPE_LOG로 기록한 파일')
+    advise_parser.add_argument('--collection', help='특정 컬렉션만 분석')
+    advise_parser.add_argument('--apply', action='store_true', help='제안 인덱스를 지우지 않고 유지')
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        report = sync_indexes(prune=args.prune)
+        for action in ('created', 'existing', 'dropped'):
+            print(f"{action}: {', '.join(report[action]) or '-'}")
+    else:
+        print_advice(advise(load_shapes(args.shapes, args.collection), apply=args.apply))
+
+
+if __name__ == '__main__':
+    main()
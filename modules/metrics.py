@@ -0,0 +1,143 @@
+"""Prometheus 메트릭 (/metrics)
+
+요청 수/지연 시간(블루프린트/엔드포인트별), 처리 중인 요청 수, MongoDB 명령 지연 시간,
+객체 검출 대기 이미지 수와 단계별 시간, EXIF 배치 시간, 썸네일 생성 시간을 노출한다.
+요청 계측은 Flask before/after/teardown_request 훅, MongoDB는 pymongo 명령 리스너로 붙인다.
+
+prometheus_client 패키지가 없으면 모든 계측은 아무 일도 하지 않고 /metrics는 503을 돌려준다.
+워커 프로세스가 여러 개면 PROMETHEUS_MULTIPROC_DIR(빈 디렉터리)을 지정해야 워커 합계가 나온다.
+METRICS_TOKEN을 지정하면 /metrics에 Authorization: Bearer <토큰>이 필요하다.
+"""
+import logging
+import os
+import time
+from typing import Any, List
+
+from flask import Blueprint, Flask, Response, g, request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus_client가 없으면 계측 생략
+    prometheus_client = None
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+# 구간 경계 (초)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BATCH_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+class _NoopMetric:
+    """prometheus_client가 없을 때 쓰는 빈 메트릭"""
+
+    def labels(self, *args: Any, **kwargs: Any) -> '_NoopMetric':
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+
+def _metric(kind: str, name: str, documentation: str, labelnames: tuple = (), **kwargs: Any) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    factory = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}[kind]
+    return factory(name, documentation, labelnames, **kwargs)
+
+
+REQUESTS = _metric('counter', 'http_requests_total', 'HTTP 요청 수',
+                   ('blueprint', 'endpoint', 'method', 'status'))
+REQUEST_LATENCY = _metric('histogram', 'http_request_duration_seconds', 'HTTP 요청 처리 시간',
+                          ('blueprint', 'endpoint', 'method'), buckets=REQUEST_BUCKETS)
+REQUESTS_IN_PROGRESS = _metric('gauge', 'http_requests_in_progress', '처리 중인 HTTP 요청 수',
+                               multiprocess_mode='livesum')
+MONGO_LATENCY = _metric('histogram', 'mongodb_command_duration_seconds', 'MongoDB 명령 처리 시간',
+                        ('command',), buckets=MONGO_BUCKETS)
+MONGO_FAILURES = _metric('counter', 'mongodb_command_failures_total', '실패한 MongoDB 명령 수', ('command',))
+DETECTION_QUEUE = _metric('gauge', 'detection_queue_images', '검출 작업에서 처리를 기다리는 이미지 수',
+                          multiprocess_mode='livesum')
+DETECTION_STAGE = _metric('histogram', 'detection_stage_seconds', '객체 검출 단계별 처리 시간 (이미지당)',
+                          ('stage',), buckets=STAGE_BUCKETS)
+EXIF_BATCH = _metric('histogram', 'exif_batch_seconds', 'ExifTool 배치 처리 시간', buckets=BATCH_BUCKETS)
+THUMBNAIL = _metric('histogram', 'thumbnail_seconds', '썸네일 생성 시간', buckets=STAGE_BUCKETS)
+
+
+def _before_request() -> None:
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_PROGRESS.inc()
+
+
+def _after_request(response: Response) -> Response:
+    started = g.get('metrics_started')
+    if started is not None:
+        # 404 등 라우트가 없는 요청은 한 라벨로 모음 (라벨 값 수 제한)
+        blueprint = request.blueprint or ''
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+
+def _teardown_request(_error: Any) -> None:
+    if g.pop('metrics_started', None) is not None:
+        REQUESTS_IN_PROGRESS.dec()
+
+
+def init_metrics(app: Flask) -> None:
+    """요청 계측 훅과 /metrics 라우트 등록"""
+    if prometheus_client is None:
+        logger.warning("prometheus_client 패키지가 없어 메트릭을 수집하지 않습니다")
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(metrics_bp)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """명령별 처리 시간 기록 (드라이버가 잰 duration_micros 사용)"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_LATENCY.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(event.command_name).inc()
+
+
+def mongo_listeners() -> List[monitoring.CommandListener]:
+    """MongoClient에 넘길 리스너 목록 (prometheus_client가 없으면 빈 목록)"""
+    return [MongoMetricsListener()] if prometheus_client is not None else []
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics() -> Response:
+    """Prometheus 수집 엔드포인트"""
+    if prometheus_client is None:
+        return Response("prometheus_client 패키지가 설치되어 있지 않습니다\n", status=503, mimetype='text/plain')
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return Response(status=401)
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,80 @@
+"""images 경로 필드를 저장소 루트 기준 상대 경로로 이전
+
+이전 버전은 FilePath/ThumnailPath에 절대 경로(C:\\...\\backend\\mnt\\..., ./mnt/...)를 저장했다.
+utils/storage.relative_path()와 같은 규칙으로 바꿔 저장하고, 바뀐 이미지는 images_changed()로
+알려 이벤트 요약의 대표 이미지 경로와 검색 캐시도 함께 갱신한다.
+
+    python -m modules.path_migration migrate [--dry-run]
+"""
+import argparse
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+from . import events, query_cache  # noqa: F401 - images_changed 리스너 등록
+from .changes import images_changed
+from .database import db
+from .utils.storage import STORAGE_ROOT, relative_path
+
+PATH_FIELDS = ('FilePath', 'ThumnailPath')
+MIGRATION_BATCH = 1000
+
+
+def path_updates(doc: Dict) -> Dict[str, str]:
+    """상대 경로로 바꿔야 하는 필드 (변환할 수 없는 경로는 그대로 둠)"""
+    updates = {}
+    for field in PATH_FIELDS:
+        value = doc.get(field)
+        relative = relative_path(value)
+        if value and relative and relative != value:
+            updates[field] = relative
+    return updates
+
+
+def _flush(operations: List[UpdateOne], image_ids: List) -> None:
+    if operations:
+        db.images.bulk_write(operations, ordered=False)
+        images_changed(image_ids)
+
+
+def migrate_paths(dry_run: bool = False) -> Dict[str, int]:
+    """모든 images 문서의 경로 필드 이전 (결과: 검사/변경/변환 불가 문서 수)"""
+    stats = {'scanned': 0, 'migrated': 0, 'unresolved': 0}
+    operations: List[UpdateOne] = []
+    image_ids: List = []
+
+    for doc in db.images.find({}, {field: 1 for field in PATH_FIELDS}):
+        stats['scanned'] += 1
+        if any(doc.get(field) and relative_path(doc[field]) is None for field in PATH_FIELDS):
+            stats['unresolved'] += 1
+        updates = path_updates(doc)
+        if not updates:
+            continue
+        stats['migrated'] += 1
+        if dry_run:
+            continue
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': updates}))
+        image_ids.append(doc['_id'])
+        if len(operations) >= MIGRATION_BATCH:
+            _flush(operations, image_ids)
+            operations, image_ids = [], []
+
+    if not dry_run:
+        _flush(operations, image_ids)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='images 경로 필드 이전')
+    parser.add_argument('command', choices=['migrate'])
+    parser.add_argument('--dry-run', action='store_true', help='변경 없이 대상 문서 수만 확인')
+    args = parser.parse_args()
+
+    stats = migrate_paths(dry_run=args.dry_run)
+    action = '변경 대상' if args.dry_run else '변경'
+    print(f"저장소 루트: {STORAGE_ROOT}")
+    print(f"검사 {stats['scanned']}개, {action} {stats['migrated']}개, 변환 불가 {stats['unresolved']}개")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,11 @@ from datetime import datetime
 from bson import ObjectId
 from typing import Tuple, Dict, Any, List
 import json
+from .changes import images_changed, snapshot
 from .database import db
+from .etags import conditional_get, projects_scopes
+from .query_cache import projects_changed
+from .search_index import sync_project_text
 from .utils.response import standard_response, handle_exception, pagination_meta
 from .utils.constants import MESSAGES, PROJECT_STATUSES, PER_PAGE_DEFAULT
 
@@ -12,6 +16,7 @@ project_bp = Blueprint('project', __name__)
 
 @project_bp.route('/project', methods=['GET'])
 @jwt_required()
+@conditional_get('projects', projects_scopes)
 def get_projects() -> Tuple[Dict[str, Any], int]:
     """프로젝트 목록 조회 API"""
     try:
@@ -148,6 +153,7 @@ def create_project() -> Tuple[Dict[str, Any], int]:
         }
 
         result = db.projects.insert_one(project)
+        projects_changed()
         project['_id'] = str(result.inserted_id)
 
         # 날짜 및 시간 포맷 변환
@@ -245,6 +251,11 @@ def update_project(project_id: str) -> Tuple[Dict[str, Any], int]:
                 error_type="db_error"
             )
         print(f"[9] 업데이트된 프로젝트 조회 성공")
+
+        # 통합 검색용 주소/메모 사본 갱신
+        if 'address' in update_data or 'memo' in update_data:
+            sync_project_text(updated_project)
+        projects_changed(project_id)
             
         # ObjectId를 문자열로 변환
         updated_project['_id'] = str(updated_project['_id'])
@@ -273,6 +284,7 @@ def delete_project(project_id: str) -> Tuple[Dict[str, Any], int]:
     """프로젝트 삭제 API"""
     try:
         result = db.projects.delete_one({'_id': ObjectId(project_id)})
+        projects_changed()
         
         if result.deleted_count == 0:
             return handle_exception(
@@ -281,7 +293,10 @@ def delete_project(project_id: str) -> Tuple[Dict[str, Any], int]:
             )
             
         # 관련된 이미지들도 삭제
-        db.images.delete_many({'ProjectInfo.ProjectName': project_id})
+        image_query = {'ProjectInfo.ProjectName': project_id}
+        deleted_docs = snapshot(query=image_query)
+        db.images.delete_many(image_query)
+        images_changed(before=deleted_docs)
         
         return standard_response("프로젝트가 삭제되었습니다")
         
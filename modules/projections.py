@@ -0,0 +1,88 @@
+"""화면(view)별 조회 필드 목록
+
+목록/상세 응답은 여기 선언된 필드만 읽는다. images와 detect_images 문서에는 검출 결과 이미지
+(detection_image Binary)가 들어 있어, 필드 지정 없이 읽으면 화면에 쓰지 않는 수백 KB를
+문서마다 가져오게 된다. 새 응답 필드를 추가할 때는 해당 view의 필드도 함께 추가한다.
+응답에 쓰지 않는 필드를 읽거나 쓰는 필드가 빠지면 tests/test_projections.py가 실패한다.
+"""
+from typing import Any, Dict, Optional
+
+from pymongo.cursor import Cursor
+
+from .database import db
+
+VIEW_FIELDS = {
+    # images - 검색 (search.py)
+    'search_normal': ('_id', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'SerialNumber',
+                      'ProjectInfo.ProjectName', 'ProjectInfo.ID', 'evtnum'),
+    # is_classified는 검색 조건(False)이 응답 기본값과 같아 읽지 않음
+    'search_exception': ('_id', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'SerialNumber',
+                         'ProjectInfo.ProjectName', 'ProjectInfo.ID', 'exception_status', 'evtnum',
+                         'Latitude', 'Longitude', 'Accuracy'),
+    'search_inspection': ('_id', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'SerialNumber', 'BestClass',
+                          'ProjectInfo.ProjectName', 'ProjectInfo.ID', 'Count', 'evtnum',
+                          'inspection_complete', 'Latitude', 'Longitude', 'Accuracy'),
+    'search_all': ('_id', 'score', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'SerialNumber', 'BestClass',
+                   'ProjectInfo.ProjectName', 'ProjectInfo.ID', 'evtnum', 'is_classified', 'inspection_complete',
+                   'exception_status', 'exception_comment'),
+
+    # images - 목록 (classification.py)
+    'inspected_event_images': ('_id', 'FileName', 'FilePath', 'ThumnailPath', 'UploadDate',
+                               'ProjectInfo.ID', 'evtnum'),
+    'normal_inspection': ('_id', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'ProjectInfo.ID',
+                          'ProjectInfo.ProjectName', 'SerialNumber', 'evtnum', 'exception_status'),
+    'exception_inspection': ('_id', 'FileName', 'ThumnailPath', 'DateTimeOriginal', 'ProjectInfo.ID',
+                             'ProjectInfo.ProjectName', 'SerialNumber', 'exception_status', 'evtnum'),
+    'classified_list': ('_id', 'ThumnailPath', 'BestClass', 'evtnum', 'DateTimeOriginal', 'ProjectInfo.ID',
+                        'ProjectInfo.ProjectName'),
+
+    # images - 상세
+    'classified_detail': ('_id', 'FileName', 'FilePath', 'ThumnailPath', 'ProjectInfo', 'DateTimeOriginal',
+                          'UploadDate', 'Latitude', 'Longitude', 'SerialNumber', 'evtnum', 'AI_processed',
+                          'is_classified', 'inspection_status', 'inspection_complete', 'exception_status',
+                          'exception_comment', 'is_favorite'),
+    'related_images': ('_id', 'FileName', 'ThumnailPath', 'ProjectInfo', 'evtnum'),
+
+    # images - 파일 처리 (삭제/이동/다운로드, 이벤트 요약 갱신용 키 포함)
+    'file_paths': ('_id', 'FileName', 'FilePath', 'ThumnailPath', 'ProjectInfo', 'evtnum'),
+    'image_key': ('_id', 'ProjectInfo', 'evtnum'),
+
+    # images - EXIF 파싱 (이벤트 번호 부여)
+    'event_first_images': ('_id', 'evtnum', 'DateTimeOriginal'),
+    'image_evtnum': ('_id', 'evtnum'),
+
+    # detect_images
+    'detection_summary': ('Image_id', 'BestClass', 'Infos'),
+    'detection_detail': ('BestClass', 'Count', 'Accuracy', 'bbox', 'new_bbox'),
+    'detection_lookup': ('BestClass', 'Count', 'Accuracy', 'Latitude', 'Longitude', 'AI_processed'),
+
+    # events - 그룹 목록 (화면별 요약만)
+    'normal_groups': ('project_id', 'evtnum', 'SerialNumber', 'ProjectName', 'normal'),
+    'exception_groups': ('project_id', 'evtnum', 'SerialNumber', 'ProjectName', 'exception'),
+    'inspected_groups': ('project_id', 'evtnum', 'SerialNumber', 'ProjectName', 'inspected'),
+    'event_keys': ('project_id', 'evtnum')
+}
+
+
+def projection(view: str) -> Dict[str, int]:
+    """view의 find 프로젝션 (_id는 목록에 있을 때만 포함)"""
+    fields = VIEW_FIELDS[view]
+    result = {field: 1 for field in fields}
+    if '_id' not in fields:
+        result['_id'] = 0
+    return result
+
+
+def project_stage(view: str) -> Dict[str, Any]:
+    """aggregate용 $project 단계"""
+    return {'$project': projection(view)}
+
+
+def find_view(collection: str, view: str, query: Dict[str, Any], **kwargs) -> Cursor:
+    """view 필드만 읽는 find"""
+    return db[collection].find(query, projection(view), **kwargs)
+
+
+def find_one_view(collection: str, view: str, query: Dict[str, Any], **kwargs) -> Optional[Dict]:
+    """view 필드만 읽는 find_one"""
+    return db[collection].find_one(query, projection(view), **kwargs)
@@ -0,0 +1,226 @@
+"""검색/목록 응답 캐시 (쓰기 발생 시 세대 번호로 무효화)
+
+같은 필터로 페이지를 오가는 요청이 반복되므로, 정규화한 쿼리 파라미터 + 세대 번호를 키로
+응답 본문을 TTL 동안 보관한다. images 쓰기(changes.images_changed)가 일어나면 해당 프로젝트와
+전체('*') 세대 번호를 올리므로, 이전 세대로 만든 캐시 키는 다시 조회되지 않는다.
+
+- project_id로 한정된 요청: (전체 세대 대신) 그 프로젝트 세대만 키에 포함
+- 그 외 요청: 전체 세대를 키에 포함 (모든 쓰기가 전체 세대를 올림)
+
+같은 세대 번호는 조건부 GET(etags.py)의 ETag 계산에도 쓰인다. 이미지 쓰기는 이미지별('image:<id>')과
+이벤트별('event:<프로젝트>:<evtnum>') 세대도 올리고, 프로젝트 쓰기는 'projects' 세대를 올린다.
+
+QUERY_CACHE_REDIS_URL로 Redis 호환 저장소를 지정하면 캐시와 세대 번호를 워커끼리 공유한다.
+지정하지 않으면 프로세스 내 LRU를 쓰는데, 이때는 세대 번호도 워커마다 따로라 다른 워커가 처리한
+쓰기로 무효화되지 않는다. 그래서 응답 캐시(QUERY_CACHE)와 ETag(etags.ETAGS)는 기본적으로
+공유 저장소가 있을 때만 켜진다. 워커가 하나뿐인 배포에서는 QUERY_CACHE=1 / ETAGS=1로 직접 켤 수 있다.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, request
+
+from . import events  # noqa: F401 - 이벤트 요약 갱신 리스너가 세대 증가보다 먼저 실행되도록 먼저 등록
+from .changes import subscribe
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '2000'))
+QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', '60'))  # 초
+QUERY_CACHE_REDIS_URL = os.getenv('QUERY_CACHE_REDIS_URL')
+
+GLOBAL_SCOPE = '*'
+PROJECTS_SCOPE = 'projects'
+
+CachedBody = Tuple[bytes, str]  # (응답 본문, mimetype)
+
+
+class LocalStore:
+    """프로세스 내 LRU + TTL 저장소"""
+
+    shared = False  # 세대 번호를 워커끼리 공유하지 않음
+
+    def __init__(self, max_entries: int):
+        # 재시작하면 세대 번호가 0부터 다시 시작하므로, 세대 번호를 밖에 내보낼 때(ETag) 함께 쓰는 구분값
+        self.epoch = uuid.uuid4().hex[:8]
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, CachedBody]]' = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedBody, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generations(self, scopes: List[str]) -> List[int]:
+        with self._lock:
+            return [self._generations.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes: Iterable[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisStore:
+    """Redis 호환 저장소 (캐시 항목은 TTL 키, 세대 번호는 INCR 카운터)"""
+
+    PREFIX = 'query_cache:'
+    epoch = ''  # 세대 번호가 저장소에 유지됨
+    shared = True
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        raw = self._redis.get(self.PREFIX + key)
+        if raw is None:
+            return None
+        mimetype, _, body = raw.partition(b'\n')
+        return body, mimetype.decode()
+
+    def set(self, key: str, value: CachedBody, ttl: int) -> None:
+        body, mimetype = value
+        self._redis.setex(self.PREFIX + key, ttl, mimetype.encode() + b'\n' + body)
+
+    def generations(self, scopes: List[str]) -> List[int]:
+        values = self._redis.mget([f'{self.PREFIX}gen:{scope}' for scope in scopes])
+        return [int(value or 0) for value in values]
+
+    def bump(self, scopes: Iterable[str]) -> None:
+        pipe = self._redis.pipeline()
+        for scope in scopes:
+            pipe.incr(f'{self.PREFIX}gen:{scope}')
+        pipe.execute()
+
+    def clear(self) -> None:
+        for key in self._redis.scan_iter(match=self.PREFIX + '*'):
+            self._redis.delete(key)
+
+
+def _create_store():
+    if QUERY_CACHE_REDIS_URL:
+        try:
+            return RedisStore(QUERY_CACHE_REDIS_URL)
+        except ImportError:
+            logger.warning("redis 패키지가 없어 프로세스 내 쿼리 캐시를 사용합니다")
+    return LocalStore(QUERY_CACHE_MAX_ENTRIES)
+
+
+store = _create_store()
+
+
+def enabled_setting(value: Optional[str]) -> bool:
+    """캐시/ETag 켜기 설정 해석 ('1' 켬, '0' 끔, 지정하지 않으면 공유 저장소일 때만 켬)"""
+    if value in ('0', '1'):
+        return value == '1'
+    return store.shared
+
+
+QUERY_CACHE_ENABLED = enabled_setting(os.getenv('QUERY_CACHE'))
+
+
+def request_scopes() -> List[str]:
+    """요청이 의존하는 세대 범위 (project_id로 한정되면 그 프로젝트만)"""
+    project_id = request.args.get('project_id')
+    return [project_id] if project_id else [GLOBAL_SCOPE]
+
+
+def cache_key(namespace: str, scopes: List[str]) -> str:
+    """정규화한 쿼리 파라미터(이름순 정렬) + 세대 번호로 캐시 키 생성"""
+    params = sorted(request.args.items(multi=True))
+    generations = dict(zip(scopes, store.generations(scopes)))
+    raw = json.dumps([namespace, params, generations], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cached_query(namespace: str, ttl: int = QUERY_CACHE_TTL) -> Callable:
+    """GET 목록/검색 뷰의 200 응답을 캐시하는 데코레이터 (jwt_required 아래에 둠)"""
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not QUERY_CACHE_ENABLED:
+                return view(*args, **kwargs)
+
+            try:
+                key = cache_key(namespace, request_scopes())
+                hit = store.get(key)
+            except Exception as e:
+                # 캐시 저장소 장애 시 캐시 없이 조회
+                logger.error(f"쿼리 캐시 조회 실패: {str(e)}")
+                return view(*args, **kwargs)
+            if hit is not None:
+                body, mimetype = hit
+                return Response(body, status=200, mimetype=mimetype)
+
+            result = view(*args, **kwargs)
+            response, status = result if isinstance(result, tuple) else (result, 200)
+            if status == 200 and isinstance(response, Response) and not response.is_streamed:
+                try:
+                    store.set(key, (response.get_data(), response.mimetype), ttl)
+                except Exception as e:
+                    logger.error(f"쿼리 캐시 저장 실패: {str(e)}")
+            return result
+        return wrapper
+    return decorator
+
+
+def image_scope(image_id) -> str:
+    return f"image:{image_id}"
+
+
+def event_scope(project_id, evtnum) -> str:
+    return f"event:{project_id}:{evtnum}"
+
+
+def projects_changed(project_id: Optional[str] = None) -> None:
+    """projects 컬렉션 쓰기 후 호출 (프로젝트 목록 ETag 무효화)
+
+    project_id를 주면 그 프로젝트 images에 복사된 값(ProjectText 등)이 바뀐 것으로 보고
+    프로젝트/전체 세대도 올린다.
+    """
+    scopes = [PROJECTS_SCOPE]
+    if project_id:
+        scopes += [str(project_id), GLOBAL_SCOPE]
+    store.bump(scopes)
+
+
+@subscribe
+def on_images_changed(docs: List[Dict]) -> None:
+    """images 변경 시 변경 전후 프로젝트/이벤트/이미지의 세대 증가"""
+    scopes = {GLOBAL_SCOPE}
+    for doc in docs:
+        project_id = doc.get('ProjectInfo', {}).get('ID')
+        scopes.add(image_scope(doc['_id']))
+        if project_id:
+            scopes.add(str(project_id))
+            scopes.add(event_scope(project_id, doc.get('evtnum')))
+    store.bump(scopes)
@@ -0,0 +1,263 @@
+"""종/프로젝트/카메라/일자별 집계(rollup) 컬렉션
+
+리포트는 images 원본 대신 rollups 행(프로젝트, 종, 카메라, 촬영일 -> 이미지 수, 개체 수, 이벤트 수)을
+읽는다. 이벤트 요약과 같이 changes.images_changed()가 호출되면 바뀐 이벤트만 다시 계산한다.
+
+이벤트별 기여분(이벤트 이미지로 만든 행 목록)을 rollup_sources에 저장해 두고, 새 기여분으로
+원자적으로 교체하면서 받은 이전 기여분과의 차이만 rollups에 $inc로 반영한다. 같은 이벤트를 동시에
+갱신해도 교체 순서대로 차이가 이어지므로 합계가 어긋나지 않는다.
+
+    종(species): 분류된 이미지의 BestClass (미분류 이미지는 null)
+    이벤트 수: 그 행에 이미지가 있는 이벤트 수 (주 단위 합산 시 여러 날에 걸친 이벤트는 날마다 셈)
+
+전체 재생성 (백필, 집계가 어긋났을 때):
+    python -m modules.rollups rebuild [--project <project_id>]
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from pymongo import ReturnDocument, UpdateOne
+
+from .changes import subscribe
+from .database import db
+from .events import EventKey, event_key, image_event_keys, keys_of, time_str
+from .indexes import sync_indexes
+from .utils.response import handle_exception, standard_response
+
+rollup_bp = Blueprint('rollups', __name__)
+
+RowKey = Tuple[str, Optional[str], str, str]  # (project_id, species, camera, day)
+
+# 기여분 계산에 필요한 images 필드
+ROLLUP_PROJECTION = {
+    '_id': 0, 'ProjectInfo': 1, 'evtnum': 1, 'BestClass': 1, 'is_classified': 1,
+    'SerialNumber': 1, 'Count': 1, 'DateTimeOriginal': 1
+}
+
+REBUILD_BATCH = 500
+REPORT_PERIODS = ('day', 'week')
+REPORT_MAX_ROWS = 10000
+
+
+def row_key(doc: Dict) -> Optional[RowKey]:
+    """images 문서가 더해지는 rollup 행 키 (촬영 시간이 없으면 None)"""
+    captured = time_str(doc.get('DateTimeOriginal'))
+    if not captured:
+        return None
+    species = doc.get('BestClass') if doc.get('is_classified') else None
+    return doc['ProjectInfo']['ID'], species or None, doc.get('SerialNumber') or '', captured[:10]
+
+
+def contribution(docs: List[Dict]) -> Dict[RowKey, Dict[str, int]]:
+    """이벤트 이미지들의 행별 이미지 수/개체 수"""
+    rows: Dict[RowKey, Dict[str, int]] = defaultdict(lambda: {'images': 0, 'individuals': 0})
+    for doc in docs:
+        key = row_key(doc)
+        if key is None:
+            continue
+        rows[key]['images'] += 1
+        rows[key]['individuals'] += doc.get('Count') or 0
+    return rows
+
+
+def _stored_rows(rows: Dict[RowKey, Dict[str, int]]) -> List[Dict[str, Any]]:
+    return [
+        {'project_id': key[0], 'species': key[1], 'camera': key[2], 'day': key[3], **counts}
+        for key, counts in rows.items()
+    ]
+
+
+def _loaded_rows(source: Optional[Dict]) -> Dict[RowKey, Dict[str, int]]:
+    if not source:
+        return {}
+    return {
+        (row['project_id'], row['species'], row['camera'], row['day']):
+            {'images': row['images'], 'individuals': row['individuals']}
+        for row in source.get('rows', [])
+    }
+
+
+def _swap_source(key: EventKey, rows: Dict[RowKey, Dict[str, int]]) -> Dict[RowKey, Dict[str, int]]:
+    """이벤트 기여분을 새 값으로 교체하고 이전 값을 반환 (원자적)"""
+    selector = {'project_id': key[0], 'evtnum': key[1]}
+    if not rows:
+        return _loaded_rows(db.rollup_sources.find_one_and_delete(selector))
+    previous = db.rollup_sources.find_one_and_replace(
+        selector,
+        {**selector, 'rows': _stored_rows(rows), 'updated_at': datetime.utcnow()},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    return _loaded_rows(previous)
+
+
+def refresh_rollups(keys: Iterable[EventKey]) -> int:
+    """지정한 이벤트들의 기여분을 다시 계산해 rollups에 차이만 반영 (변경된 행 수 반환)"""
+    keys = list(keys)
+    if not keys:
+        return 0
+
+    grouped: Dict[EventKey, List[Dict]] = {key: [] for key in keys}
+    names: Dict[str, str] = {}
+    query = {'$or': [{'ProjectInfo.ID': project_id, 'evtnum': evtnum} for project_id, evtnum in keys]}
+    for doc in db.images.find(query, ROLLUP_PROJECTION):
+        key = event_key(doc)
+        if key in grouped:
+            grouped[key].append(doc)
+            names[key[0]] = doc['ProjectInfo'].get('ProjectName', '')
+
+    deltas: Dict[RowKey, Dict[str, int]] = defaultdict(lambda: {'images': 0, 'individuals': 0, 'events': 0})
+    for key, docs in grouped.items():
+        new = contribution(docs)
+        old = _swap_source(key, new)
+        for row in set(new) | set(old):
+            before = old.get(row, {'images': 0, 'individuals': 0})
+            after = new.get(row, {'images': 0, 'individuals': 0})
+            deltas[row]['images'] += after['images'] - before['images']
+            deltas[row]['individuals'] += after['individuals'] - before['individuals']
+            deltas[row]['events'] += (row in new) - (row in old)
+
+    now = datetime.utcnow()
+    operations = []
+    touched = []
+    for row, delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        selector = {'project_id': row[0], 'species': row[1], 'camera': row[2], 'day': row[3]}
+        update: Dict[str, Any] = {
+            '$inc': {'image_count': delta['images'], 'individual_count': delta['individuals'],
+                     'event_count': delta['events']},
+            '$set': {'updated_at': now}
+        }
+        if row[0] in names:
+            update['$set']['ProjectName'] = names[row[0]]
+        operations.append(UpdateOne(selector, update, upsert=True))
+        touched.append(selector)
+
+    if operations:
+        db.rollups.bulk_write(operations, ordered=False)
+        # 이미지가 모두 빠진 행 정리
+        db.rollups.delete_many({'$or': touched, 'image_count': {'$lte': 0}})
+    return len(operations)
+
+
+@subscribe
+def on_images_changed(docs: List[Dict]) -> None:
+    """images 변경 시 관련 이벤트의 rollup 기여분 갱신"""
+    refresh_rollups(keys_of(docs))
+
+
+def rebuild_rollups(project_id: Optional[str] = None) -> int:
+    """rollups/rollup_sources를 비우고 images 기준으로 다시 계산"""
+    scope = {'project_id': project_id} if project_id else {}
+    db.rollups.delete_many(scope)
+    db.rollup_sources.delete_many(scope)
+
+    keys = image_event_keys(project_id)
+    for start in range(0, len(keys), REBUILD_BATCH):
+        refresh_rollups(keys[start:start + REBUILD_BATCH])
+    return len(keys)
+
+
+def _parse_day(value: Optional[str], name: str) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"{name} 형식이 올바르지 않습니다 (YYYY-MM-DD)")
+
+
+def report_pipeline(match: Dict[str, Any], period: str, by_camera: bool) -> List[Dict[str, Any]]:
+    """rollups 행을 기간(일/주) x 프로젝트 x 종 (x 카메라) 단위로 합산"""
+    if period == 'week':
+        period_expr: Any = {'$dateToString': {'format': '%Y-%m-%d', 'date': {
+            '$dateTrunc': {'date': {'$dateFromString': {'dateString': '$day'}}, 'unit': 'week',
+                           'startOfWeek': 'monday'}
+        }}}
+    else:
+        period_expr = '$day'
+    group_id = {'period': period_expr, 'project_id': '$project_id', 'species': '$species'}
+    if by_camera:
+        group_id['camera'] = '$camera'
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': group_id,
+            'project_name': {'$last': '$ProjectName'},
+            'image_count': {'$sum': '$image_count'},
+            'individual_count': {'$sum': '$individual_count'},
+            'event_count': {'$sum': '$event_count'}
+        }},
+        {'$sort': {'_id.period': 1, '_id.project_id': 1, '_id.species': 1}},
+        {'$limit': REPORT_MAX_ROWS}
+    ]
+
+
+@rollup_bp.route('/reports/rollups', methods=['GET'])
+@jwt_required()
+def get_rollup_report():
+    """종/프로젝트/기간별 검출 리포트 API (rollups 컬렉션 조회)"""
+    try:
+        period = request.args.get('period', 'day')
+        by_camera = request.args.get('by_camera', 'false').lower() in ('1', 'true', 'yes')
+        start = _parse_day(request.args.get('start'), 'start')
+        end = _parse_day(request.args.get('end'), 'end')  # 포함
+        if period not in REPORT_PERIODS:
+            return standard_response("period 값은 day 또는 week여야 합니다.", status=400)
+
+        match: Dict[str, Any] = {}
+        for param, field in (('project_id', 'project_id'), ('species', 'species'), ('camera', 'camera')):
+            value = request.args.get(param)
+            if value:
+                match[field] = value
+        if start or end:
+            match['day'] = {**({'$gte': start} if start else {}), **({'$lte': end} if end else {})}
+
+        rows = [{
+            'period': row['_id']['period'],
+            'project_id': row['_id']['project_id'],
+            'project_name': row.get('project_name') or '',
+            'species': row['_id']['species'],
+            **({'camera': row['_id']['camera']} if by_camera else {}),
+            'image_count': row['image_count'],
+            'individual_count': row['individual_count'],
+            'event_count': row['event_count']
+        } for row in db.rollups.aggregate(report_pipeline(match, period, by_camera))]
+
+        return jsonify({
+            "status": 200,
+            "message": "리포트 조회 성공",
+            "period": period,
+            "truncated": len(rows) >= REPORT_MAX_ROWS,
+            "totals": {
+                "image_count": sum(row['image_count'] for row in rows),
+                "individual_count": sum(row['individual_count'] for row in rows),
+                "event_count": sum(row['event_count'] for row in rows)
+            },
+            "rows": rows
+        }), 200
+
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
+    except Exception as e:
+        return handle_exception(e, error_type="db_error")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='종/프로젝트/일자별 집계 컬렉션 관리')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--project', help='특정 프로젝트만 재생성')
+    args = parser.parse_args()
+
+    sync_indexes(['rollups', 'rollup_sources', 'images'])
+    rebuilt = rebuild_rollups(args.project)
+    print(f"집계 재생성 완료: {rebuilt}개 이벤트")
+
+
+if __name__ == '__main__':
+    main()
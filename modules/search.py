@@ -3,7 +3,16 @@ from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 from bson import json_util
 from .database import db
+from .events import filtered_groups, parse_group_match, view_query
+from .timeline import histogram, parse_histogram, parse_time_range, time_range_condition
+from .geo import MAX_CLUSTER_CELLS, cell_size, cluster_cells, cluster_pipeline, geo_filter
+from .projections import project_stage, projection
+from .query_cache import cached_query
+from .search_index import MATCH_MODES, text_filter
 from .utils.response import standard_response, handle_exception, pagination_meta
+from .utils.storage import image_url
+from .counts import count_total, page_with_total, parse_count_mode
+from .utils.pagination import next_cursor, page_stages, parse_cursor, parse_with_total, total_pages
 from .utils.constants import (
     PER_PAGE_DEFAULT, 
     MESSAGES,
@@ -14,19 +23,11 @@ import logging as logger
 import traceback
 search_bp = Blueprint('search', __name__)
 
-def normalize_path(path):
-    """MongoDB에서 가져온 Windows 경로를 Flask에서 정상적으로 제공할 수 있는 경로로 변환"""
-    if not path:
-        return ""
-
-    # Windows 경로 정리
-    path = path.replace("\\", "/")  # 역슬래시를 슬래시로 변환
-    path = path.replace("C:/Users/User/Documents/backend/mnt", "/mnt")  # 경로 변환
-    path = path.replace("C:\\Users\\User\\Documents\\backend\\mnt", "/mnt")  # 경로 변환
-    path = path.replace("backend/modules/mnt", "/mnt")  # modules/mnt 잘못된 경로 제거
-
-    return path
-
+# 키셋(커서) 페이지네이션 정렬 기준 (마지막 키는 항상 유일해야 함)
+IMAGE_SORT = [('_id', 1)]
+NORMAL_GROUP_SORT = [('normal.first_time', -1), ('project_id', 1), ('evtnum', 1)]
+EXCEPTION_GROUP_SORT = [('evtnum', -1), ('project_id', -1)]
+INSPECTION_GROUP_SORT = [('inspected.first_time', -1), ('project_id', 1), ('evtnum', 1)]
 
 from datetime import datetime, timedelta
 
@@ -34,6 +35,7 @@ import traceback  # 예외 로그 출력
 
 @search_bp.route('/inspection/normal/search', methods=['GET'])
 @jwt_required()
+@cached_query('search_normal')
 def search_normal_inspection():
     """일반 검수 이미지 검색 및 그룹 조회 API"""
     try:
@@ -47,17 +49,25 @@ def search_normal_inspection():
 
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', PER_PAGE_DEFAULT))
+        match_mode = request.args.get('match', 'prefix')  # serial_number/species 비교 방식 (prefix/exact)
+        cursor_token = request.args.get('cursor')  # 있으면 page 대신 키셋 페이지네이션
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 개수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
+        histogram_unit = parse_histogram(request.args.get('histogram'))  # hour/day/week 구간별 개수
+        group_match = parse_group_match(request.args.get('group_match'))  # images(기본)/any_image
+        if match_mode not in MATCH_MODES:
+            return standard_response("match 값은 prefix 또는 exact여야 합니다.", status=400)
 
         query = {'is_classified': True, 'inspection_complete': False}
 
         if project_id:
             query['ProjectInfo.ID'] = project_id
         if project_name:
-            query['ProjectInfo.ProjectName'] = {'$regex': f'^{project_name}$', '$options': 'i'}
+            query.update(text_filter('ProjectInfo.ProjectName', project_name, 'exact'))
         if serial_number:
-            query['SerialNumber'] = {'$regex': serial_number, '$options': 'i'}
+            query.update(text_filter('SerialNumber', serial_number, match_mode))
         if species:
-            query['BestClass'] = {'$regex': species, '$options': 'i'}
+            query.update(text_filter('BestClass', species, match_mode))
         if evtnum:
             try:
                 query['evtnum'] = int(evtnum)
@@ -67,61 +77,55 @@ def search_normal_inspection():
                 return jsonify({"status": 400, "message": "evtnum 값이 올바르지 않습니다."}), 400
 
 
-        if date:
-            try:
-                start_date = datetime.strptime(date, "%Y-%m-%d")
-                end_date = start_date + timedelta(days=1)
-                query['DateTimeOriginal'] = {'$gte': start_date, '$lt': end_date}
-            except ValueError:
-                return standard_response("날짜 형식이 올바르지 않습니다.", status=400)
+        # 촬영 시간 범위 (start/end, 또는 date 하루)
+        time_range = parse_time_range(request.args.get('start'), request.args.get('end'), date)
+        if time_range:
+            query.update(time_range_condition(time_range))
 
-        # 그룹 조회 (group_by=evtnum)
+        # 위치 조건 (bbox=minLon,minLat,maxLon,maxLat / near=경도,위도,반경m)
+        location_filter = geo_filter(request.args.get('bbox'), request.args.get('near'))
+
+        # 그룹 조회 (group_by=evtnum) - 이벤트 요약 컬렉션에서 조회
         if group_by == "evtnum":
-            pipeline = [
-                {'$match': query},
-                {'$group': {
-                    '_id': {
-                        'evtnum': '$evtnum',
-                        'project_id': '$ProjectInfo.ID'
-                    },
-                    'first_image': {'$first': '$$ROOT'},
-                    'count': {'$sum': 1}
-                }},
-                {'$sort': {'first_image.DateTimeOriginal': -1}},
-                {'$skip': (page - 1) * per_page},
-                {'$limit': per_page}
-            ]
-
-            count_pipeline = [
-                {'$match': query},
-                {'$group': {
-                    '_id': {
-                        'evtnum': '$evtnum',
-                        'project_id': '$ProjectInfo.ID'
-                    }
-                }},
-                {'$count': 'total'}
-            ]
-
-            groups = list(db.images.aggregate(pipeline))
-            count_result = list(db.images.aggregate(count_pipeline))
-            total = count_result[0]['total'] if count_result else 0
+            if location_filter:
+                return standard_response("bbox/near는 그룹 조회(group_by=evtnum)에서 지원하지 않습니다.", status=400)
+            cursor = parse_cursor(cursor_token, NORMAL_GROUP_SORT)
+            event_query = view_query(
+                'normal', project_id=project_id, project_name=project_name,
+                serial_number=serial_number, species=species, date=date,
+                evtnum=query.get('evtnum'), match_mode=match_mode,
+                time_range=None if date else time_range
+            )
+            if group_match == 'images' and (species or time_range):
+                # 이미지 단위 필터가 있으면 일치한 이미지만 묶음
+                groups, total, approximate = filtered_groups(
+                    'normal', query, NORMAL_GROUP_SORT, page, per_page, cursor, with_total
+                )
+            else:
+                groups, total, approximate = page_with_total(
+                    db.events, event_query, NORMAL_GROUP_SORT, page, per_page, cursor,
+                    projection('normal_groups'), with_total, count_mode
+                )
 
             return jsonify({
                 "status": 200,
                 "message": "검수 완료된 그룹 목록 조회 성공",
                 "total": total,
+                "total_approximate": approximate,
                 "page": page,
                 "per_page": per_page,
-                "total_pages": (total + per_page - 1) // per_page,
+                "total_pages": total_pages(total, per_page),
+                "next_cursor": next_cursor(groups, NORMAL_GROUP_SORT, per_page),
+                "histogram": histogram(db.images, query, histogram_unit),
+                "group_match": group_match,
                 "groups": [{
-                    "evtnum": group['_id']['evtnum'],
-                    "projectId": group['_id']['project_id'],
-                    "serialNumber": group['first_image'].get('SerialNumber', 'UNKNOWN'),
-                    "imageCount": group['count'],
-                    "ThumnailPath": normalize_path(group['first_image'].get('ThumnailPath', '')),
-                    "projectName": group['first_image'].get('ProjectInfo', {}).get('ProjectName', ''),
-                    "DateTimeOriginal": group['first_image'].get('DateTimeOriginal', {}).get('$date', '')
+                    "evtnum": group['evtnum'],
+                    "projectId": group['project_id'],
+                    "serialNumber": group.get('SerialNumber', 'UNKNOWN'),
+                    "imageCount": group['normal']['count'],
+                    "ThumnailPath": image_url(group['normal']['cover'].get('ThumnailPath')) or '',
+                    "projectName": group.get('ProjectName', ''),
+                    "DateTimeOriginal": group['normal']['cover'].get('captured_time') or ''
                 } for group in groups]
             }), 200
 
@@ -133,21 +137,26 @@ def search_normal_inspection():
             query['ProjectInfo.ID'] = project_id
             query['evtnum'] = int(evtnum)
 
-        total = db.images.count_documents(query)
-        images = list(db.images.find(query)
-                      .skip((page - 1) * per_page)
-                      .limit(per_page))
+        query.update(location_filter)
+        cursor = parse_cursor(cursor_token, IMAGE_SORT)
+        images, total, approximate = page_with_total(
+            db.images, query, IMAGE_SORT, page, per_page, cursor,
+            projection('search_normal'), with_total, count_mode
+        )
 
         return jsonify({
             "status": 200,
             "message": "검색 성공",
             "total": total,
+            "total_approximate": approximate,
             "page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor(images, IMAGE_SORT, per_page),
+            "histogram": histogram(db.images, query, histogram_unit),
             "images": [{
                 "id": str(img['_id']),
                 "filename": img['FileName'],
-                "thumbnail": normalize_path(img.get('ThumnailPath', '')),
+                "thumbnail": image_url(img.get('ThumnailPath')) or '',
                 "date": img.get('DateTimeOriginal', {}).get('$date', '0000-00-00T00:00:00Z'),
                 "serial_number": img.get('SerialNumber', ''),
                 "project_name": img.get('ProjectInfo', {}).get('ProjectName', ''),
@@ -156,6 +165,8 @@ def search_normal_inspection():
             } for img in images]
         }), 200
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         print("예외 발생:", str(e))
         traceback.print_exc()
@@ -164,6 +175,7 @@ def search_normal_inspection():
 
 @search_bp.route('/inspection/exception/search', methods=['GET'])
 @jwt_required()
+@cached_query('search_exception')
 def search_exception_inspection():
     """예외 검수 이미지 검색 및 그룹 조회 API"""
     try:
@@ -178,6 +190,14 @@ def search_exception_inspection():
 
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', PER_PAGE_DEFAULT))
+        match_mode = request.args.get('match', 'prefix')  # serial_number/species 비교 방식 (prefix/exact)
+        cursor_token = request.args.get('cursor')  # 있으면 page 대신 키셋 페이지네이션
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 개수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
+        histogram_unit = parse_histogram(request.args.get('histogram'))  # hour/day/week 구간별 개수
+        group_match = parse_group_match(request.args.get('group_match'))  # images(기본)/any_image
+        if match_mode not in MATCH_MODES:
+            return standard_response("match 값은 prefix 또는 exact여야 합니다.", status=400)
 
         # 기본 검색 조건 (미분류된 이미지만 조회)
         query = {'is_classified': False, 'inspection_complete': False}
@@ -185,10 +205,10 @@ def search_exception_inspection():
         if project_id:
             query['ProjectInfo.ID'] = project_id
         elif project_name:
-            query['ProjectInfo.ProjectName'] = {'$regex': project_name, '$options': 'i'}
+            query.update(text_filter('ProjectInfo.ProjectName', project_name, match_mode))
 
         if serial_number:
-            query['SerialNumber'] = {'$regex': serial_number, '$options': 'i'}
+            query.update(text_filter('SerialNumber', serial_number, match_mode))
 
         if exception_status:
             query['exception_status'] = exception_status
@@ -201,70 +221,80 @@ def search_exception_inspection():
             except ValueError:
                 return jsonify({"status": 400, "message": "evtnum 값이 올바르지 않습니다."}), 400
 
-        if date:
-            try:
-                start_date = datetime.strptime(date, "%Y-%m-%d")
-                end_date = start_date + timedelta(days=1)
-                query['DateTimeOriginal'] = {'$gte': start_date, '$lt': end_date}
-            except ValueError:
-                return standard_response("날짜 형식이 잘못되었습니다.", status=400)
+        # 촬영 시간 범위 (start/end, 또는 date 하루)
+        time_range = parse_time_range(request.args.get('start'), request.args.get('end'), date)
+        if time_range:
+            query.update(time_range_condition(time_range))
+
+        # 위치 조건 (bbox=minLon,minLat,maxLon,maxLat / near=경도,위도,반경m)
+        location_filter = geo_filter(request.args.get('bbox'), request.args.get('near'))
 
         # ✅ 그룹 조회: 같은 프로젝트 내에서 같은 evtnum을 가진 이미지만 그룹화
         if group_by == "evtnum":
-            pipeline = [
-                {'$match': query},
-                {'$set': {
-                    'DateTimeOriginalStr': {'$ifNull': ['$DateTimeOriginal', '0000-00-00T00:00:00Z']}
-                }},
-                {'$sort': {'DateTimeOriginal': 1}},
-                {'$group': {
-                    '_id': {
-                        'evtnum': '$evtnum',
-                        'project_id': '$ProjectInfo.ID'  # ✅ 프로젝트 ID 기준으로 그룹화
-                    },
-                    'first_image': {'$first': '$$ROOT'},
-                    'image_count': {'$sum': 1}
-                }},
-                {'$sort': {'_id.evtnum': -1}},
-                {'$skip': (page - 1) * per_page},
-                {'$limit': per_page}
-            ]
-
-            groups = list(db.images.aggregate(pipeline))
+            if location_filter:
+                return standard_response("bbox/near는 그룹 조회(group_by=evtnum)에서 지원하지 않습니다.", status=400)
+            cursor = parse_cursor(cursor_token, EXCEPTION_GROUP_SORT)
+            event_query = view_query(
+                'exception', project_id=project_id,
+                project_name=None if project_id else project_name,
+                serial_number=serial_number, date=date, exception_status=exception_status,
+                evtnum=query.get('evtnum'), match_mode=match_mode, project_name_mode=match_mode,
+                time_range=None if date else time_range
+            )
+            if group_match == 'images' and (exception_status or time_range):
+                # 이미지 단위 필터가 있으면 일치한 이미지만 묶음
+                groups, total, approximate = filtered_groups(
+                    'exception', query, EXCEPTION_GROUP_SORT, page, per_page, cursor, with_total
+                )
+            else:
+                groups, total, approximate = page_with_total(
+                    db.events, event_query, EXCEPTION_GROUP_SORT, page, per_page, cursor,
+                    projection('exception_groups'), with_total, count_mode
+                )
             return jsonify({
                 "status": 200,
                 "message": "그룹 목록 조회 성공",
-                "total": len(groups),
+                "total": total,
+                "total_approximate": approximate,
                 "page": page,
                 "per_page": per_page,
+                "total_pages": total_pages(total, per_page),
+                "next_cursor": next_cursor(groups, EXCEPTION_GROUP_SORT, per_page),
+                "histogram": histogram(db.images, query, histogram_unit),
+                "group_match": group_match,
                 "groups": [{
-                    "evtnum": group['_id']['evtnum'],
-                    "projectId": group['_id']['project_id'],  
-                    "serialNumber": group['first_image'].get('SerialNumber', 'UNKNOWN'),
-                    "imageCount": group['image_count'],
-                    "ThumnailPath": normalize_path(group['first_image'].get('ThumnailPath', '')),
-                    "projectName": group['first_image'].get('ProjectInfo', {}).get('ProjectName', ''),
-                    "DateTimeOriginal": group['first_image'].get('DateTimeOriginalStr', '0000-00-00T00:00:00Z'),
-                    "exceptionStatus": group['first_image'].get('exception_status', 'pending')
+                    "evtnum": group['evtnum'],
+                    "projectId": group['project_id'],
+                    "serialNumber": group.get('SerialNumber', 'UNKNOWN'),
+                    "imageCount": group['exception']['count'],
+                    "ThumnailPath": image_url(group['exception']['cover'].get('ThumnailPath')) or '',
+                    "projectName": group.get('ProjectName', ''),
+                    "DateTimeOriginal": group['exception']['cover'].get('DateTimeOriginal') or '0000-00-00T00:00:00Z',
+                    "exceptionStatus": group['exception']['cover'].get('exception_status', 'pending')
                 } for group in groups]
             }), 200
 
         # ✅ 일반 검색 모드 (단일 이미지 리스트 조회)
-        total = db.images.count_documents(query)
-        images = list(db.images.find(query)
-                      .skip((page - 1) * per_page)
-                      .limit(per_page))
+        query.update(location_filter)
+        cursor = parse_cursor(cursor_token, IMAGE_SORT)
+        images, total, approximate = page_with_total(
+            db.images, query, IMAGE_SORT, page, per_page, cursor,
+            projection('search_exception'), with_total, count_mode
+        )
 
         return jsonify({
             "status": 200,
             "message": "검색 성공",
             "total": total,
+            "total_approximate": approximate,
             "page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor(images, IMAGE_SORT, per_page),
+            "histogram": histogram(db.images, query, histogram_unit),
             "images": [{
                 "id": str(img['_id']),
                 "filename": img['FileName'],
-                "thumbnail": normalize_path(img['ThumnailPath']),
+                "thumbnail": image_url(img['ThumnailPath']) or '',
                 "date": img.get('DateTimeOriginal', {}).get('$date', '0000-00-00T00:00:00Z'),
                 "serial_number": img.get('SerialNumber', ''),
                 "project_name": img.get('ProjectInfo', {}).get('ProjectName', ''),
@@ -278,6 +308,8 @@ def search_exception_inspection():
             } for img in images]
         }), 200
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         print("예외 발생:", str(e))
         traceback.print_exc()
@@ -286,6 +318,7 @@ def search_exception_inspection():
 
 @search_bp.route('/images/search', methods=['GET'])
 @jwt_required()
+@cached_query('search_inspection')
 def search_inspection_images():
     """검수 완료한 이미지 검색 및 그룹 조회 API"""
     try:
@@ -300,6 +333,14 @@ def search_inspection_images():
 
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', PER_PAGE_DEFAULT))
+        match_mode = request.args.get('match', 'prefix')  # serial_number/species 비교 방식 (prefix/exact)
+        cursor_token = request.args.get('cursor')  # 있으면 page 대신 키셋 페이지네이션
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 개수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
+        histogram_unit = parse_histogram(request.args.get('histogram'))  # hour/day/week 구간별 개수
+        group_match = parse_group_match(request.args.get('group_match'))  # images(기본)/any_image
+        if match_mode not in MATCH_MODES:
+            return standard_response("match 값은 prefix 또는 exact여야 합니다.", status=400)
 
         # 기본 쿼리 (검수 완료된 이미지만 조회)
         query = {'inspection_complete': True}
@@ -307,84 +348,92 @@ def search_inspection_images():
         if project_id:
             query['ProjectInfo.ID'] = project_id
         elif project_name:
-            query['ProjectInfo.ProjectName'] = project_name 
+            query.update(text_filter('ProjectInfo.ProjectName', project_name, 'exact'))
 
         if serial_number:
-            query['SerialNumber'] = {'$regex': serial_number, '$options': 'i'}
+            query.update(text_filter('SerialNumber', serial_number, match_mode))
 
         if species:
-            query['BestClass'] = {'$regex': species, '$options': 'i'}
+            query.update(text_filter('BestClass', species, match_mode))
 
         if evtnum:
             query['evtnum'] = int(evtnum)
 
-        if date:
-            try:
-                start_date = datetime.strptime(date, "%Y-%m-%d")
-                end_date = start_date + timedelta(days=1)
-                query['DateTimeOriginal'] = {'$gte': start_date, '$lt': end_date}
-            except ValueError:
-                return standard_response("날짜 형식이 잘못되었습니다.", status=400)
+        # 촬영 시간 범위 (start/end, 또는 date 하루)
+        time_range = parse_time_range(request.args.get('start'), request.args.get('end'), date)
+        if time_range:
+            query.update(time_range_condition(time_range))
+
+        # 위치 조건 (bbox=minLon,minLat,maxLon,maxLat / near=경도,위도,반경m)
+        location_filter = geo_filter(request.args.get('bbox'), request.args.get('near'))
 
         # 그룹 조회 모드 (group_by=evtnum)
         if group_by == "evtnum":
-            pipeline = [
-                {'$match': query},
-                {'$group': {
-                    '_id': {'evtnum': '$evtnum', 'project_id': '$ProjectInfo.ID'}, 
-                    'first_image': {'$first': '$$ROOT'},
-                    'image_count': {'$sum': 1},
-                    'DateTimeOriginal': {'$first': '$DateTimeOriginal'}
-                }},
-                {'$project': {
-                    '_id': 1,
-                    'first_image': 1,
-                    'image_count': 1,
-                    'DateTimeOriginalStr': {
-                        '$ifNull': ['$DateTimeOriginal', '0000-00-00T00:00:00Z']
-                    }
-                }},
-                {'$sort': {'DateTimeOriginalStr': -1}},
-                {'$skip': (page - 1) * per_page},
-                {'$limit': per_page}
-            ]
-
-            groups = list(db.images.aggregate(pipeline))
+            if location_filter:
+                return standard_response("bbox/near는 그룹 조회(group_by=evtnum)에서 지원하지 않습니다.", status=400)
+            cursor = parse_cursor(cursor_token, INSPECTION_GROUP_SORT)
+            event_query = view_query(
+                'inspected', project_id=project_id,
+                project_name=None if project_id else project_name,
+                serial_number=serial_number, species=species, date=date,
+                evtnum=query.get('evtnum'), match_mode=match_mode,
+                time_range=None if date else time_range
+            )
+            if group_match == 'images' and (species or time_range):
+                # 이미지 단위 필터가 있으면 일치한 이미지만 묶음
+                groups, total, approximate = filtered_groups(
+                    'inspected', query, INSPECTION_GROUP_SORT, page, per_page, cursor, with_total
+                )
+            else:
+                groups, total, approximate = page_with_total(
+                    db.events, event_query, INSPECTION_GROUP_SORT, page, per_page, cursor,
+                    projection('inspected_groups'), with_total, count_mode
+                )
 
             return jsonify({
                 "status": 200,
                 "message": "검수 완료된 그룹 목록 조회 성공",
-                "total": len(groups),
+                "total": total,
+                "total_approximate": approximate,
                 "page": page,
                 "per_page": per_page,
+                "total_pages": total_pages(total, per_page),
+                "next_cursor": next_cursor(groups, INSPECTION_GROUP_SORT, per_page),
+                "histogram": histogram(db.images, query, histogram_unit),
+                "group_match": group_match,
                 "groups": [{
-                    "evtnum": group['_id']['evtnum'],
-                    "projectId": group['_id']['project_id'], 
-                    "serialNumber": group['first_image'].get('SerialNumber', 'UNKNOWN'),
-                    "imageCount": group['image_count'],
-                    "ThumnailPath": normalize_path(group['first_image'].get('ThumnailPath', '')),
-                    "projectName": group['first_image'].get('ProjectInfo', {}).get('ProjectName', ''),
-                    "DateTimeOriginal": group['DateTimeOriginalStr']
+                    "evtnum": group['evtnum'],
+                    "projectId": group['project_id'],
+                    "serialNumber": group.get('SerialNumber', 'UNKNOWN'),
+                    "imageCount": group['inspected']['count'],
+                    "ThumnailPath": image_url(group['inspected']['cover'].get('ThumnailPath')) or '',
+                    "projectName": group.get('ProjectName', ''),
+                    "DateTimeOriginal": group['inspected']['cover'].get('DateTimeOriginal') or '0000-00-00T00:00:00Z'
                 } for group in groups]
             }), 200
 
 
         # 일반 검색 모드
-        total = db.images.count_documents(query)
-        images = list(db.images.find(query)
-                      .skip((page - 1) * per_page)
-                      .limit(per_page))
+        query.update(location_filter)
+        cursor = parse_cursor(cursor_token, IMAGE_SORT)
+        images, total, approximate = page_with_total(
+            db.images, query, IMAGE_SORT, page, per_page, cursor,
+            projection('search_inspection'), with_total, count_mode
+        )
 
         return jsonify({
             "status": 200,
             "message": "검수 완료된 이미지 검색 성공",
             "total": total,
+            "total_approximate": approximate,
             "page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor(images, IMAGE_SORT, per_page),
+            "histogram": histogram(db.images, query, histogram_unit),
             "images": [{
                 "id": str(img['_id']),
                 "filename": img['FileName'],
-                "ThumnailPath": normalize_path(img.get('ThumnailPath', '')),
+                "ThumnailPath": image_url(img.get('ThumnailPath')) or '',
                 "date": img['DateTimeOriginal'],
                 "serial_number": img.get('SerialNumber', ''),
                 "species": img.get('BestClass', '미확인'),
@@ -399,7 +448,164 @@ def search_inspection_images():
             } for img in images]
         }), 200
 
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
+    except Exception as e:
+        print("예외 발생:", str(e))
+        traceback.print_exc()
+        return handle_exception(e, error_type="db_error")
+
+# 통합 검색 화면별 기본 조건
+SEARCH_ALL_VIEWS = {
+    'normal': {'is_classified': True, 'inspection_complete': False},
+    'exception': {'is_classified': False, 'inspection_complete': False},
+    'inspected': {'inspection_complete': True}
+}
+SEARCH_ALL_SORT = [('score', -1), ('_id', 1)]  # 텍스트 점수 순 (동점은 _id)
+
+
+@search_bp.route('/all', methods=['GET'])
+@jwt_required()
+@cached_query('search_all')
+def search_all_images():
+    """통합 검색 API (프로젝트명/종/시리얼 번호/예외 코멘트/프로젝트 주소·메모 텍스트 인덱스)"""
+    try:
+        keyword = (request.args.get('q') or '').strip()
+        project_id = request.args.get('project_id')
+        view = request.args.get('view')
+        species = request.args.get('species')
+        serial_number = request.args.get('serial_number')
+        date = request.args.get('date')
+
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', PER_PAGE_DEFAULT))
+        match_mode = request.args.get('match', 'prefix')  # serial_number/species 비교 방식 (prefix/exact)
+        cursor = parse_cursor(request.args.get('cursor'), SEARCH_ALL_SORT)
+        with_total = parse_with_total(request.args.get('with_total'))  # false면 전체 개수 계산 생략
+        count_mode = parse_count_mode(request.args.get('count'))  # exact/cached/estimated
+        histogram_unit = parse_histogram(request.args.get('histogram'))  # hour/day/week 구간별 개수
+
+        if not keyword:
+            return standard_response("검색어(q)가 필요합니다.", status=400)
+        if match_mode not in MATCH_MODES:
+            return standard_response("match 값은 prefix 또는 exact여야 합니다.", status=400)
+        if view and view not in SEARCH_ALL_VIEWS:
+            return standard_response("view 값은 normal, exception, inspected 중 하나여야 합니다.", status=400)
+
+        # 텍스트 검색 ("구문", -제외어 지원) + 필터
+        query = {'$text': {'$search': keyword}, **SEARCH_ALL_VIEWS.get(view, {})}
+        if project_id:
+            query['ProjectInfo.ID'] = project_id
+        if species:
+            query.update(text_filter('BestClass', species, match_mode))
+        if serial_number:
+            query.update(text_filter('SerialNumber', serial_number, match_mode))
+        # 촬영 시간 범위 (start/end, 또는 date 하루)
+        time_range = parse_time_range(request.args.get('start'), request.args.get('end'), date)
+        if time_range:
+            query.update(time_range_condition(time_range))
+
+        # 위치 조건 (bbox=minLon,minLat,maxLon,maxLat / near=경도,위도,반경m)
+        location_filter = geo_filter(request.args.get('bbox'), request.args.get('near'))
+        query.update(location_filter)
+
+        pipeline = [
+            {'$match': query},
+            {'$addFields': {'score': {'$meta': 'textScore'}}},
+            *page_stages(SEARCH_ALL_SORT, page, per_page, cursor),
+            project_stage('search_all')
+        ]
+        images = list(db.images.aggregate(pipeline))
+        total, approximate = count_total(db.images, query, count_mode) if with_total else (None, False)
+
+        return jsonify({
+            "status": 200,
+            "message": "통합 검색 성공",
+            "total": total,
+            "total_approximate": approximate,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": total_pages(total, per_page),
+            "next_cursor": next_cursor(images, SEARCH_ALL_SORT, per_page),
+            "histogram": histogram(db.images, query, histogram_unit),
+            "images": [{
+                "id": str(img['_id']),
+                "score": round(img['score'], 4),
+                "filename": img.get('FileName', ''),
+                "thumbnail": image_url(img.get('ThumnailPath')) or '',
+                "date": img.get('DateTimeOriginal'),
+                "serial_number": img.get('SerialNumber', ''),
+                "species": img.get('BestClass', '미확인'),
+                "project_name": img.get('ProjectInfo', {}).get('ProjectName', ''),
+                "project_id": img.get('ProjectInfo', {}).get('ID', ''),
+                "event_number": img.get('evtnum', 0),
+                "is_classified": img.get('is_classified', False),
+                "inspection_complete": img.get('inspection_complete', False),
+                "exception_status": img.get('exception_status', ''),
+                "exception_comment": img.get('exception_comment', '')
+            } for img in images]
+        }), 200
+
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
     except Exception as e:
         print("예외 발생:", str(e))
         traceback.print_exc()
-        return handle_exception(e, error_type="db_error")
\ No newline at end of file
+        return handle_exception(e, error_type="db_error")
+
+
+@search_bp.route('/map/clusters', methods=['GET'])
+@jwt_required()
+@cached_query('map_clusters')
+def search_map_clusters():
+    """지도 격자 집계 API (줌 레벨별 격자마다 이미지 수와 중심 좌표)"""
+    try:
+        zoom = request.args.get('zoom')
+        project_id = request.args.get('project_id')
+        view = request.args.get('view')
+        species = request.args.get('species')
+        serial_number = request.args.get('serial_number')
+        date = request.args.get('date')
+        match_mode = request.args.get('match', 'prefix')  # serial_number/species 비교 방식 (prefix/exact)
+
+        if zoom is None:
+            return standard_response("zoom 값이 필요합니다.", status=400)
+        zoom = int(zoom)
+        if match_mode not in MATCH_MODES:
+            return standard_response("match 값은 prefix 또는 exact여야 합니다.", status=400)
+        if view and view not in SEARCH_ALL_VIEWS:
+            return standard_response("view 값은 normal, exception, inspected 중 하나여야 합니다.", status=400)
+
+        query = dict(SEARCH_ALL_VIEWS.get(view, {}))
+        if project_id:
+            query['ProjectInfo.ID'] = project_id
+        if species:
+            query.update(text_filter('BestClass', species, match_mode))
+        if serial_number:
+            query.update(text_filter('SerialNumber', serial_number, match_mode))
+        # 촬영 시간 범위 (start/end, 또는 date 하루)
+        time_range = parse_time_range(request.args.get('start'), request.args.get('end'), date)
+        if time_range:
+            query.update(time_range_condition(time_range))
+
+        # 위치 조건 (bbox=minLon,minLat,maxLon,maxLat / near=경도,위도,반경m) - 보통 현재 지도 화면의 bbox
+        query.update(geo_filter(request.args.get('bbox'), request.args.get('near')))
+
+        cells = cluster_cells(list(db.images.aggregate(cluster_pipeline(query, zoom))), zoom)
+
+        return jsonify({
+            "status": 200,
+            "message": "지도 격자 집계 성공",
+            "zoom": zoom,
+            "cell_size": cell_size(zoom),
+            "total": sum(cell['count'] for cell in cells),
+            "truncated": len(cells) >= MAX_CLUSTER_CELLS,
+            "cells": cells
+        }), 200
+
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
+    except Exception as e:
+        print("예외 발생:", str(e))
+        traceback.print_exc()
+        return handle_exception(e, error_type="db_error")
@@ -0,0 +1,149 @@
+"""검색용 정규화(소문자) 필드 관리
+
+SerialNumber, BestClass, ProjectInfo.ProjectName의 소문자 사본을 Normalized 하위 문서에
+저장하고, 검색은 이 필드에 대해 앵커가 있는 prefix 정규식 또는 일치 비교만 사용해
+인덱스를 탈 수 있도록 한다.
+
+통합 검색(/search/all)은 images 텍스트 인덱스(indexes.py의 full_text)를 사용한다. 프로젝트의 주소와
+메모는 images의 ProjectText 필드에 복사해 두고 업로드/프로젝트 수정 시 갱신한다.
+
+기존 문서 백필 (업그레이드 시 필수 - 프로젝트/카메라/종 검색은 Normalized만 비교한다):
+    python -m modules.search_index backfill
+    python -m modules.search_index backfill-text
+Normalized가 없는 images 문서가 있으면 서버 시작 시 backfill을 자동으로 실행한다 (backfill_if_missing).
+"""
+import argparse
+import re
+from typing import Any, Dict, Optional
+
+from .database import db
+from .indexes import sync_indexes
+
+# 원본 필드 -> 정규화 필드
+NORMALIZED_FIELDS = {
+    'SerialNumber': 'Normalized.SerialNumber',
+    'BestClass': 'Normalized.BestClass',
+    'ProjectInfo.ProjectName': 'Normalized.ProjectName'
+}
+
+MATCH_MODES = ('prefix', 'exact')
+
+
+def normalize_value(value: Any) -> Optional[str]:
+    """검색 비교용 정규화 (앞뒤 공백 제거 + 소문자)"""
+    if value is None:
+        return None
+    return str(value).strip().lower()
+
+
+def _get_field(document: Dict, dotted: str) -> Any:
+    """점 표기 필드 또는 중첩 문서에서 값 조회"""
+    if dotted in document:
+        return document[dotted]
+    value: Any = document
+    for part in dotted.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def normalized_updates(fields: Dict) -> Dict[str, Optional[str]]:
+    """insert 문서 또는 $set 딕셔너리에 포함된 원본 필드의 정규화 값 ($set용 점 표기)"""
+    updates = {}
+    for source, target in NORMALIZED_FIELDS.items():
+        value = _get_field(fields, source)
+        if value is not None:
+            updates[target] = normalize_value(value)
+    return updates
+
+
+def with_normalized(fields: Dict) -> Dict:
+    """$set 딕셔너리에 정규화 필드를 추가해 반환"""
+    return {**fields, **normalized_updates(fields)}
+
+
+def normalized_document(document: Dict) -> Dict:
+    """insert 문서에 Normalized 하위 문서를 추가해 반환"""
+    normalized = {
+        target.split('.', 1)[1]: value
+        for target, value in normalized_updates(document).items()
+    }
+    if normalized:
+        document['Normalized'] = normalized
+    return document
+
+
+def text_condition(value: str, mode: str = 'prefix') -> Any:
+    """정규화된 값에 대한 비교 조건 (prefix: ^값 정규식, exact: 일치)"""
+    normalized = normalize_value(value)
+    if mode == 'exact':
+        return normalized
+    return {'$regex': f'^{re.escape(normalized)}'}
+
+
+def text_filter(field: str, value: str, mode: str = 'prefix') -> Dict[str, Any]:
+    """정규화 필드 기준 검색 조건"""
+    return {NORMALIZED_FIELDS[field]: text_condition(value, mode)}
+
+
+def project_text(project: Dict) -> str:
+    """images.ProjectText에 복사할 프로젝트 검색 텍스트 (주소 + 메모)"""
+    return ' '.join(str(project.get(field) or '').strip() for field in ('address', 'memo')).strip()
+
+
+def sync_project_text(project: Dict) -> int:
+    """프로젝트의 주소/메모를 해당 프로젝트 images의 ProjectText에 반영"""
+    result = db.images.update_many(
+        {'ProjectInfo.ID': str(project['_id'])},
+        {'$set': {'ProjectText': project_text(project)}}
+    )
+    return result.modified_count
+
+
+def backfill_project_text() -> int:
+    """모든 프로젝트의 ProjectText 백필"""
+    return sum(sync_project_text(project) for project in db.projects.find({}, {'address': 1, 'memo': 1}))
+
+
+def backfill_normalized_fields(only_missing: bool = True) -> int:
+    """기존 images 문서의 정규화 필드를 서버 측 파이프라인 업데이트로 채움"""
+    query = {'Normalized': {'$exists': False}} if only_missing else {}
+    result = db.images.update_many(query, [{
+        '$set': {
+            target: {
+                '$cond': [
+                    {'$eq': [{'$type': f'${source}'}, 'missing']},
+                    '$$REMOVE',
+                    {'$toLower': {'$trim': {'input': {'$toString': f'${source}'}}}}
+                ]
+            }
+            for source, target in NORMALIZED_FIELDS.items()
+        }
+    }])
+    return result.modified_count
+
+
+def backfill_if_missing() -> int:
+    """기존 배포 업그레이드: Normalized가 없는 images 문서가 있으면 백필 (서버 시작 시 호출)"""
+    if not db.images.find_one({'Normalized': {'$exists': False}}, {'_id': 1}):
+        return 0
+    return backfill_normalized_fields(only_missing=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='검색용 정규화 필드 관리')
+    parser.add_argument('command', choices=['backfill', 'backfill-text'])
+    parser.add_argument('--all', action='store_true', help='이미 정규화 필드가 있는 문서도 다시 계산')
+    args = parser.parse_args()
+
+    sync_indexes(['images'])
+    if args.command == 'backfill-text':
+        print(f"ProjectText 백필 완료: {backfill_project_text()}개 문서")
+        return
+    modified = backfill_normalized_fields(only_missing=not args.all)
+    print(f"정규화 필드 백필 완료: {modified}개 문서")
+
+
+if __name__ == '__main__':
+    main()
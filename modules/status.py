@@ -1,41 +1,282 @@
-from flask import Blueprint, Response, stream_with_context
+from flask import Blueprint, Response, request
 from flask_jwt_extended import jwt_required
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, Iterator, List, Optional, Set
 from datetime import datetime, timedelta
+from queue import Empty, Full, Queue
+from threading import Event, Thread
 
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from .counters import counter_totals, inspection_status_totals, project_counters
+from .counts import parse_count_mode
 from .database import db
+from .query_cache import GLOBAL_SCOPE, store
 from .utils.response import standard_response, handle_exception
 from .utils.constants import MESSAGES
 import json
+import logging
+import os
 import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
 
 status_bp = Blueprint('status', __name__)
 
-def generate_status_updates():
-    """실시간 상태 업데이트 생성기"""
+STATUS_SUMMARY_TTL = int(os.getenv('STATUS_SUMMARY_TTL', '30'))  # 초, 상태 요약 재사용 시간
+
+# SSE 상태 스트림 (StatusBroadcaster)
+STATUS_STREAM_INTERVAL = int(os.getenv('STATUS_STREAM_INTERVAL', '3'))  # 초, 변경 스트림이 없을 때 폴링 간격
+STATUS_STREAM_IDLE_INTERVAL = int(os.getenv('STATUS_STREAM_IDLE_INTERVAL', '30'))  # 초, 변경 스트림 사용 시 확인 간격
+STATUS_STREAM_MIN_INTERVAL = 1  # 초, 재계산 최소 간격
+STATUS_STREAM_HEARTBEAT = 15  # 초, 기본 하트비트 간격
+STATUS_STREAM_WATCH = os.getenv('STATUS_STREAM_WATCH', '1') == '1'
+
+# 상태 요약 집계에 필요한 images 필드
+SUMMARY_FIELDS = {'is_classified': 1, 'inspection_status': 1, 'classification_date': 1,
+                  'inspection_date': 1, 'ProjectInfo.ID': 1}
+
+_summary_cache: Dict[str, Any] = {}
+_summary_lock = Lock()  # 동시에 만료되어도 한 요청만 다시 집계
+
+
+def _flag(condition: Dict[str, Any]) -> Dict[str, Any]:
+    return {'$sum': {'$cond': [condition, 1, 0]}}
+
+
+def summary_pipeline(since: datetime) -> List[Dict[str, Any]]:
+    """전체/분류/24시간 활동, 검토 상태별, 프로젝트별 개수를 한 번에 구하는 집계"""
+    return [
+        {'$project': SUMMARY_FIELDS},
+        {'$facet': {
+            'totals': [{'$group': {
+                '_id': None,
+                'total_images': {'$sum': 1},
+                'classified_images': _flag({'$eq': ['$is_classified', True]}),
+                'unclassified_images': _flag({'$eq': ['$is_classified', False]}),
+                'classifications': _flag({'$gte': ['$classification_date', since]}),
+                'inspections': _flag({'$gte': ['$inspection_date', since]})
+            }}],
+            'inspection_status': [{'$group': {'_id': '$inspection_status', 'count': {'$sum': 1}}}],
+            'projects': [{'$group': {
+                '_id': '$ProjectInfo.ID',
+                'total_images': {'$sum': 1},
+                'classified_images': _flag({'$eq': ['$is_classified', True]})
+            }}]
+        }}
+    ]
+
+
+def facet_status_summary(since: datetime) -> Dict[str, Any]:
+    """images 전체를 한 번 집계한 상태 요약 (count=exact, 카운터가 아직 없거나 reconcile 전일 때)"""
+    result = next(db.images.aggregate(summary_pipeline(since), allowDiskUse=True), None) or {}
+    totals = (result.get('totals') or [{}])[0]
+
+    inspection_status_counts: Dict[str, int] = {}
+    for status in result.get('inspection_status', []):
+        key = status['_id'] or 'pending'
+        inspection_status_counts[key] = inspection_status_counts.get(key, 0) + status['count']
+
+    by_project = {row['_id']: row for row in result.get('projects', [])}
+    project_stats = [{
+        'project_name': project['project_name'],
+        'total_images': by_project.get(str(project['_id']), {}).get('total_images', 0),
+        'classified_images': by_project.get(str(project['_id']), {}).get('classified_images', 0)
+    } for project in db.projects.find({}, {'project_name': 1})]
+
+    return {
+        'total_images': totals.get('total_images', 0),
+        'classified_images': totals.get('classified_images', 0),
+        'unclassified_images': totals.get('unclassified_images', 0),
+        'inspection_status': inspection_status_counts,
+        'recent_activities': {
+            'classifications': totals.get('classifications', 0),
+            'inspections': totals.get('inspections', 0)
+        },
+        'project_stats': project_stats
+    }
+
+
+def compute_status_summary(exact: bool = False) -> Dict[str, Any]:
+    """상태 요약 (프로젝트 카운터 + 최근 24시간 활동 인덱스 조회)
+
+    검토 상태별 합계가 전체 이미지 수와 다르면(카운터 reconcile 전) images 집계로 대신한다.
+    """
+    since = datetime.utcnow() - timedelta(days=1)
+    counters = project_counters()
+    totals = counter_totals()
+    inspection_status_counts = inspection_status_totals()
+    if exact or not counters or sum(inspection_status_counts.values()) != totals['total_images']:
+        return facet_status_summary(since)
+
+    project_stats = [{
+        'project_name': project['project_name'],
+        'total_images': counters.get(str(project['_id']), {}).get('total_images', 0),
+        'classified_images': counters.get(str(project['_id']), {}).get('classified_images', 0)
+    } for project in db.projects.find({}, {'project_name': 1})]
+
+    return {
+        'total_images': totals['total_images'],
+        'classified_images': totals['classified_images'],
+        'unclassified_images': totals['unclassified_images'],
+        'inspection_status': inspection_status_counts,
+        'recent_activities': {
+            'classifications': db.images.count_documents({'classification_date': {'$gte': since}}),
+            'inspections': db.images.count_documents({'inspection_date': {'$gte': since}})
+        },
+        'project_stats': project_stats
+    }
+
+
+def status_summary(max_age: int = STATUS_SUMMARY_TTL) -> Tuple[Dict[str, Any], bool]:
+    """max_age초 안에 계산한 요약을 재사용 (0이면 images에서 새로 집계)
+
+    두 번째 값은 집계 이후 images 쓰기가 있었는지 (쿼리 캐시 전체 세대 번호 비교) 여부다.
+    """
+    generation = store.generations([GLOBAL_SCOPE])[0]
+    entry = _summary_cache.get('summary')
+    if not (entry and max_age and time.monotonic() - entry['at'] < max_age):
+        with _summary_lock:
+            entry = _summary_cache.get('summary')
+            if not (entry and max_age and time.monotonic() - entry['at'] < max_age):
+                entry = {'at': time.monotonic(), 'generation': generation,
+                         'data': compute_status_summary(exact=not max_age)}
+                _summary_cache['summary'] = entry
+    return entry['data'], entry['generation'] != generation
+
+
+def _percentage(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total > 0 else 0
+
+
+def stream_payload(totals: Dict[str, int]) -> Dict[str, Any]:
+    """SSE로 보내는 진행 상황 (카운터의 전체/분류/미분류 개수)"""
+    return {
+        "total_images": totals['total_images'],
+        "classified_images": totals['classified_images'],
+        "unclassified_images": totals['unclassified_images'],
+        "progress_percentage": _percentage(totals['classified_images'], totals['total_images'])
+    }
+
+
+def progress_row(counts: Dict[str, int]) -> Dict[str, Any]:
+    """카운터 + 분류/검수 진행률"""
+    return {
+        **counts,
+        'progress_percentage': _percentage(counts['classified_images'], counts['total_images']),
+        'inspection_percentage': _percentage(counts['inspected_images'], counts['total_images'])
+    }
+
+
+class StatusBroadcaster:
+    """SSE 상태 스트림 팬아웃
+
+    구독자가 있는 동안 백그라운드 스레드 하나가 카운터(counters.py)를 읽어 바뀐 경우에만 모든 구독자 큐에 넣는다.
+    project_counters 변경 스트림(레플리카 셋 필요)을 쓸 수 있으면 카운터가 바뀔 때 바로 다시 계산하고
+    STATUS_STREAM_IDLE_INTERVAL마다 한 번씩 확인하며, 쓸 수 없으면 STATUS_STREAM_INTERVAL마다 폴링한다.
+    images가 아닌 카운터 변경을 기다리므로, 같은 쓰기의 카운터 갱신보다 먼저 깨어나 이전 값을 보낸 뒤
+    IDLE_INTERVAL 동안 잠드는 일이 없다. 구독자 큐는 최신 값 하나만 보관하므로 느린 클라이언트가 있어도 메모리가 늘지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscribers: Set[Queue] = set()
+        self._wake = Event()
+        self._thread: Optional[Thread] = None
+        self._watcher: Optional[Thread] = None
+        self._watching = False
+        self._last: Optional[str] = None
+
+    def subscribe(self) -> Queue:
+        subscriber: Queue = Queue(maxsize=1)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._last is not None:
+                subscriber.put_nowait(self._last)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='status-broadcaster', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _publish(self, message: str) -> None:
+        with self._lock:
+            self._last = message
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.get_nowait()  # 아직 안 보낸 이전 값은 버림
+            except Empty:
+                pass
+            try:
+                subscriber.put_nowait(message)
+            except Full:
+                pass
+
+    def _run(self) -> None:
+        if STATUS_STREAM_WATCH and not (self._watcher and self._watcher.is_alive()):
+            self._watcher = Thread(target=self._watch, name='status-broadcaster-watch', daemon=True)
+            self._watcher.start()
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    # 마지막 구독자가 끊기면 종료 (다음 구독 때 새로 시작)
+                    self._thread = None
+                    self._last = None
+                    return
+            try:
+                message = json.dumps(stream_payload(counter_totals()))
+            except Exception as e:
+                logger.error(f"상태 스트림 계산 실패: {str(e)}")
+                message = json.dumps({'error': str(e)})
+            if message != self._last:
+                self._publish(message)
+
+            self._wake.wait(STATUS_STREAM_IDLE_INTERVAL if self._watching else STATUS_STREAM_INTERVAL)
+            self._wake.clear()
+            time.sleep(STATUS_STREAM_MIN_INTERVAL)  # 연속 변경은 한 번에 반영
+
+    def _watch(self) -> None:
+        """project_counters 변경 스트림으로 계산 스레드 깨우기 (지원하지 않으면 폴링만 사용)"""
+        try:
+            with db.project_counters.watch([{'$project': {'_id': 1}}], max_await_time_ms=1000) as stream:
+                self._watching = True
+                while self.subscriber_count():
+                    if stream.try_next() is not None:
+                        self._wake.set()
+        except PyMongoError as e:
+            logger.info(f"변경 스트림을 사용할 수 없어 {STATUS_STREAM_INTERVAL}초 폴링으로 상태를 갱신합니다: {str(e)}")
+        finally:
+            self._watching = False
+            self._wake.set()
+
+
+broadcaster = StatusBroadcaster()
+
+
+def status_events(subscriber: Queue, heartbeat: int) -> Iterator[str]:
+    """구독자 큐를 SSE 이벤트로 변환 (heartbeat초 동안 새 값이 없으면 주석 줄 전송)
+
+    클라이언트가 끊기면 다음 전송에서 WSGI 서버가 제너레이터를 닫고, finally에서 구독을 해제한다.
+    """
     try:
         while True:
-            # 상태 데이터 생성
-            total_images = db.images.count_documents({})
-            classified_images = db.images.count_documents({'is_classified': True})
-            unclassified_images = db.images.count_documents({'is_classified': False})
-            progress_percentage = (classified_images / total_images * 100) if total_images > 0 else 0
-
-            status_data = {
-                "total_images": total_images,
-                "classified_images": classified_images,
-                "unclassified_images": unclassified_images,
-                "progress_percentage": round(progress_percentage, 2)
-            }
-
-            yield f"data: {json.dumps(status_data)}\n\n"
-            time.sleep(3)
-
-    except GeneratorExit:
-        print("Client disconnected, stopping status updates.")
-    except Exception as e:
-        yield f"data: {json.dumps({'error': str(e)})}\n\n"
-        time.sleep(5)
+            try:
+                message = subscriber.get(timeout=heartbeat)
+            except Empty:
+                yield ": heartbeat\n\n"
+                continue
+            yield f"data: {message}\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
 
 
 @status_bp.route('/status/summary', methods=['GET'])
@@ -43,70 +284,65 @@ def generate_status_updates():
 def get_status_summary() -> Tuple[Dict[str, Any], int]:
     """시스템 상태 요약 API"""
     try:
-        # 전체 이미지 수
-        total_images = db.images.count_documents({})
-        
-        # 분류된/미분류 이미지 수
-        classified_images = db.images.count_documents({'is_classified': True})
-        unclassified_images = db.images.count_documents({'is_classified': False})
-        
-        # 검토 상태별 이미지 수
-        inspection_status_counts: Dict[str, int] = {}
-        inspection_pipeline = [
-            {
-                '$group': {
-                    '_id': '$inspection_status',
-                    'count': {'$sum': 1}
-                }
-            }
-        ]
-        for status in db.images.aggregate(inspection_pipeline):
-            inspection_status_counts[status['_id'] or 'pending'] = status['count']
-            
-        # 최근 24시간 동안의 활동
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        recent_activities = {
-            'classifications': db.images.count_documents({
-                'classification_date': {'$gte': yesterday}
-            }),
-            'inspections': db.images.count_documents({
-                'inspection_date': {'$gte': yesterday}
-            })
-        }
-        
-        # 프로젝트 통계
-        project_stats: List[Dict[str, Any]] = []
-        projects = db.projects.find()
-        
-        for project in projects:
-            project_id = project['_id']
-            stats = {
-                'project_name': project['project_name'],
-                'total_images': db.images.count_documents({
-                    'ProjectInfo.ID': str(project_id)
-                }),
-                'classified_images': db.images.count_documents({
-                    'ProjectInfo.ID': str(project_id),
-                    'is_classified': True
-                })
-            }
-            project_stats.append(stats)
-            
+        # exact: 매번 images 집계, cached/estimated: 카운터 기준 요약을 STATUS_SUMMARY_TTL 동안 재사용
+        count_mode = parse_count_mode(request.args.get('count'), default='cached')
+        summary, stale = status_summary(0 if count_mode == 'exact' else STATUS_SUMMARY_TTL)
+
         return standard_response(
             "시스템 상태 요약 조회 성공",
-            data={
-                'total_images': total_images,
-                'classified_images': classified_images,
-                'unclassified_images': unclassified_images,
-                'inspection_status': inspection_status_counts,
-                'recent_activities': recent_activities,
-                'project_stats': project_stats
-            }
+            data={**summary, 'total_approximate': stale}
         )
         
+    except ValueError as e:
+        return handle_exception(e, error_type="validation_error")
+    except Exception as e:
+        return handle_exception(e, error_type="db_error")
+
+@status_bp.route('/status/progress', methods=['GET'])
+@jwt_required()
+def get_status_progress() -> Tuple[Dict[str, Any], int]:
+    """프로젝트별 분류/검수 진행률 API (images를 세지 않고 프로젝트 카운터 조회)"""
+    try:
+        project_id = request.args.get('project_id')
+        counters = project_counters()
+        project_ids = [project_id] if project_id else [key for key in counters if key is not None]
+        names = {
+            str(project['_id']): project.get('project_name', '')
+            for project in db.projects.find(
+                {'_id': {'$in': [ObjectId(key) for key in project_ids if ObjectId.is_valid(key)]}},
+                {'project_name': 1}
+            )
+        }
+        projects = [{
+            'project_id': key,
+            'project_name': names.get(key, ''),
+            **progress_row(counter_totals(key))
+        } for key in sorted(project_ids)]
+
+        return standard_response(
+            "진행률 조회 성공",
+            data={'totals': progress_row(counter_totals(project_id)), 'projects': projects}
+        )
+
     except Exception as e:
         return handle_exception(e, error_type="db_error")
 
+@status_bp.route('/status/stream', methods=['GET'])
+@jwt_required()
+def stream_status() -> Response:
+    """실시간 상태 스트림 API (SSE, 모든 클라이언트가 한 번의 계산 결과를 공유)"""
+    try:
+        heartbeat = int(request.args.get('heartbeat', STATUS_STREAM_HEARTBEAT))
+    except ValueError:
+        return standard_response("heartbeat 값은 초 단위 정수여야 합니다.", status=400)
+    heartbeat = min(max(heartbeat, 5), 60)
+
+    return Response(
+        status_events(broadcaster.subscribe(), heartbeat),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @status_bp.route('/status/health', methods=['GET'])
 @jwt_required()
 def health_check() -> Tuple[Dict[str, Any], int]:
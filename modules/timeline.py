@@ -0,0 +1,175 @@
+"""촬영 시간 범위 검색과 시간대별 히스토그램
+
+검색 API의 start/end는 촬영 시간(CapturedAt) 범위 조건으로, 그룹 조회에서는
+이벤트 요약의 화면별 first_time 범위로 바뀐다. histogram=hour|day|week를 주면 같은 조건의 이미지를
+$dateTrunc로 묶은 구간별 개수를 페이지와 함께 돌려준다 (활동 타임라인을 한 번의 요청으로 그림).
+
+exifparser는 DateTimeOriginal을 {'$date': ISO 문자열} 하위 문서로 저장하므로 date와 바로 비교할 수 없다.
+그래서 EXIF를 저장할 때 같은 시각을 BSON date로 CapturedAt에 함께 쓰고(with_captured_at),
+범위 조건과 히스토그램은 captured_at 인덱스가 있는 이 필드를 쓴다.
+
+기존 문서 백필:
+    python -m modules.timeline backfill
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.collection import Collection
+
+from .database import db
+from .indexes import sync_indexes
+
+TimeRange = Tuple[Optional[datetime], Optional[datetime]]
+
+HISTOGRAM_UNITS = ('hour', 'day', 'week')
+HISTOGRAM_MAX_BUCKETS = 5000  # 1년치 시간 단위 구간(8,760개)은 잘릴 수 있음
+
+# DateTimeOriginal({'$date': str} 또는 date)을 date로 변환하는 식 (CapturedAt 백필용)
+CAPTURED_AT = {
+    '$convert': {
+        'input': {
+            '$cond': [
+                {'$eq': [{'$type': '$DateTimeOriginal'}, 'object']},
+                {'$getField': {'field': {'$literal': '$date'}, 'input': '$DateTimeOriginal'}},
+                '$DateTimeOriginal'
+            ]
+        },
+        'to': 'date',
+        'onError': None,
+        'onNull': None
+    }
+}
+
+
+def captured_at(value: Any) -> Optional[datetime]:
+    """DateTimeOriginal 값({'$date': ISO 문자열} 또는 datetime)을 datetime으로 변환 (없거나 잘못되면 None)"""
+    if isinstance(value, dict):
+        value = value.get('$date')
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).rstrip('Z')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def with_captured_at(fields: Dict) -> Dict:
+    """DateTimeOriginal을 포함한 $set 딕셔너리에 CapturedAt(date)을 추가해 반환"""
+    if 'DateTimeOriginal' not in fields:
+        return fields
+    return {**fields, 'CapturedAt': captured_at(fields['DateTimeOriginal'])}
+
+
+def parse_time(value: str, name: str, is_end: bool = False) -> datetime:
+    """YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM[:SS] (end에 날짜만 주면 그날 끝까지 포함)"""
+    try:
+        parsed = datetime.fromisoformat(value.strip().rstrip('Z'))
+    except ValueError:
+        raise ValueError(f"{name} 형식이 올바르지 않습니다 (YYYY-MM-DD 또는 YYYY-MM-DDTHH:MM:SS)")
+    if is_end and len(value.strip()) == 10:
+        parsed += timedelta(days=1)
+    return parsed.replace(tzinfo=None)
+
+
+def parse_time_range(start: Optional[str], end: Optional[str], date: Optional[str] = None) -> Optional[TimeRange]:
+    """start/end(또는 기존 date 하루 범위)를 [시작, 끝) 범위로 변환 (지정이 없으면 None)"""
+    if date:
+        if start or end:
+            raise ValueError("date와 start/end는 함께 사용할 수 없습니다")
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("날짜 형식이 올바르지 않습니다")
+        return day, day + timedelta(days=1)
+
+    if not start and not end:
+        return None
+    range_start = parse_time(start, 'start') if start else None
+    range_end = parse_time(end, 'end', is_end=True) if end else None
+    if range_start and range_end and range_start >= range_end:
+        raise ValueError("start는 end보다 앞서야 합니다")
+    return range_start, range_end
+
+
+def time_range_condition(time_range: TimeRange) -> Dict[str, Any]:
+    """images 촬영 시간 범위 조건 (쿼리에 합칠 {'CapturedAt': ...}, captured_at 인덱스 사용)
+
+    date 범위 비교는 같은 BSON 타입끼리만 일치하므로 CapturedAt이 없거나 null인 이미지는 제외된다.
+    """
+    start, end = time_range
+    condition = {}
+    if start:
+        condition['$gte'] = start
+    if end:
+        condition['$lt'] = end
+    return {'CapturedAt': condition}
+
+
+def event_time_condition(time_range: TimeRange) -> Dict[str, str]:
+    """이벤트 요약 first_time(ISO 문자열) 범위 조건"""
+    start, end = time_range
+    condition = {}
+    if start:
+        condition['$gte'] = start.strftime('%Y-%m-%dT%H:%M:%S')
+    if end:
+        condition['$lt'] = end.strftime('%Y-%m-%dT%H:%M:%S')
+    return condition
+
+
+def parse_histogram(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    if value not in HISTOGRAM_UNITS:
+        raise ValueError(f"histogram 값은 {', '.join(HISTOGRAM_UNITS)} 중 하나여야 합니다")
+    return value
+
+
+def histogram_pipeline(query: Dict[str, Any], unit: str) -> List[Dict[str, Any]]:
+    """촬영 시간을 unit 단위로 자른 구간별 개수 (주 단위는 월요일 시작)"""
+    trunc: Dict[str, Any] = {'date': '$CapturedAt', 'unit': unit}
+    if unit == 'week':
+        trunc['startOfWeek'] = 'monday'
+    return [
+        {'$match': query},
+        {'$group': {'_id': {'$dateTrunc': trunc}, 'count': {'$sum': 1}}},
+        {'$match': {'_id': {'$ne': None}}},
+        {'$sort': {'_id': 1}},
+        {'$limit': HISTOGRAM_MAX_BUCKETS}
+    ]
+
+
+def histogram(collection: Collection, query: Dict[str, Any], unit: Optional[str]) -> Optional[Dict[str, Any]]:
+    """응답용 히스토그램 (unit이 없으면 None)"""
+    if not unit:
+        return None
+    buckets = [
+        {'time': row['_id'].strftime('%Y-%m-%dT%H:%M:%S'), 'count': row['count']}
+        for row in collection.aggregate(histogram_pipeline(query, unit))
+    ]
+    return {'unit': unit, 'truncated': len(buckets) >= HISTOGRAM_MAX_BUCKETS, 'buckets': buckets}
+
+
+def backfill_captured_at(only_missing: bool = True) -> int:
+    """기존 images 문서의 CapturedAt을 DateTimeOriginal에서 채움 (서버 측 파이프라인 업데이트)"""
+    query: Dict[str, Any] = {'DateTimeOriginal': {'$exists': True}}
+    if only_missing:
+        query['CapturedAt'] = {'$exists': False}
+    result = db.images.update_many(query, [{'$set': {'CapturedAt': CAPTURED_AT}}])
+    return result.modified_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='촬영 시간(CapturedAt) 필드 관리')
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--all', action='store_true', help='이미 CapturedAt이 있는 문서도 다시 계산')
+    args = parser.parse_args()
+
+    sync_indexes(['images'])
+    print(f"CapturedAt 백필 완료: {backfill_captured_at(only_missing=not args.all)}개 문서")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,21 @@ from flask_jwt_extended import jwt_required
 from werkzeug.utils import secure_filename
 import os
 import logging
+import time
 from PIL import Image
 from datetime import datetime
 from .exifparser import process_images
+from .changes import images_changed
 from .database import db
+from .projections import find_one_view, find_view
+from .geo import with_location
+from .metrics import THUMBNAIL
+from .search_index import normalized_document, project_text, with_normalized
+from .timeline import with_captured_at
 import json
 from bson.objectid import ObjectId
 from .utils.response import standard_response, handle_exception
+from .utils.storage import local_path, storage_path
 from .utils.constants import (
     ALLOWED_EXTENSIONS,
     MAX_FILE_SIZE,
@@ -31,10 +39,12 @@ def allowed_file(filename: str) -> bool:
 def create_thumbnail(image_path: str, thumbnail_path: str) -> bool:
     """썸네일 이미지 생성"""
     try:
+        started = time.perf_counter()
         with Image.open(image_path) as img:
             img.thumbnail(THUMBNAIL_SIZE)
             os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
             img.save(thumbnail_path, "JPEG")
+        THUMBNAIL.observe(time.perf_counter() - started)
         return True
     except Exception as e:
         logger.error(f"Error creating thumbnail for {image_path}: {str(e)}")
@@ -93,9 +103,11 @@ def upload_files():
                     continue
 
                 filename = secure_filename(file.filename)
-                base_path = os.path.abspath(f"./mnt/{project_id}/analysis")
-                file_path = os.path.join(base_path, "source", filename)
-                thumbnail_path = os.path.join(base_path, "thumbnail", f"thum_{filename}")
+                # DB에는 저장소 루트 기준 상대 경로, 파일은 local_path()로 변환한 위치에 저장
+                stored_path = storage_path(project_id, "analysis", "source", filename)
+                stored_thumbnail = storage_path(project_id, "analysis", "thumbnail", f"thum_{filename}")
+                file_path = local_path(stored_path)
+                thumbnail_path = local_path(stored_thumbnail)
 
                 os.makedirs(os.path.dirname(file_path), exist_ok=True)
                 os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
@@ -108,13 +120,14 @@ def upload_files():
 
                     image_doc = {
                         'FileName': filename,
-                        'FilePath': file_path,
+                        'FilePath': stored_path,
                         'OriginalFileName': filename,
-                        'ThumnailPath': thumbnail_path,
+                        'ThumnailPath': stored_thumbnail,
                         'ProjectInfo': {
                             'ProjectName': project['project_name'],
                             'ID': str(project['_id'])
                         },
+                        'ProjectText': project_text(project),  # 통합 검색용 프로젝트 주소/메모
                         'AnalysisFolder': 'analysis',
                         'uploadState': 'uploaded',
                         'AI_processed': False,
@@ -123,19 +136,20 @@ def upload_files():
                         'UploadDate': datetime.utcnow()
                     }
 
-                    result = db.images.insert_one(image_doc)
+                    result = db.images.insert_one(normalized_document(image_doc))
                     image_id = str(result.inserted_id)
                     uploaded_image_ids.append(image_id)
 
                     uploaded_files.append({
                         'filename': filename,
-                        'path': file_path,
-                        'thumbnail': thumbnail_path,
+                        'path': stored_path,
+                        'thumbnail': stored_thumbnail,
                         'project_id': project_id,
                         'image_id': image_id
                     })
 
         logger.info(f"업로드 완료: {len(uploaded_files)}개, 실패: {len(skipped_files)}개")
+        images_changed(uploaded_image_ids)
 
         if not uploaded_files:
             logger.error("모든 파일 업로드 실패")
@@ -168,6 +182,7 @@ def delete_multiple_files():
         
         deleted_count = 0
         failed_ids = []
+        deleted_docs = []  # 삭제된 이미지의 키 필드 (이벤트 요약 갱신용)
 
         for image_id in image_ids:
             try:
@@ -180,7 +195,7 @@ def delete_multiple_files():
                     continue
                 
                 # 먼저 이미지 정보 조회
-                image = db.images.find_one({'_id': obj_id})
+                image = find_one_view('images', 'file_paths', {'_id': obj_id})
                 if not image:
                     logger.warning(f"Image not found in DB: {image_id}")
                     failed_ids.append(image_id)
@@ -188,7 +203,7 @@ def delete_multiple_files():
                 
                 # 파일 삭제 시도
                 file_deleted = True
-                for path in [image.get('FilePath'), image.get('ThumnailPath')]:
+                for path in [local_path(image.get('FilePath')), local_path(image.get('ThumnailPath'))]:
                     if path and os.path.exists(path):
                         try:
                             os.remove(path)
@@ -205,6 +220,7 @@ def delete_multiple_files():
                 result = db.images.delete_one({'_id': obj_id})
                 if result.deleted_count > 0:
                     deleted_count += 1
+                    deleted_docs.append(image)
                 else:
                     logger.warning(f"Failed to delete DB record for: {image_id}")
                     failed_ids.append(image_id)
@@ -214,6 +230,8 @@ def delete_multiple_files():
                 failed_ids.append(image_id)
                 continue
 
+        images_changed(before=deleted_docs)
+
         # 모든 파일 삭제 실패 시 500 응답
         if deleted_count == 0:
             return standard_response(
@@ -253,11 +271,11 @@ def parse_files():
         if not image_ids:
             return standard_response("파싱할 이미지 ID가 필요합니다", status=400)
 
-        images = list(db.images.find({'_id': {'$in': [ObjectId(id) for id in image_ids]}}))
+        images = list(find_view('images', 'file_paths', {'_id': {'$in': [ObjectId(id) for id in image_ids]}}))
         if not images:
             return standard_response("파싱할 이미지를 찾을 수 없습니다", data={'parsed_count': 0})
 
-        image_paths = [img['FilePath'] for img in images]
+        image_paths = [local_path(img['FilePath']) for img in images]
         project_info = {
             'name': images[0]['ProjectInfo']['ProjectName'],
             'id': images[0]['ProjectInfo']['ID']
@@ -275,32 +293,27 @@ def parse_files():
         parsed_images = []
         failed_images = []
 
-        #경로 변환 함수 추가
-        def normalize_path(path):
-            """Windows와 Linux 경로를 통일하는 함수"""
-            if os.name == "nt":  
-                path = path.replace("mnt\\", "/mnt/")  # 역슬래시를 슬래시로 변환
-            return path.replace("\\", "/")  # 모든 역슬래시를 슬래시로 변경
-
         for processed in processed_images:
             logger.info(f"🔍 처리된 이미지: {processed}")
             
             # MongoDB에서 찾으려는 파일명과 비교 로그
-            existing_doc = db.images.find_one({'OriginalFileName': processed['OriginalFileName']})
+            existing_doc = find_one_view('images', 'image_key', {'OriginalFileName': processed['OriginalFileName']})
             if not existing_doc:
                 logger.error(f"MongoDB에서 해당 파일을 찾을 수 없음: {processed['OriginalFileName']}")
             
             result = db.images.update_one(
                 {'OriginalFileName': processed['OriginalFileName']},  # 원본 파일명 기반으로 찾기
                 {
-                    '$set': {
+                    '$set': with_captured_at(with_location(with_normalized({
                         'SerialNumber': processed.get('SerialNumber', ''),
                         'DateTimeOriginal': processed.get('DateTimeOriginal', ''),
+                        'Latitude': processed.get('Latitude'),
+                        'Longitude': processed.get('Longitude'),
                         'serial_filename': processed.get('serial_filename', ''),
                         'evtnum': processed.get('evtnum'),
                         'exif_parsed': True,
                         'exif_parsed_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-                    }
+                    })))
                 }
             )
 
@@ -311,6 +324,9 @@ def parse_files():
             else:
                 failed_images.append(processed.get('FileName', 'Unknown'))
 
+        # evtnum이 부여된 이미지의 이벤트 요약 생성
+        images_changed([img['_id'] for img in images])
+
         if failed_images:
             logger.warning(f" EXIF 파싱 실패 이미지 목록: {failed_images}")
             return standard_response("일부 이미지의 EXIF 파싱이 완료되었으나 실패한 파일이 있습니다", status=206, data={'parsed_count': update_count, 'failed_images': failed_images})
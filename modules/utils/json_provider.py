@@ -0,0 +1,92 @@
+"""Flask JSON 프로바이더 (BSON 타입 직렬화)
+
+OrjsonProvider는 orjson으로 직렬화한다. datetime/date/UUID/dict/list는 orjson이 C 수준에서 바로
+처리하고, ObjectId 등 BSON 타입만 default()로 넘어온다. orjson이 설치되어 있지 않거나
+JSON_PROVIDER=default이면 기존 CustomJSONProvider(표준 json)를 사용한다.
+
+Binary(검출 결과 이미지 등)는 JSON_BINARY_POLICY 환경 변수의 정책에 따라 처리한다.
+바이너리를 돌려주는 JSON 응답은 없으므로(목록/상세는 projections로 detection_image를 읽지 않음)
+응답별 정책은 두지 않는다.
+- null: null로 출력 (기본값, 목록 응답에 수백 KB 바이너리가 실리지 않도록)
+- error: TypeError 발생 (응답에 바이너리가 섞이는 회귀를 찾을 때)
+- base64: base64 문자열로 출력
+"""
+import base64
+import decimal
+import os
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from bson.binary import Binary
+from bson.decimal128 import Decimal128
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 프로바이더 사용
+    orjson = None
+
+BINARY_POLICIES = ('null', 'error', 'base64')
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+JSON_BINARY_POLICY = os.getenv('JSON_BINARY_POLICY', 'null')
+if JSON_BINARY_POLICY not in BINARY_POLICIES:
+    raise ValueError(f"JSON_BINARY_POLICY는 {', '.join(BINARY_POLICIES)} 중 하나여야 합니다")
+
+
+def encode_binary(value: bytes) -> Any:
+    if JSON_BINARY_POLICY == 'base64':
+        return base64.b64encode(value).decode('ascii')
+    if JSON_BINARY_POLICY == 'error':
+        raise TypeError("응답에 Binary 필드가 포함되어 있습니다")
+    return None
+
+
+class CustomJSONProvider(DefaultJSONProvider):
+    """MongoDB ObjectId와 Binary 직렬화를 위한 커스텀 JSON 프로바이더"""
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        if isinstance(obj, Binary):
+            return encode_binary(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return encode_binary(obj)
+    if isinstance(obj, (decimal.Decimal, Decimal128)):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson 기반 JSON 프로바이더 (dict 키 순서 유지, 비문자열 키 허용)"""
+
+    mimetype = 'application/json'
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_orjson_default, option=self.options).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=self.options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def create_json_provider(app: Flask) -> JSONProvider:
+    """설정에 맞는 JSON 프로바이더 생성"""
+    if JSON_PROVIDER == 'orjson' and orjson is not None:
+        return OrjsonProvider(app)
+    return CustomJSONProvider(app)
@@ -0,0 +1,125 @@
+import base64
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import bson
+from pymongo.collection import Collection
+
+SortSpec = List[Tuple[str, int]]
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """정렬 키 값 목록을 불투명한 커서 토큰으로 변환 (BSON 그대로 보존)"""
+    return base64.urlsafe_b64encode(bson.encode({'v': values})).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort: SortSpec) -> List[Any]:
+    """커서 토큰을 정렬 키 값 목록으로 복원"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = bson.decode(base64.urlsafe_b64decode(padded))['v']
+    except Exception:
+        raise ValueError("유효하지 않은 커서입니다")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("유효하지 않은 커서입니다")
+    return values
+
+
+def _get_field(document: Dict, dotted: str) -> Any:
+    value: Any = document
+    for part in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def keyset_filter(sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """(정렬 키..., _id) 기준으로 커서 다음 항목만 남기는 조건"""
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        # 값이 '$'로 시작하는 키를 가진 문서일 수 있으므로 $eq로 감싸서 비교
+        clause = {prev_field: {'$eq': values[i]} for i, (prev_field, _) in enumerate(sort[:index])}
+        clause[field] = {'$gt' if direction == 1 else '$lt': values[index]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+
+def parse_cursor(token: Optional[str], sort: SortSpec) -> Optional[List[Any]]:
+    """cursor 파라미터 해석 (None: 페이지 번호 모드, []: 커서 모드 첫 페이지)"""
+    if token is None:
+        return None
+    if token == '':
+        return []
+    return decode_cursor(token, sort)
+
+
+def page_stages(sort: SortSpec, page: int, per_page: int,
+                cursor: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """aggregate 파이프라인용 정렬 + 페이지 단계 (커서가 있으면 $skip 대신 키셋 $match)"""
+    stages: List[Dict[str, Any]] = [{'$sort': dict(sort)}]
+    if cursor:
+        stages.append({'$match': keyset_filter(sort, cursor)})
+    elif cursor is None:
+        stages.append({'$skip': (page - 1) * per_page})
+    stages.append({'$limit': per_page})
+    return stages
+
+
+def find_query(query: Dict[str, Any], sort: SortSpec, cursor: Optional[List[Any]]) -> Dict[str, Any]:
+    """find용 조건에 키셋 조건을 합침"""
+    if not cursor:
+        return query
+    return {'$and': [query, keyset_filter(sort, cursor)]}
+
+
+def find_skip(page: int, per_page: int, cursor: Optional[List[Any]]) -> int:
+    """커서 모드에서는 skip 없이 조회"""
+    return 0 if cursor is not None else (page - 1) * per_page
+
+
+def next_cursor(items: List[Dict], sort: SortSpec, per_page: int) -> Optional[str]:
+    """마지막 항목의 정렬 키로 다음 페이지 커서 생성 (마지막 페이지면 None)"""
+    if len(items) < per_page or not items:
+        return None
+    return cursor_of(items[-1], sort)
+
+
+def cursor_of(item: Dict, sort: SortSpec) -> str:
+    """항목의 정렬 키로 커서 생성 (이 항목 다음부터 조회)"""
+    return encode_cursor([_get_field(item, field) for field, _ in sort])
+
+
+def rows_with_next_cursor(items: Iterable[Dict], sort: SortSpec, per_page: int,
+                          to_row: Callable[[Dict], Dict]) -> Iterator[Dict]:
+    """스트리밍용: 항목을 변환해 내보내고 마지막 줄에 {'meta': {'next_cursor': ...}}를 붙임"""
+    last = None
+    count = 0
+    for item in items:
+        last = item
+        count += 1
+        yield to_row(item)
+    yield {'meta': {'next_cursor': cursor_of(last, sort) if last is not None and count >= per_page else None}}
+
+
+def parse_with_total(value: Optional[str]) -> bool:
+    """with_total 파라미터 해석 (false/0/no면 전체 개수 계산 생략)"""
+    return (value or 'true').strip().lower() not in ('false', '0', 'no')
+
+
+def total_pages(total: Optional[int], per_page: int) -> Optional[int]:
+    """전체 페이지 수 (전체 개수를 세지 않았으면 None)"""
+    if total is None:
+        return None
+    return (total + per_page - 1) // per_page
+
+
+def find_page(collection: Collection, query: Dict[str, Any], sort: SortSpec, page: int, per_page: int,
+              cursor: Optional[List[Any]], projection: Optional[Dict[str, int]] = None) -> List[Dict]:
+    """한 페이지 조회 (find().sort().limit()로 인덱스를 타며, 커서가 있으면 skip 대신 키셋 조건)
+
+    전체 개수는 페이지와 따로 센다 (counts.count_total).
+    """
+    return list(collection.find(find_query(query, sort, cursor), projection)
+                .sort(sort)
+                .skip(find_skip(page, per_page, cursor))
+                .limit(per_page))
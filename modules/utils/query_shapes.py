@@ -0,0 +1,98 @@
+"""MongoDB 명령 모니터링으로 엔드포인트별 쿼리 형태(shape) 기록
+
+QUERY_SHAPE_LOG 환경 변수에 파일 경로를 지정하면 처음 보는 (엔드포인트, 컬렉션, 명령, 형태)마다
+실제 명령 한 건을 샘플로 JSON 한 줄씩 기록한다. 기록한 파일은 인덱스 분석에 사용한다:
+    python -m modules.indexes advise --shapes <파일>
+"""
+import json
+import os
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from flask import has_request_context, request
+from pymongo import monitoring
+
+QUERY_SHAPE_LOG = os.getenv('QUERY_SHAPE_LOG')
+
+# 명령별로 샘플에 남길 필드 (세션/클러스터 시간 등 드라이버 필드는 제외)
+COMMAND_FIELDS = {
+    'find': ('filter', 'sort', 'projection', 'skip', 'limit'),
+    'aggregate': ('pipeline',),
+    'count': ('query',)
+}
+
+
+# 항목마다 구조가 다른 목록 (나머지 목록은 길이만 달라지므로 첫 항목만 형태로 남김)
+STRUCTURAL_LISTS = ('$and', 'pipeline')
+
+
+def query_shape(value: Any, key: Optional[str] = None) -> Any:
+    """조건 값을 타입 자리표시자로 바꾼 형태 ($in/$or 등 가변 길이 목록은 첫 항목만)"""
+    if isinstance(value, dict):
+        return {field: query_shape(item, field) for field, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if key in STRUCTURAL_LISTS:
+            return [query_shape(item) for item in value]
+        return [query_shape(value[0])] if value else []
+    return f'?{type(value).__name__}'
+
+
+def command_spec(command_name: str, command: Dict) -> Dict[str, Any]:
+    """기록/explain 대상 명령 본문"""
+    spec = {command_name: command[command_name]}
+    for field in COMMAND_FIELDS[command_name]:
+        if field in command:
+            spec[field] = command[field]
+    return spec
+
+
+class QueryShapeRecorder(monitoring.CommandListener):
+    """처음 보는 쿼리 형태를 파일에 기록하는 명령 리스너"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen = set()
+        self._lock = Lock()
+
+    def started(self, event):
+        if event.command_name not in COMMAND_FIELDS:
+            return
+        spec = command_spec(event.command_name, event.command)
+        endpoint = request.endpoint if has_request_context() else None
+        collection = spec[event.command_name]
+        shape = {
+            field: query_shape(value, field) for field, value in spec.items()
+            if field not in (event.command_name, 'skip', 'limit')
+        }
+        key = json.dumps([endpoint, collection, event.command_name, shape], sort_keys=True, default=str)
+        with self._lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json_util.dumps({
+                    'endpoint': endpoint,
+                    'collection': collection,
+                    'command': event.command_name,
+                    'shape': shape,
+                    'sample': spec
+                }, ensure_ascii=False) + '\n')
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def query_shape_listeners() -> List[monitoring.CommandListener]:
+    """MongoClient에 넘길 리스너 목록 (QUERY_SHAPE_LOG가 없으면 빈 목록)"""
+    return [QueryShapeRecorder(QUERY_SHAPE_LOG)] if QUERY_SHAPE_LOG else []
+
+
+def load_shapes(path: str, collection: Optional[str] = None) -> List[Dict]:
+    """기록된 쿼리 형태 읽기"""
+    with open(path, encoding='utf-8') as f:
+        shapes = [json_util.loads(line) for line in f if line.strip()]
+    return [s for s in shapes if collection is None or s['collection'] == collection]
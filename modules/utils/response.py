@@ -1,5 +1,8 @@
-from typing import Dict, Any, Optional, Tuple
-from flask import jsonify
+import logging
+from typing import Dict, Any, Iterable, Optional, Tuple
+from flask import Response, current_app, jsonify, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
 
 def standard_response(
     message: str, 
@@ -55,4 +58,26 @@ def pagination_meta(
         "page": page,
         "per_page": per_page,
         "total_pages": (total + per_page - 1) // per_page
-    } 
\ No newline at end of file
+    }
+
+def wants_ndjson() -> bool:
+    """Accept 헤더가 JSON보다 NDJSON을 우선하는지 여부"""
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def ndjson_response(rows: Iterable[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None) -> Response:
+    """행을 한 줄에 JSON 하나씩 스트리밍하는 응답
+
+    첫 줄은 {"meta": ...}이고, 이후 rows를 읽는 대로 내보낸다 (rows가 커서/제너레이터면 메모리 일정).
+    스트리밍 도중 오류가 나면 마지막 줄에 {"error": ...}를 내보낸다.
+    """
+    def generate():
+        if meta is not None:
+            yield current_app.json.dumps({'meta': meta}) + '\n'
+        try:
+            for row in rows:
+                yield current_app.json.dumps(row) + '\n'
+        except Exception as e:
+            logging.error(f"NDJSON 스트리밍 실패: {str(e)}", exc_info=True)
+            yield current_app.json.dumps({'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
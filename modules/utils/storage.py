@@ -0,0 +1,66 @@
+"""이미지 저장소 경로와 공개 URL
+
+images 문서의 FilePath/ThumnailPath는 저장소 루트(STORAGE_ROOT) 기준 상대 경로
+({project_id}/{analysis_folder}/source/{filename})로 저장한다. 파일 접근은 local_path(),
+응답의 이미지 URL은 image_url()로 만든다.
+
+이전 문서의 절대 경로(C:\\...\\backend\\mnt\\..., ./mnt/..., /mnt/...)도 읽을 때 같은 규칙으로
+상대 경로로 바꿔 처리하며, 저장된 값은 다음 명령으로 한 번에 옮긴다:
+    python -m modules.path_migration migrate [--dry-run]
+"""
+import os
+import posixpath
+import re
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import quote
+
+STORAGE_ROOT = os.path.abspath(os.getenv('STORAGE_ROOT', 'mnt'))
+IMAGE_URL_BASE = os.getenv('IMAGE_URL_BASE', 'http://localhost:5000/images').rstrip('/')
+STORAGE_URL_CACHE_SIZE = int(os.getenv('STORAGE_URL_CACHE_SIZE', 65536))
+
+LEGACY_ROOT_DIR = 'mnt'  # 이전 절대 경로에서 저장소 루트로 쓰던 디렉터리 이름
+_ABSOLUTE = re.compile(r'^(/|[A-Za-z]:)')
+_ROOT_PREFIX = STORAGE_ROOT.replace('\\', '/').rstrip('/') + '/'
+
+
+def storage_path(*parts: str) -> str:
+    """새 문서에 저장할 상대 경로"""
+    return '/'.join(str(part).strip('/\\') for part in parts)
+
+
+def relative_path(path: Optional[str]) -> Optional[str]:
+    """저장된 경로(상대/이전 절대 경로)를 저장소 루트 기준 상대 경로로 변환 (알 수 없으면 None)"""
+    if not path:
+        return None
+    posix = path.replace('\\', '/')
+    if posix.startswith(_ROOT_PREFIX):
+        relative = posix[len(_ROOT_PREFIX):]
+    else:
+        parts = [part for part in posix.split('/') if part not in ('', '.')]
+        if LEGACY_ROOT_DIR in parts:
+            parts = parts[parts.index(LEGACY_ROOT_DIR) + 1:]
+        elif _ABSOLUTE.match(posix):
+            return None
+        relative = '/'.join(parts)
+    relative = posixpath.normpath(relative) if relative else ''
+    if not relative or relative == '.' or relative.startswith('../') or relative == '..':
+        return None
+    return relative
+
+
+def local_path(path: Optional[str]) -> Optional[str]:
+    """파일 읽기/쓰기/삭제에 쓸 절대 경로"""
+    relative = relative_path(path)
+    if relative is None:
+        return None
+    return os.path.join(STORAGE_ROOT, *relative.split('/'))
+
+
+@lru_cache(maxsize=STORAGE_URL_CACHE_SIZE)
+def image_url(path: Optional[str]) -> Optional[str]:
+    """응답용 이미지 URL (IMAGE_URL_BASE/{상대 경로}, 같은 경로는 메모이즈)"""
+    relative = relative_path(path)
+    if relative is None:
+        return None
+    return f"{IMAGE_URL_BASE}/{quote(relative)}"
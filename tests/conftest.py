@@ -0,0 +1,175 @@
+"""테스트 공통 설정
+
+MongoDB 대신 mongomock을 쓴다 (pip install pytest mongomock). modules.database가 import 시점에
+MongoClient를 만들므로 modules를 import하기 전에 pymongo.MongoClient를 바꿔 둔다.
+"""
+import datetime
+import os
+import sys
+
+import mongomock
+import pymongo
+import pytest
+from mongomock import aggregate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class MockClient(mongomock.MongoClient):
+    """명령 리스너 인자(event_listeners)를 받지 않는 mongomock 클라이언트"""
+
+    def __init__(self, *args, event_listeners=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+pymongo.MongoClient = MockClient
+
+_parse = aggregate._Parser.parse
+_BSON_TYPES = {dict: 'object', str: 'string', datetime.datetime: 'date', type(None): 'null'}
+
+
+def _parse_with_dates(self, expression):
+    """mongomock에 없는 $type, $getField, $convert(to: date), $trim 보충 (CAPTURED_AT/정규화 백필 평가용)"""
+    if isinstance(expression, dict) and len(expression) == 1:
+        (operator, args), = expression.items()
+        if operator == '$type':
+            try:
+                value = self.parse(args)
+            except KeyError:
+                return 'missing'
+            return _BSON_TYPES.get(type(value), 'other')
+        if operator == '$getField':
+            value = self.parse(args['input'])
+            field = args['field']
+            field = field.get('$literal') if isinstance(field, dict) else field
+            return value.get(field) if isinstance(value, dict) else None
+        if operator == '$convert' and args.get('to') == 'date':
+            try:
+                value = self.parse(args['input'])
+            except KeyError:
+                value = None
+            if value is None:
+                return args.get('onNull')
+            if isinstance(value, datetime.datetime):
+                return value
+            try:
+                return datetime.datetime.fromisoformat(str(value).rstrip('Z'))
+            except ValueError:
+                return args.get('onError')
+        if operator == '$trim':
+            value = self.parse(args['input'])
+            return value.strip() if isinstance(value, str) else value
+    return _parse(self, expression)
+
+
+aggregate._Parser.parse = _parse_with_dates
+
+
+@pytest.fixture
+def db():
+    """테스트마다 비운 mongomock DB (DB 내용을 메모리에 둔 카운터 사본도 비움)"""
+    from modules import counters
+    from modules.database import db as database
+    yield database
+    for name in database.list_collection_names():
+        database.drop_collection(name)
+    counters._cache.clear()
+
+
+@pytest.fixture
+def client(db):
+    """인증 토큰을 붙인 테스트 클라이언트 (목록/검색 블루프린트만 등록)"""
+    from flask import Flask
+    from flask_jwt_extended import JWTManager, create_access_token
+    from modules.classification import classification_bp
+    from modules.search import search_bp
+    from modules.utils.json_provider import create_json_provider
+
+    app = Flask(__name__)
+    app.json = create_json_provider(app)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-for-jwt-signing-32b'
+    JWTManager(app)
+    app.register_blueprint(classification_bp)
+    app.register_blueprint(search_bp, url_prefix='/search')
+
+    with app.app_context():
+        token = create_access_token(identity='tester')
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return test_client
+
+
+def sample_image(project_id: str, evtnum: int, index: int, **fields):
+    """모든 화면이 읽는 필드와 검출 결과 이미지(detection_image)까지 채운 images 문서"""
+    from bson.binary import Binary
+    from modules.search_index import normalized_document
+    from modules.timeline import with_captured_at
+
+    name = f"20240501-{evtnum:04d}{index:02d}s1.jpg"
+    captured = datetime.datetime(2024, 5, 1, 12) + datetime.timedelta(minutes=evtnum, seconds=index)
+    return normalized_document(with_captured_at({
+        'FileName': name,
+        'OriginalFileName': f"IMG_{evtnum:04d}{index:02d}.JPG",
+        'FilePath': f"{project_id}/2024-05/source/{name}",
+        'ThumnailPath': f"{project_id}/2024-05/thumbnail/thum_{name}",
+        'SerialNumber': 'CAM-1',
+        'DateTimeOriginal': {'$date': captured.isoformat() + 'Z'},
+        'UploadDate': captured,
+        'ProjectInfo': {'ProjectName': '반달곰', 'ID': project_id},
+        'AnalysisFolder': '2024-05',
+        'evtnum': evtnum,
+        'Infos': [{'best_class': 'deer', 'best_probability': 95.0, 'name': 'deer',
+                   'bbox': [1.0, 2.0, 3.0, 4.0], 'new_bbox': [1.0, 2.0, 3.0, 4.0]}],
+        'Count': 2,
+        'BestClass': 'deer',
+        'Accuracy': 95.0,
+        'AI_processed': True,
+        'AI_process_date': captured,
+        'detection_image': Binary(b'\xff' * 1024),
+        'is_classified': True,
+        'inspection_complete': False,
+        'inspection_status': 'pending',
+        'exception_status': 'processed',
+        'exception_comment': '메모',
+        'is_favorite': True,
+        'Latitude': 37.5,
+        'Longitude': 127.0,
+        'classification_date': captured,
+        **fields
+    }))
+
+
+@pytest.fixture
+def seed_images(db):
+    """일반검수 이벤트 events개(각 per_event장) + 예외검수 1장 + 검수 완료 1장과 검출 결과를 넣는 함수
+
+    이벤트 요약/카운터는 images_changed로 갱신한다. 반환값의 image_ids는 일반검수, 예외검수,
+    검수 완료 순서.
+    """
+    from bson.binary import Binary
+    from modules.changes import images_changed
+
+    def seed(events: int = 3, per_event: int = 3):
+        project_id = str(db.projects.insert_one({'project_name': '반달곰'}).inserted_id)
+        docs = [sample_image(project_id, evtnum, index)
+                for evtnum in range(1, events + 1) for index in range(per_event)]
+        docs.append(sample_image(project_id, events + 1, 0, is_classified=False))
+        docs.append(sample_image(project_id, events + 2, 0, inspection_complete=True, inspection_status='approved'))
+        image_ids = db.images.insert_many(docs).inserted_ids
+        db.detect_images.insert_many([{
+            'Image_id': image_id,
+            'BestClass': 'deer',
+            'Infos': doc['Infos'],
+            'Count': 2,
+            'Accuracy': 95.0,
+            'bbox': [1.0, 2.0, 3.0, 4.0],
+            'new_bbox': [1.0, 2.0, 3.0, 4.0],
+            'Latitude': 37.5,
+            'Longitude': 127.0,
+            'AI_processed': True,
+            'detection_image': Binary(b'\xff' * 1024)
+        } for image_id, doc in zip(image_ids, docs) if doc['is_classified']])
+        images_changed(image_ids)
+        return {'project_id': project_id, 'image_ids': [str(image_id) for image_id in image_ids]}
+
+    return seed
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pytest
+
+from modules.ai_detection import detection
+from modules.utils import storage
+
+
+class Boxes:
+    def __init__(self, data):
+        self.data = data
+
+
+class Result:
+    def __init__(self, data):
+        self.boxes = Boxes(data)
+
+
+class TwoDeerModel:
+    """모든 이미지에서 임계값 이상의 사슴 두 마리를 검출하는 모델"""
+    names = {0: 'deer', 1: 'pig', 2: 'racoon'}
+
+    def __call__(self, image):
+        return [Result(np.array([[10, 10, 50, 50, 0.95, 0], [60, 60, 90, 90, 0.9, 0]], dtype=np.float32))]
+
+
+@pytest.fixture
+def event_images(db, tmp_path, monkeypatch):
+    """STORAGE_ROOT 아래 파일이 있는 한 이벤트(3프레임) 이미지 문서"""
+    monkeypatch.setattr(storage, 'STORAGE_ROOT', str(tmp_path))
+    monkeypatch.setattr(detection, 'model', TwoDeerModel())
+    (tmp_path / 'p1' / 'source').mkdir(parents=True)
+
+    docs = []
+    for index in range(3):
+        name = f"20240501-12000{index}s1.jpg"
+        cv2.imwrite(str(tmp_path / 'p1' / 'source' / name), np.full((64, 64, 3), 128, dtype=np.uint8))
+        docs.append({
+            'FileName': name,
+            'FilePath': storage.storage_path('p1', 'source', name),
+            'SerialNumber': 'CAM-1',
+            'DateTimeOriginal': {'$date': datetime(2024, 5, 1, 12, 0, index).isoformat() + 'Z'},
+            'ProjectInfo': {'ProjectName': 'project', 'ID': 'p1'},
+            'evtnum': 1,
+            'is_classified': False,
+            'inspection_complete': False
+        })
+    return [str(object_id) for object_id in db.images.insert_many(docs).inserted_ids]
+
+
+def test_detection_job_fills_species_rollups(db, event_images):
+    counters = detection.run_detection_job(event_images, use_prefilter=False, use_cache=False)
+
+    assert counters['processed_images'] == 3
+    image = db.images.find_one({'FileName': '20240501-120000s1.jpg'})
+    assert (image['BestClass'], image['Count'], image['is_classified']) == ('deer', 2, True)
+    fields = ('project_id', 'species', 'camera', 'day', 'image_count', 'individual_count', 'event_count')
+    rows = [{field: row[field] for field in fields} for row in db.rollups.find()]
+    assert rows == [{'project_id': 'p1', 'species': 'deer', 'camera': 'CAM-1', 'day': '2024-05-01',
+                     'image_count': 3, 'individual_count': 6, 'event_count': 1}]
+
+
+def test_cache_hit_redraws_detection_image(db, event_images):
+    detection.run_detection_job(event_images, use_prefilter=False, use_cache=True)
+    db.detect_images.delete_many({})
+
+    counters = detection.run_detection_job(event_images, use_prefilter=False, use_cache=True)
+
+    assert (counters['cache_hits'], counters['inferences_run']) == (3, 0)
+    saved = list(db.detect_images.find())
+    assert len(saved) == 3
+    assert all(cv2.imdecode(np.frombuffer(doc['detection_image'], np.uint8), cv2.IMREAD_COLOR) is not None
+               for doc in saved)
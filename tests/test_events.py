@@ -0,0 +1,109 @@
+import pytest
+
+from modules import events
+from modules.indexes import sync_indexes
+
+KEY = ('p1', 1)
+
+
+def image(name, best_class):
+    return {'FileName': name, 'ProjectInfo': {'ID': 'p1', 'ProjectName': 'project'}, 'evtnum': 1,
+            'is_classified': True, 'inspection_complete': False, 'BestClass': best_class}
+
+
+@pytest.fixture
+def interleaved_refresh(db, monkeypatch):
+    """첫 요약 계산 도중 다른 요청이 이미지를 바꾸고 먼저 요약을 교체하도록 끼워 넣음"""
+    sync_indexes(['events'])
+    summarize = events.summarize_event
+    interleaved = []
+
+    def summarize_with_concurrent_write(key, docs):
+        if not interleaved:
+            interleaved.append(key)
+            db.images.update_many({}, {'$set': {'BestClass': 'pig'}})
+            events.refresh_events([key])
+        return summarize(key, docs)
+
+    monkeypatch.setattr(events, 'summarize_event', summarize_with_concurrent_write)
+    return interleaved
+
+
+@pytest.mark.parametrize('existing', [True, False], ids=['replace', 'insert'])
+def test_stale_refresh_does_not_overwrite_newer_summary(db, interleaved_refresh, existing):
+    db.images.insert_many([image('a.jpg', 'deer'), image('b.jpg', 'deer')])
+    if existing:
+        # version이 없는 이전 요약 문서
+        db.events.insert_one({'project_id': 'p1', 'evtnum': 1, 'species': 'deer'})
+
+    events.refresh_events([KEY])
+
+    assert interleaved_refresh == [KEY]
+    summary = db.events.find_one({'project_id': 'p1', 'evtnum': 1})
+    assert summary['species'] == 'pig'
+    assert db.events.count_documents({}) == 1
+
+
+def test_refresh_removes_summary_of_emptied_event(db):
+    sync_indexes(['events'])
+    db.images.insert_one(image('a.jpg', 'deer'))
+    events.refresh_events([KEY])
+    db.images.delete_many({})
+
+    events.refresh_events([KEY])
+
+    assert db.events.count_documents({}) == 0
+
+
+def test_grouped_search_keeps_stored_capture_time_shape(client, seed_images):
+    seed_images(events=1, per_event=2)
+
+    def group(url):
+        return client.get(url).get_json()['groups'][0]['DateTimeOriginal']
+
+    # 일반검수는 문자열, 예외검수/검수 완료는 저장된 값({'$date': ...})을 그대로 돌려줌 (기존 응답 형태)
+    assert group('/search/inspection/normal/search?group_by=evtnum') == '2024-05-01T12:01:00Z'
+    assert group('/search/inspection/exception/search?group_by=evtnum') == {'$date': '2024-05-01T12:02:00Z'}
+    assert group('/search/images/search?group_by=evtnum') == {'$date': '2024-05-01T12:03:00Z'}
+
+
+def test_grouped_search_filters_images_before_grouping(db, client, seed_images):
+    from modules.changes import images_changed
+
+    seed_images(events=2, per_event=3)
+    pig = db.images.find_one_and_update({'evtnum': 1, 'FileName': {'$regex': '02s1'}},
+                                        {'$set': {'BestClass': 'pig', 'Normalized.BestClass': 'pig'}})
+    images_changed([pig['_id']])
+
+    body = client.get('/search/inspection/normal/search?group_by=evtnum&species=pig').get_json()
+    assert body['group_match'] == 'images'
+    assert body['total'] == 1
+    group, = body['groups']
+    assert (group['evtnum'], group['imageCount']) == (1, 1)
+    assert group['ThumnailPath'].endswith(pig['ThumnailPath'].rsplit('/', 1)[1])
+
+    body = client.get('/search/inspection/normal/search?group_by=evtnum&species=pig&group_match=any_image').get_json()
+    assert body['group_match'] == 'any_image'
+    assert [(group['evtnum'], group['imageCount']) for group in body['groups']] == [(1, 3)]
+
+    # 이미지 단위 필터가 없으면 두 방식 결과가 같음 (events에서 조회)
+    unfiltered = client.get('/search/inspection/normal/search?group_by=evtnum').get_json()
+    assert [group['imageCount'] for group in unfiltered['groups']] == [3, 3]
+
+
+def test_grouped_search_rejects_unknown_group_match(client, seed_images):
+    seed_images(events=1, per_event=1)
+
+    response = client.get('/search/inspection/normal/search?group_by=evtnum&group_match=all')
+
+    assert response.status_code == 400
+
+
+def test_startup_rebuilds_only_empty_events(db, seed_images):
+    seed_images(events=2, per_event=2)
+    summaries = db.events.count_documents({})
+    db.events.delete_many({})
+
+    assert events.rebuild_if_empty() > 0
+    assert db.events.count_documents({}) == summaries
+    assert events.rebuild_if_empty() == 0
@@ -0,0 +1,35 @@
+import numpy as np
+
+from modules.ai_detection.prefilter import (
+    PREFILTER_ENABLED,
+    PREFILTER_SIZE,
+    score_event,
+    select_skipped_frames
+)
+
+
+def frame(animal: bool = False) -> np.ndarray:
+    """배경 밝기 100인 저해상도 프레임 (animal이면 같은 자리에 밝은 물체)"""
+    width, height = PREFILTER_SIZE
+    data = np.full((height, width), 100, dtype=np.float32)
+    if animal:
+        data[10:22, 20:36] = 220
+    return data
+
+
+def test_prefilter_is_off_by_default():
+    assert PREFILTER_ENABLED is False
+
+
+def test_stationary_animal_keeps_whole_event():
+    # 동물이 버스트 대부분에 머물면 중앙값 배경에 흡수되어 빈 프레임만 점수가 높아짐
+    scores = score_event({'a': frame(True), 'b': frame(True), 'c': frame(False)})
+
+    assert scores['a'] == scores['b'] == 0.0
+    assert select_skipped_frames(scores) == {}
+
+
+def test_empty_event_is_skipped():
+    scores = score_event({'a': frame(), 'b': frame(), 'c': frame()})
+
+    assert set(select_skipped_frames(scores)) == {'a', 'b', 'c'}
@@ -0,0 +1,131 @@
+import pytest
+from mongomock.collection import Collection
+
+from modules import classification, projections, search
+from modules.projections import VIEW_FIELDS
+
+# 프로젝션 도입 전 응답의 항목 키 (화면이 읽는 필드)
+BASELINE_KEYS = {
+    '/images': {'imageId', 'fileName', 'imageUrl', 'thumbnailUrl', 'uploadDate'},
+    '/classified-images/{image_id}': {
+        '_id', 'FileName', 'FilePath', 'ThumnailPath', 'ProjectInfo', 'DateTimeOriginal', 'UploadDate',
+        'Latitude', 'Longitude', 'SerialNumber', 'evtnum', 'AI_processed', 'is_classified', 'inspection_status',
+        'inspection_complete', 'exception_status', 'exception_comment', 'is_favorite', 'bbox', 'new_bbox',
+        'speciesName', 'BestClass', 'Count', 'Accuracy', 'related_images'
+    },
+    '/images/classified': {'imageId', 'imageUrl', 'uploadDate', 'classificationResult', 'sequenceNumber',
+                           'projectId', 'projectName'},
+    '/inspection/normal': {'imageId', 'fileName', 'imageUrl', 'uploadDate', 'projectId', 'projectName',
+                           'serialNumber', 'speciesName', 'evtnum', 'exception_status', 'bbox', 'new_bbox'},
+    '/inspection/exception': {'imageId', 'fileName', 'imageUrl', 'uploadDate', 'projectId', 'projectName',
+                              'serialNumber', 'exceptionStatus', 'evtnum'},
+    '/search/inspection/normal/search': {'id', 'filename', 'thumbnail', 'date', 'serial_number', 'project_name',
+                                         'project_id', 'evtnum'},
+    '/search/inspection/exception/search': {'id', 'filename', 'thumbnail', 'date', 'serial_number',
+                                            'project_name', 'project_id', 'exception_status', 'event_number',
+                                            'is_classified', 'latitude', 'longitude', 'accuracy'},
+    '/search/images/search': {'id', 'filename', 'ThumnailPath', 'date', 'serial_number', 'species',
+                              'project_name', 'project_id', 'count', 'event_number', 'inspection_complete',
+                              'latitude', 'longitude', 'accuracy'}
+}
+GROUP_KEYS = {'DateTimeOriginal', 'ThumnailPath', 'evtnum', 'imageCount', 'projectId', 'projectName', 'serialNumber'}
+GROUPED_KEYS = {
+    '/search/inspection/normal/search?group_by=evtnum': GROUP_KEYS,
+    '/search/inspection/exception/search?group_by=evtnum': GROUP_KEYS | {'exceptionStatus'},
+    '/search/images/search?group_by=evtnum': GROUP_KEYS
+}
+# /search/all($text)과 예외검수/검수 완료 상세($lookup let)는 mongomock에서 실행되지 않아 제외
+URLS = list(BASELINE_KEYS) + list(GROUPED_KEYS)
+
+
+def item_keys(body):
+    """응답의 첫 항목 키"""
+    if 'data' in body:
+        return set(body['data']['groups'][0]['images'][0])
+    if 'images' in body:
+        return set(body['images'][0])
+    if 'groups' in body:
+        return set(body['groups'][0])
+    return set(body)
+
+
+@pytest.fixture
+def image_id(seed_images):
+    """상세 조회 대상 - 기본값과 다른 값이 많은 검수 완료 이미지"""
+    return seed_images()['image_ids'][-1]
+
+
+@pytest.fixture
+def views_used(monkeypatch):
+    """요청 중 사용된 view 이름"""
+    used = set()
+    view_projection = projections.projection
+
+    def recording_projection(view):
+        used.add(view)
+        return view_projection(view)
+
+    for module in (projections, classification, search):
+        monkeypatch.setattr(module, 'projection', recording_projection)
+    return used
+
+
+@pytest.fixture
+def full_documents(monkeypatch):
+    """프로젝션 없이 문서 전체를 읽도록 바꿈"""
+    def read_everything():
+        for module in (projections, classification, search):
+            monkeypatch.setattr(module, 'projection', lambda view: None)
+        for module in (classification, search):
+            monkeypatch.setattr(module, 'project_stage', lambda view: {'$match': {}})
+    return read_everything
+
+
+def get(client, url, image_id):
+    response = client.get(url.format(image_id=image_id))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def get_any(client, url, image_id):
+    """오류 응답도 그대로 (상태 코드, 본문)"""
+    response = client.get(url.format(image_id=image_id))
+    return response.status_code, response.get_json()
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_projected_response_matches_full_documents(client, image_id, full_documents, url):
+    projected = get(client, url, image_id)
+    full_documents()
+
+    assert item_keys(projected) == {**BASELINE_KEYS, **GROUPED_KEYS}[url]
+    assert projected == get(client, url, image_id)
+
+
+@pytest.mark.parametrize('url', URLS)
+def test_every_projected_field_is_serialized(client, image_id, views_used, monkeypatch, url):
+    expected = get_any(client, url, image_id)
+    for view in sorted(views_used):
+        fields = VIEW_FIELDS[view]
+        for field in fields:
+            monkeypatch.setitem(VIEW_FIELDS, view, tuple(other for other in fields if other != field))
+            assert get_any(client, url, image_id) != expected, f"{view}의 {field}는 응답에 쓰이지 않음"
+        monkeypatch.setitem(VIEW_FIELDS, view, fields)
+
+
+def test_image_reads_never_fetch_detection_image(client, image_id, monkeypatch):
+    fetched = []
+    find = Collection.find
+
+    def recording_find(self, *args, **kwargs):
+        cursor = find(self, *args, **kwargs)
+        if self.name in ('images', 'detect_images'):
+            fetched.extend(cursor.clone())
+        return cursor
+
+    monkeypatch.setattr(Collection, 'find', recording_find)
+    for url in URLS:
+        get(client, url, image_id)
+
+    assert fetched
+    assert not [doc for doc in fetched if 'detection_image' in doc]
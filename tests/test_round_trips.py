@@ -0,0 +1,47 @@
+from collections import Counter
+
+import pytest
+from mongomock.collection import Collection
+
+from modules.classification import DETECTION_JOIN_BATCH
+
+OPERATIONS = ('find', 'find_one', 'aggregate', 'count_documents', 'estimated_document_count', 'distinct')
+
+
+@pytest.fixture
+def round_trips(monkeypatch):
+    """컬렉션별 DB 왕복(find/aggregate/count 호출) 횟수"""
+    calls = Counter()
+
+    def counted(operation):
+        method = getattr(Collection, operation)
+
+        def wrapper(self, *args, **kwargs):
+            calls[self.name] += 1
+            return method(self, *args, **kwargs)
+        return wrapper
+
+    for operation in OPERATIONS:
+        monkeypatch.setattr(Collection, operation, counted(operation))
+    return calls
+
+
+def request_round_trips(client, round_trips, url):
+    round_trips.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return dict(round_trips), response.get_json()
+
+
+def test_normal_inspection_round_trips_do_not_grow_with_page_size(client, seed_images, round_trips):
+    seed_images(events=12, per_event=3)
+    client.get('/inspection/normal?per_page=1')  # 카운터 캐시 채움
+
+    small, small_body = request_round_trips(client, round_trips, '/inspection/normal?per_page=2')
+    large, large_body = request_round_trips(client, round_trips, '/inspection/normal?per_page=12')
+
+    assert (len(small_body['images']), len(large_body['images'])) == (6, 36)
+    assert 36 <= DETECTION_JOIN_BATCH
+    assert small == large
+    assert large['detect_images'] == 1
+    assert all(image['speciesName'] == 'deer' and image['bbox'] for image in large_body['images'])
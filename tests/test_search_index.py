@@ -0,0 +1,15 @@
+from modules.search_index import backfill_if_missing
+
+
+def test_startup_backfills_documents_missing_normalized(db, client):
+    db.images.insert_one({'FileName': 'a.jpg', 'ThumnailPath': 'thumb/a.jpg', 'DateTimeOriginal': '2024-05-01',
+                          'evtnum': 1, 'Count': 1, 'SerialNumber': ' CAM-01 ', 'BestClass': 'Deer',
+                          'ProjectInfo': {'ID': 'p1', 'ProjectName': 'Forest'}, 'is_classified': True,
+                          'inspection_complete': True})
+
+    assert client.get('/search/images/search?serial_number=cam').get_json()['images'] == []
+    assert backfill_if_missing() == 1
+    assert db.images.find_one()['Normalized'] == {'SerialNumber': 'cam-01', 'BestClass': 'deer',
+                                                 'ProjectName': 'forest'}
+    assert len(client.get('/search/images/search?serial_number=cam').get_json()['images']) == 1
+    assert backfill_if_missing() == 0
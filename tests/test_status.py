@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules import status
+from modules.changes import images_changed
+from modules.counters import reconcile_counters
+
+
+@pytest.fixture
+def project_images(db):
+    project_id = str(db.projects.insert_one({'project_name': '반달곰'}).inserted_id)
+    recent = datetime.utcnow() - timedelta(hours=1)
+    db.images.insert_many([
+        {'ProjectInfo': {'ID': project_id}, 'is_classified': True, 'inspection_complete': True,
+         'inspection_status': 'approved', 'classification_date': recent, 'inspection_date': recent},
+        {'ProjectInfo': {'ID': project_id}, 'is_classified': True, 'inspection_complete': False,
+         'classification_date': datetime(2020, 1, 1)},
+        {'ProjectInfo': {'ID': project_id}, 'is_classified': False, 'inspection_complete': False,
+         'inspection_status': 'rejected'},
+        {'ProjectInfo': {'ID': 'other'}, 'inspection_complete': False}
+    ])
+    reconcile_counters()
+    return project_id
+
+
+def test_summary_reads_counters_without_facet(project_images, monkeypatch):
+    monkeypatch.setattr(status, 'facet_status_summary', lambda since: pytest.fail("$facet 집계를 실행함"))
+
+    summary = status.compute_status_summary()
+
+    assert summary == {
+        'total_images': 4,
+        'classified_images': 2,
+        'unclassified_images': 1,
+        'inspection_status': {'approved': 1, 'pending': 2, 'rejected': 1},
+        'recent_activities': {'classifications': 1, 'inspections': 1},
+        'project_stats': [{'project_name': '반달곰', 'total_images': 3, 'classified_images': 2}]
+    }
+
+
+def test_summary_follows_incremental_updates(db, project_images):
+    image = db.images.find_one({'inspection_status': 'rejected'})
+    db.images.update_one({'_id': image['_id']}, {'$set': {'inspection_status': 'approved', 'is_classified': True}})
+    images_changed([image['_id']])
+
+    summary = status.compute_status_summary()
+
+    assert summary['inspection_status'] == {'approved': 2, 'pending': 2}
+    assert (summary['classified_images'], summary['unclassified_images']) == (3, 0)
+
+
+def test_summary_falls_back_to_facet_before_reconcile(db, monkeypatch):
+    db.images.insert_one({'ProjectInfo': {'ID': 'p1'}, 'is_classified': True})
+    monkeypatch.setattr(status, 'facet_status_summary', lambda since: {'source': 'facet'})
+
+    assert status.compute_status_summary() == {'source': 'facet'}
+    assert status.compute_status_summary(exact=True) == {'source': 'facet'}
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from modules.timeline import backfill_captured_at, parse_time_range, time_range_condition, with_captured_at
+
+
+def exif_image(name, captured):
+    """exifparser.create_exif_data와 같은 형태({'$date': ISO 문자열})로 촬영 시간을 저장한 이미지"""
+    return {'FileName': name, 'DateTimeOriginal': {'$date': captured.isoformat() + 'Z'}}
+
+
+def matching_names(db, time_range):
+    return sorted(doc['FileName'] for doc in db.images.find(time_range_condition(time_range)))
+
+
+def test_condition_is_a_plain_indexable_range():
+    condition = time_range_condition(parse_time_range('2024-05-01', '2024-05-01'))
+
+    assert condition == {'CapturedAt': {'$gte': datetime(2024, 5, 1), '$lt': datetime(2024, 5, 2)}}
+
+
+def test_exif_writes_carry_captured_at():
+    fields = with_captured_at(exif_image('a.jpg', datetime(2024, 5, 1, 12, 30)))
+
+    assert fields['CapturedAt'] == datetime(2024, 5, 1, 12, 30)
+
+
+def test_range_matches_backfilled_exifparser_dates(db):
+    db.images.insert_many([
+        exif_image('before.jpg', datetime(2024, 4, 30, 23, 59, 59)),
+        exif_image('start.jpg', datetime(2024, 5, 1, 0, 0, 0)),
+        exif_image('inside.jpg', datetime(2024, 5, 1, 12, 30, 0, 123456)),
+        exif_image('end.jpg', datetime(2024, 5, 2, 0, 0, 0)),
+        {'FileName': 'datetime.jpg', 'DateTimeOriginal': datetime(2024, 5, 1, 8, 0, 0)},
+        {'FileName': 'no_date.jpg'}
+    ])
+    assert backfill_captured_at() == 5
+
+    assert matching_names(db, parse_time_range('2024-05-01', '2024-05-01')) == ['datetime.jpg', 'inside.jpg', 'start.jpg']
+
+
+def test_open_ended_ranges_skip_images_without_date(db):
+    db.images.insert_many([
+        exif_image('old.jpg', datetime(2023, 1, 1)),
+        exif_image('new.jpg', datetime(2024, 1, 1)),
+        {'FileName': 'no_date.jpg'}
+    ])
+    backfill_captured_at()
+
+    assert matching_names(db, parse_time_range(None, '2023-12-31')) == ['old.jpg']
+    assert matching_names(db, parse_time_range('2023-06-01', None)) == ['new.jpg']